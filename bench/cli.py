@@ -0,0 +1,162 @@
+"""End-to-end latency of the `mkcommit` console entry point.
+
+Every repetition starts a fresh interpreter that calls `mkcommit.main:main`,
+so the numbers include interpreter start-up and imports, i.e. what a
+developer waits for on each `commit-msg` hook call. The bench config
+(`res/bench.mkcommit.py`) answers its prompts with `mkcommit.fixtures._ask`;
+in run mode the confirmation prompt is answered with "yes" and `git commit`
+runs in a throwaway repository (it has nothing to commit, but the process
+is spawned and waited for like in a real run).
+
+The import breakdown comes from `python -X importtime` and is grouped by
+top-level package.
+
+Usage: `python bench/cli.py [--repeat N] [--modes hook stdout run] [--output FILE]`
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CONFIG = os.path.join(HERE, "res", "bench.mkcommit.py")
+
+WATCHED_PACKAGES = [
+    "mkcommit", "InquirerPy", "prompt_toolkit", "pfzy", "requests", "urllib3",
+    "charset_normalizer", "idna", "certifi", "yaml", "prettyprinter", "pyperclip",
+]
+
+# `main()` reads `sys.argv`; the confirmation prompt of run mode is the only
+# prompt that does not go through the bench config, so it is answered here.
+DRIVER = """
+import sys
+import importlib
+cli = importlib.import_module("mkcommit.main")
+cli.confirm = lambda question: True
+sys.argv = ["mkcommit"] + sys.argv[1:]
+cli.main()
+"""
+
+MODE_ARGS: Dict[str, List[str]] = {
+    "hook": ["-f", CONFIG, "-x", "feat: validate this message"],
+    "stdout": ["-f", CONFIG, "-s"],
+    "run": ["-f", CONFIG],
+}
+
+
+def _init_repo(repo: str) -> None:
+    subprocess.run(("git", "init", "-q", repo), check=True)
+    for key, value in (("user.name", "Bench Mark"), ("user.email", "bench@example.com")):
+        subprocess.run(("git", "-C", repo, "config", key, value), check=True)
+
+
+def time_mode(mode: str, repeat: int, cwd: str) -> List[float]:
+    """Wall-clock seconds of `repeat` cold runs of `mkcommit` in the given mode"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            (sys.executable, "-c", DRIVER, *MODE_ARGS[mode]),
+            cwd=cwd,
+            check=mode != "run",  # `git commit` with nothing staged exits with 1
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bare_interpreter(repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run((sys.executable, "-c", "pass"), check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def import_breakdown(mode: str, cwd: str) -> Dict[str, Dict[str, float]]:
+    """Self and cumulative import time in milliseconds per top-level package
+
+    Self time is the sum over all modules of the package. Cumulative time is
+    the sum over the imports of the package not nested in another import of
+    the same package, so nothing is counted twice.
+    """
+    proc = subprocess.run(
+        (sys.executable, "-X", "importtime", "-c", DRIVER, *MODE_ARGS[mode]),
+        cwd=cwd,
+        capture_output=True,
+        text=True
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, name.strip().split(".")[0], int(self_us), int(cumulative_us)))
+
+    breakdown: Dict[str, Dict[str, float]] = {}
+    # `importtime` prints an import after the imports it triggered, reversed
+    # every import comes right after its parent
+    ancestors: List[Tuple[int, str]] = []
+    for depth, package, self_us, cumulative_us in reversed(entries):
+        while ancestors and ancestors[-1][0] >= depth:
+            ancestors.pop()
+        entry = breakdown.setdefault(package, {"self_ms": 0.0, "cumulative_ms": 0.0})
+        entry["self_ms"] += self_us / 1000
+        if all(p != package for _, p in ancestors):
+            entry["cumulative_ms"] += cumulative_us / 1000
+        ancestors.append((depth, package))
+    return breakdown
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end latency of `mkcommit`")
+    parser.add_argument("--repeat", type=int, default=10, help="Cold runs per mode")
+    parser.add_argument("--modes", type=str, nargs="*", default=list(MODE_ARGS),
+                        choices=list(MODE_ARGS))
+    parser.add_argument("--all-packages", action="store_true",
+                        help="Show the import time of every package, not just the watched ones")
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    report: Dict[str, Dict] = {"latency_ms": {}, "imports_ms": {}}
+
+    bare = [t * 1000 for t in bare_interpreter(args.repeat)]
+    report["latency_ms"]["bare-interpreter"] = {
+        "median": statistics.median(bare), "min": min(bare), "max": max(bare)
+    }
+    with tempfile.TemporaryDirectory(prefix="mkcommit-bench-") as repo:
+        _init_repo(repo)
+        for mode in args.modes:
+            timings = [t * 1000 for t in time_mode(mode, args.repeat, repo)]
+            report["latency_ms"][mode] = {
+                "median": statistics.median(timings), "min": min(timings), "max": max(timings)
+            }
+            report["imports_ms"][mode] = import_breakdown(mode, repo)
+
+    print(f"{'mode':<18} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    for mode, stats in report["latency_ms"].items():
+        print(f"{mode:<18} {stats['median']:>10.1f} {stats['min']:>10.1f} {stats['max']:>10.1f}")
+
+    for mode, breakdown in report["imports_ms"].items():
+        print(f"\nImports in {mode} mode:")
+        print(f"  {'package':<22} {'self ms':>10} {'cumulative ms':>14}")
+        rows = sorted(breakdown.items(), key=lambda item: -item[1]["cumulative_ms"])
+        for package, entry in rows:
+            if args.all_packages or package in WATCHED_PACKAGES:
+                print(f"  {package:<22} {entry['self_ms']:>10.1f} {entry['cumulative_ms']:>14.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Synthetic commit header corpora for the benchmarks in this directory.
+
+Everything is generated from a seeded `random.Random`, so two runs with the
+same arguments produce the same inputs.
+"""
+import random
+from typing import Iterator, List, Tuple
+
+KEYWORDS = ["feat", "fix", "docs", "style", "refactor", "test", "chore", "perf", "build", "ci"]
+NEAR_MISS_KEYWORDS = ["fea", "feats", "fixx", "Feat", "chor", "f eat", "feat ", "docs_"]
+
+
+def pathological_headers(size: int = 20000) -> Iterator[Tuple[str, str]]:
+    """Yields `(name, header)` pairs designed to make backtracking matchers struggle.
+
+    Args:
+        size (int): number of repetitions of the adversarial unit in each input
+    """
+    yield "comma-chain-no-colon", "feat, " * size + "feat"
+    yield "comma-chain-no-space", "feat," * size + "feat:"
+    yield "comma-chain-bad-tail", "feat, " * size + "feat?: x"
+    yield "comma-chain-trailing-comma", "feat(a), " * size + "feat(a)!:, x"
+    yield "repeated-scopes", "feat" + "(scope)" * size + ": x"
+    yield "scope-chain-no-colon", "feat(scope)!, " * size
+    yield "unclosed-scope", "feat(" + "a" * size + ": x"
+    yield "scope-with-spaces", "feat(" + "a " * size + "): x"
+    near_misses = NEAR_MISS_KEYWORDS * (size // len(NEAR_MISS_KEYWORDS))
+    yield "near-miss-keywords", ", ".join(near_misses) + ": x"
+    yield "subject-only-commas", "feat: " + "," * size
+    yield "no-separator", "feat" * size
+    yield "colon-without-space", "feat:" * size
+    yield "bang-chain", "feat" + "!" * size + ": x"
+    yield "preamble-slashes", "[" + "KrCz/" * size + "] feat: x"
+    yield "preamble-unclosed", "[" + "KrCz/PROJECT-1234 " * (size // 4) + "feat: x"
+    yield "preamble-brackets", "[KrCz/PROJECT-1234]" * (size // 4) + " feat: x"
+    yield "merge-near-miss", "Merge branc" + "h" * size
+
+
+def valid_headers(count: int, seed: int = 0) -> List[str]:
+    """Well-formed semantic headers, some with scopes, breaking marks and several types"""
+    rng = random.Random(seed)
+    headers = []
+    for _ in range(count):
+        types = []
+        for _ in range(rng.choice([1, 1, 1, 2, 3])):
+            kw = rng.choice(KEYWORDS[:7])
+            if rng.random() < 0.3:
+                kw += "(" + rng.choice(["cli", "core", "suites", "model"]) + ")"
+            types.append(kw)
+        breaking = "!" if rng.random() < 0.1 else ""
+        subject = " ".join(rng.choice(["add", "remove", "the", "parser", "cache", "hook"])
+                           for _ in range(rng.randint(1, 8)))
+        headers.append(", ".join(types) + breaking + ": " + subject)
+    return headers
+
+
+def invalid_headers(count: int, seed: int = 0) -> List[str]:
+    """Headers that fail validation in one of several typical ways"""
+    rng = random.Random(seed)
+    broken = [
+        lambda h: h.replace(": ", ":", 1),
+        lambda h: rng.choice(NEAR_MISS_KEYWORDS) + h[h.index(":"):],
+        lambda h: h.replace(": ", " ", 1),
+        lambda h: h.replace(",", ";", 1) if "," in h else "WIP " + h,
+    ]
+    return [rng.choice(broken)(h) for h in valid_headers(count, seed)]
+
+
+def technica_headers(count: int, seed: int = 0) -> List[str]:
+    """Well-formed technica headers built on top of `valid_headers`"""
+    rng = random.Random(seed)
+    return [
+        f"[{rng.choice(['KrCz', 'JoDo', 'AnSm'])}/PROJECT-{rng.randint(1, 9999)}] {h}"
+        for h in valid_headers(count, seed)
+    ]
+
+
+def bodies(count: int, seed: int = 0) -> List[str]:
+    """Message bodies with a paragraph of prose and an optional trailer block"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        lines = [
+            " ".join(rng.choice(["lorem", "ipsum", "dolor", "sit", "amet"]) for _ in range(10))
+            for _ in range(rng.randint(1, 6))
+        ]
+        if rng.random() < 0.5:
+            lines.append("")
+            lines.append(f"Refs: #{rng.randint(1, 999)}")
+            if rng.random() < 0.3:
+                lines.append("BREAKING CHANGE: the old behavior is gone")
+        result.append("\n".join(lines))
+    return result
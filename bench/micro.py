@@ -0,0 +1,256 @@
+"""Microbenchmarks for validators, suite checks, trailer handling and `CommitMessage.make`.
+
+Each benchmark runs a callable over a synthetic corpus (see `corpus.py`) and
+records the best per-call time out of `--repeat` passes. Results are written
+as JSON and compared against a stored baseline; a benchmark slower than the
+baseline by more than `--threshold` is reported as a regression and makes
+the run exit with status 1.
+
+Passes of a fixed calibration loop are interleaved with the passes of every
+benchmark and stored with the results. A benchmark is compared to the
+baseline relative to the calibration measured next to it, so a baseline
+saved on one machine stays meaningful on a faster, slower or busier one.
+
+Usage:
+    python bench/micro.py [--size N] [--output FILE]
+    python bench/micro.py --save-baseline
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from mkcommit import batch, rules, trailers
+from mkcommit.header import parse_header
+from mkcommit.model import CommitMessage, ValidationFailedException
+from mkcommit.suites import conventional, semantic, technica
+from mkcommit import validators
+
+import corpus
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+Benchmark = Tuple[Callable[[Any], Any], Sequence[Any]]
+
+
+def _swallow(f: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Invalid inputs are part of the corpora, failures are expected"""
+    def _f(x: Any) -> Any:
+        try:
+            return f(x)
+        except ValidationFailedException:
+            return False
+    return _f
+
+
+def _add_trailer(body: str) -> str:
+    parsed = trailers.parse(body)
+    parsed.add("Refs", "#1")
+    return parsed.render()
+
+
+RULES = rules.RuleSet(
+    rules.header_grammar("conventional"),
+    rules.subject_length(),
+    rules.body_line_length(),
+    rules.required_trailers("Refs"),
+)
+
+
+def benchmarks(size: int, seed: int) -> Dict[str, Benchmark]:
+    half = size // 2
+    headers = corpus.valid_headers(half, seed) + corpus.invalid_headers(size - half, seed)
+    technica_headers = corpus.technica_headers(half, seed) + \
+        corpus.invalid_headers(size - half, seed)
+    bodies = corpus.bodies(size, seed)
+    body_lines = [b.split("\n") for b in bodies]
+    words = [h.split(":")[0] for h in headers]
+    numbers = [str(i) if i % 3 else f"{i}.5" if i % 2 else f"x{i}" for i in range(size)]
+    initials = ["KrCz", "KrCZ", "Krzy", "AbCd1"] * (size // 4 + 1)
+    messages = [CommitMessage(h, b) for h, b in zip(headers, bodies)]
+
+    return {
+        "validators.matches": (validators.matches(r"^\w+(\(\w+\))?: "), headers),
+        "validators.is_int": (validators.is_int(), numbers),
+        "validators.is_float": (validators.is_float(), numbers),
+        "validators.min_len": (validators.min_len(10), headers),
+        "validators.max_len": (validators.max_len(55), headers),
+        "validators.validate_initials": (validators.validate_initials(2, 2), initials[:size]),
+        "validators.is_true": (validators.is_true(), words),
+        "validators.is_false": (validators.is_false(), words),
+        "validators.are_keywords_selected": (validators.are_keywords_selected(), words),
+        "semantic.is_shorter_than_55_chars": (semantic.is_shorter_than_55_chars, headers),
+        "semantic.is_keyword": (_swallow(semantic.is_keyword), words),
+        "semantic.is_semantic": (_swallow(semantic.is_semantic), headers),
+        "semantic.has_short_commit_msg_proper_length": (
+            _swallow(semantic.has_short_commit_msg_proper_length), headers
+        ),
+        "conventional.is_conventional": (_swallow(conventional.is_conventional), headers),
+        "conventional.is_word": (_swallow(conventional.is_word), words),
+        "conventional.is_sentence": (_swallow(conventional.is_sentence), headers),
+        "technica.is_technica": (_swallow(technica.is_technica), technica_headers),
+        "batch.semantic_check": (batch.semantic_check(), headers),
+        "batch.conventional_check": (batch.conventional_check(), headers),
+        "batch.technica_check": (batch.technica_check(), technica_headers),
+        "conventional.find_trailer": (conventional.find_trailer, body_lines),
+        "conventional.attach_trailer": (
+            lambda b: conventional.attach_trailer(b, "Refs: #1"), bodies
+        ),
+        "trailers.parse": (trailers.parse, bodies),
+        "trailers.add": (_add_trailer, bodies),
+        "rules.run": (RULES.run, messages),
+        "rules.run_fail_fast": (lambda m: RULES.run(m, fail_fast=True), messages),
+        "CommitMessage.make": (lambda m: m.make(), messages),
+    }
+
+
+def _time_pass(f: Callable[[Any], Any], inputs: Sequence[Any]) -> float:
+    # validators share the memoised header parse, start every pass cold
+    parse_header.cache_clear()
+    gc.disable()
+    start = time.perf_counter()
+    for x in inputs:
+        f(x)
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    return elapsed
+
+
+def _calibration_pass(inputs: Sequence[str]) -> float:
+    """A fixed mix of what the benchmarks spend their time on: regex
+    matching, string methods, dict accesses and function calls"""
+    pattern = re.compile(r"^(\w+)(?:\(([^)]*)\))?(!?): (.*)$")
+    table: Dict[str, int] = {}
+    gc.disable()
+    start = time.perf_counter()
+    for s in inputs:
+        m = pattern.match(s)
+        key = s.partition(":")[0].strip().lower()
+        table[key] = table.get(key, 0) + (len(m.group(4).strip()) if m else len(s.split()))
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    return elapsed
+
+
+def run(
+    size: int,
+    repeat: int,
+    seed: int,
+    only: List[str]
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Returns the best time per call in nanoseconds for every benchmark, and
+    the best time per input of the calibration loop run alongside it"""
+    half = size // 2
+    calibration_inputs = corpus.valid_headers(half, seed) + \
+        corpus.invalid_headers(size - half, seed)
+    results, calibration = {}, {}
+    for name, (f, inputs) in benchmarks(size, seed).items():
+        if only and not any(o in name for o in only):
+            continue
+        # interleaved, so both see the same load on the machine
+        best = best_calibration = float("inf")
+        for _ in range(repeat):
+            best_calibration = min(best_calibration, _calibration_pass(calibration_inputs))
+            best = min(best, _time_pass(f, inputs))
+        results[name] = best / len(inputs) * 1e9
+        calibration[name] = best_calibration / len(calibration_inputs) * 1e9
+    return results, calibration
+
+
+def compare(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    threshold: float,
+    scales: Optional[Dict[str, float]] = None
+) -> List[str]:
+    """Prints a comparison table and returns names of regressed benchmarks
+
+    Args:
+        scales (Optional[Dict[str, float]]): speed of this machine relative to
+            the baseline one per benchmark, i.e. the calibration time of this
+            run divided by the baseline's; absolute times are compared if `None`
+    """
+    regressions = []
+    print(f"{'benchmark':<46} {'ns/call':>10} {'expected':>10} {'ratio':>7}")
+    for name, ns in results.items():
+        base = baseline.get(name)
+        if base:
+            expected = base * (scales or {}).get(name, 1.0)
+            ratio = ns / expected
+            flag = "  REGRESSION" if ratio > threshold else ""
+            print(f"{name:<46} {ns:>10.1f} {expected:>10.1f} {ratio:>7.2f}{flag}")
+            if ratio > threshold:
+                regressions.append(name)
+        else:
+            print(f"{name:<46} {ns:>10.1f} {'-':>10} {'-':>7}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for `mkcommit`")
+    parser.add_argument("--size", type=int, default=2000, help="Number of inputs per corpus")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="Passes over each corpus, the fastest one is kept")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the corpus generator")
+    parser.add_argument("--only", type=str, nargs="*", default=[],
+                        help="Run only benchmarks whose name contains one of these strings")
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE,
+                        help="Baseline JSON file to compare against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Overwrite the baseline with the results of this run")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="Ratio to the baseline above which a benchmark has regressed")
+    args = parser.parse_args()
+
+    results, calibration = run(args.size, args.repeat, args.seed, args.only)
+    report = {
+        "meta": {
+            "size": args.size,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results_ns_per_call": results,
+        "calibration_ns_per_input": calibration,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    baseline: Dict[str, float] = {}
+    scales: Optional[Dict[str, float]] = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            stored = json.load(f)
+        baseline = stored["results_ns_per_call"]
+        base_calibration = stored.get("calibration_ns_per_input", {})
+        if base_calibration:
+            scales = {
+                name: calibration[name] / base_calibration[name]
+                for name in calibration if name in base_calibration
+            }
+        else:
+            print("The baseline has no calibration, comparing absolute times", file=sys.stderr)
+    regressions = compare(results, baseline, args.threshold, scales)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
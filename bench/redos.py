@@ -0,0 +1,104 @@
+"""Worst-case latency benchmark for header validation.
+
+Runs every suite validator over `corpus.pathological_headers` and records
+the slowest call per validator. Exits with status 1 when any call takes
+longer than the latency budget, or when quadrupling the input size makes a
+call grow by more than `--max-growth` (i.e. the validator is not linear).
+
+Usage: `python bench/redos.py [--size N] [--budget-ms MS] [--output FILE]`
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+from typing import Callable, Dict
+
+from mkcommit.header import parse_header
+from mkcommit.model import ValidationFailedException
+from mkcommit.suites import conventional, semantic, technica
+
+from corpus import pathological_headers
+
+VALIDATORS: Dict[str, Callable[[str], bool]] = {
+    "semantic.is_semantic": semantic.is_semantic,
+    "semantic.has_short_commit_msg_proper_length": semantic.has_short_commit_msg_proper_length,
+    "conventional.is_conventional": conventional.is_conventional,
+    "technica.is_technica": technica.is_technica,
+}
+
+
+def _time_call(validator: Callable[[str], bool], s: str) -> float:
+    # every call should pay for its own parse
+    parse_header.cache_clear()
+    gc.disable()
+    start = time.perf_counter()
+    try:
+        validator(s)
+    except ValidationFailedException:
+        pass
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    return elapsed
+
+
+def run(size: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Returns the worst time in seconds, per validator and per corpus entry"""
+    results: Dict[str, Dict[str, float]] = {}
+    corpus = list(pathological_headers(size))
+    for name, validator in VALIDATORS.items():
+        results[name] = {
+            entry: max(_time_call(validator, s) for _ in range(repeat))
+            for entry, s in corpus
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worst-case latency of header validators")
+    parser.add_argument("--size", type=int, default=2000,
+                        help="Repetitions of the adversarial unit in each input")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Calls per input, the slowest one is kept")
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="Fail when any single call takes longer than this")
+    parser.add_argument("--max-growth", type=float, default=8.0,
+                        help="Fail when a call on 4x larger input is this many times slower")
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.size, args.repeat)
+    results_4x = run(args.size * 4, args.repeat)
+    failures = []
+    for name, per_entry in results.items():
+        entry, worst = max(per_entry.items(), key=lambda item: item[1])
+        print(f"{name:<48} worst {worst * 1000:8.3f} ms  ({entry})")
+        for e, t in per_entry.items():
+            if t * 1000 > args.budget_ms:
+                failures.append(
+                    f"OVER BUDGET: {name} on {e}: {t * 1000:.3f} ms > {args.budget_ms} ms"
+                )
+            # growth on sub-millisecond calls is mostly timer noise
+            growth = results_4x[name][e] / max(t, 1e-3)
+            if growth > args.max_growth:
+                failures.append(
+                    f"SUPERLINEAR: {name} on {e}: {growth:.1f}x slower on 4x the input"
+                )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "size": args.size,
+                "budget_ms": args.budget_ms,
+                "results": results,
+                "results_4x": results_4x
+            }, f, indent=2)
+
+    if failures:
+        for failure in failures:
+            print(failure, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
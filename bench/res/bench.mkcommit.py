@@ -0,0 +1,20 @@
+from mkcommit import CommitMessage, to_stdout
+from mkcommit.fixtures import _ask
+from mkcommit.suites import semantic
+
+
+def commit():
+    keyword = _ask("Keyword").keyword
+    return CommitMessage(
+        f"{keyword}: {_ask('Short commit message')}",
+        _ask("Long commit message")
+    )
+
+
+def on_commit(msg: CommitMessage):
+    semantic.is_semantic(msg.first_line)
+    semantic.has_short_commit_msg_proper_length(msg.first_line)
+
+
+if __name__ == "__main__":
+    to_stdout(commit())
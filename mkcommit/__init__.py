@@ -1,7 +1,10 @@
 __version__ = "1.3.2"
 
+from mkcommit import trace  # noqa: F401  (first, to time the rest of the import)
+
 from mkcommit.model import *  # noqa: F401,F403
 from mkcommit.main import *  # noqa: F401,F403
 from mkcommit.editor_handler import *  # noqa: F401,F403
 from mkcommit.blocks import *  # noqa: F401,F403
 from mkcommit.include import *  # noqa: F401,F403
+from mkcommit import register  # noqa: F401
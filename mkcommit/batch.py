@@ -0,0 +1,157 @@
+"""Validation of many headers at once, without exceptions.
+
+Validators and suite checks validate one string per call and suite checks
+raise `ValidationFailedException` on failure. The checks here return a
+`Reason` instead, and `validate_batch` runs them over a sequence of headers,
+validating each distinct header once::
+
+    >>> from mkcommit.batch import semantic_check, subject_length_check, validate_batch
+    >>> results = validate_batch(
+    ...     ["feat: a", "oops", "feat: a"], semantic_check(), subject_length_check()
+    ... )
+    >>> [(r.ok, r.reason.name) for r in results]
+    [(True, 'OK'), (False, 'MALFORMED_HEADER'), (True, 'OK')]
+
+Any validator or suite function can be batched with `from_validator` and
+`from_suite`; the built-in checks are faster as they never raise.
+"""
+from enum import IntEnum
+from typing import Callable, Dict, Iterable, List, NamedTuple
+
+from mkcommit.header import HeaderMatcher, parse_header
+from mkcommit.model import MalformedHeaderException, ValidationFailedException, Validator
+from mkcommit.suites import conventional, semantic, technica
+
+
+class Reason(IntEnum):
+    OK = 0
+    MALFORMED_HEADER = 1
+    UNKNOWN_KEYWORD = 2
+    MULTIPLE_TYPES = 3
+    SUBJECT_TOO_LONG = 4
+    BAD_INITIALS = 5
+    BAD_TICKET = 6
+    NO_MATCH = 7  # a validator returned `False`
+    FAILED = 8  # a suite function raised `ValidationFailedException`
+    ERROR = 9  # a check raised anything else
+
+
+class Result(NamedTuple):
+    ok: bool
+    reason: Reason
+
+
+Check = Callable[[str], Reason]
+
+_RESULTS = {reason: Result(reason is Reason.OK, reason) for reason in Reason}
+
+
+def _header_reason(matcher: HeaderMatcher, s: str) -> Reason:
+    try:
+        header = parse_header(
+            s, matcher.allow_default_merge_msg, matcher.with_preamble, matcher.ticket_first
+        )
+    except MalformedHeaderException:
+        return Reason.MALFORMED_HEADER
+    if header.merge:
+        return Reason.OK
+    if len(header.types) > 1 and not matcher.allow_keywords_with_commas:
+        return Reason.MULTIPLE_TYPES
+    if any(t.keyword not in matcher.keywords for t in header.types):
+        return Reason.UNKNOWN_KEYWORD
+    return Reason.OK
+
+
+def semantic_check(allow_default_merge_msg: bool = True) -> Check:
+    """Batch counterpart of `semantic.is_semantic`"""
+    matcher = semantic._compile_header_matcher(
+        semantic._keyword_key(semantic.commit_keywords), True, allow_default_merge_msg
+    )
+    return lambda s: _header_reason(matcher, s)
+
+
+def conventional_check(allow_default_merge_msg: bool = True) -> Check:
+    """Batch counterpart of `conventional.is_conventional`"""
+    matcher = semantic._compile_header_matcher(
+        semantic._keyword_key(conventional.type_keywords), False, allow_default_merge_msg
+    )
+    return lambda s: _header_reason(matcher, s)
+
+
+def technica_check(ticket_first: bool = False, allow_default_merge_msg: bool = True) -> Check:
+    """Batch counterpart of `technica.is_technica`"""
+    matcher = semantic._compile_header_matcher(
+        semantic._keyword_key(semantic.commit_keywords), True, allow_default_merge_msg,
+        with_preamble=True, ticket_first=ticket_first
+    )
+
+    def _check(s: str) -> Reason:
+        reason = _header_reason(matcher, s)
+        if reason != Reason.OK:
+            return reason
+        preamble = parse_header(s, allow_default_merge_msg, True, ticket_first).preamble
+        if preamble is None:  # merge message without a preamble
+            return Reason.OK
+        if not technica.initials_are_2_chars_each(preamble.initials):
+            return Reason.BAD_INITIALS
+        if not technica.ticket_id_correctly_formatted(preamble.ticket):
+            return Reason.BAD_TICKET
+        return Reason.OK
+    return _check
+
+
+def subject_length_check(limit: int = semantic.SUBJECT_MAX_LEN) -> Check:
+    """Batch counterpart of `semantic.has_short_commit_msg_proper_length`"""
+    def _check(s: str) -> Reason:
+        try:
+            description = semantic._description(s)
+        except ValidationFailedException:
+            return Reason.MALFORMED_HEADER
+        if description is None or len(description.strip()) < limit:
+            return Reason.OK
+        return Reason.SUBJECT_TOO_LONG
+    return _check
+
+
+def from_validator(validator: Validator) -> Check:
+    """Batches a validator from `mkcommit.validators`"""
+    return lambda s: Reason.OK if validator(s) else Reason.NO_MATCH
+
+
+def from_suite(func: Callable[[str], bool]) -> Check:
+    """Batches a function raising `ValidationFailedException`, e.g. a config's own check"""
+    def _check(s: str) -> Reason:
+        try:
+            func(s)
+        except ValidationFailedException:
+            return Reason.FAILED
+        except Exception:
+            return Reason.ERROR
+        return Reason.OK
+    return _check
+
+
+def validate_batch(messages: Iterable[str], *checks: Check) -> List[Result]:
+    """Runs `checks` in order over every message and stops at the first failing one
+
+    Args:
+        messages (Iterable[str]): headers (first lines) to validate
+        *checks (Check): the checks every message has to pass
+
+    Returns:
+        List[Result]: one result per message, in the order of `messages`;
+            the reason of a failed message comes from its first failing check
+    """
+    seen: Dict[str, Result] = {}
+    results = []
+    for message in messages:
+        result = seen.get(message)
+        if result is None:
+            reason = Reason.OK
+            for check in checks:
+                reason = check(message)
+                if reason != Reason.OK:
+                    break
+            result = seen[message] = _RESULTS[Reason(reason)]
+        results.append(result)
+    return results
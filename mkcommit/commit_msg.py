@@ -0,0 +1,168 @@
+"""Reading the message file git passes to a `commit-msg` hook.
+
+git runs the hook before it cleans the message up, so the file still holds
+comment lines and, for `git commit -v`, the diff below the scissors line.
+`read_message` applies git's `--cleanup` modes to it; like git, the default
+mode strips comments only from messages that went through an editor. The
+file is memory mapped and scanned line by line, so hook mode never passes a
+large message through argv. `read_header` copies nothing but the first line,
+and the body `read_message` returns is only read when a check accesses it.
+"""
+import mmap
+import os
+from contextlib import contextmanager
+from enum import Enum
+from typing import Iterator, Optional, Tuple, Union
+
+from mkcommit.git import get_client
+from mkcommit.model import CommitMessage
+
+SCISSORS = "------------------------ >8 ------------------------"
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+class Cleanup(Enum):
+    STRIP = "strip"  # cut at the scissors line, drop comments, clean whitespace
+    WHITESPACE = "whitespace"  # clean whitespace only
+    VERBATIM = "verbatim"  # leave the message as it is
+    SCISSORS = "scissors"  # cut at the scissors line, clean whitespace
+    DEFAULT = "default"  # `commit.cleanup`, else `strip` if the message was edited
+
+
+def resolve_cleanup(cleanup: Cleanup) -> Cleanup:
+    """The mode git uses for `default`: `commit.cleanup` if set, otherwise
+    `strip` for a message edited in an editor and `whitespace` for one that
+    wasn't (`git commit -m`), which git runs the hook with `GIT_EDITOR=:` for"""
+    if cleanup is not Cleanup.DEFAULT:
+        return cleanup
+    try:
+        configured = Cleanup(get_client().config("commit.cleanup", "default"))
+    except ValueError:
+        configured = Cleanup.DEFAULT  # git rejects the commit anyway
+    if configured is not Cleanup.DEFAULT:
+        return configured
+    return Cleanup.WHITESPACE if os.environ.get("GIT_EDITOR") == ":" else Cleanup.STRIP
+
+
+def comment_char() -> str:
+    """`core.commentChar`, `#` unless configured"""
+    char = get_client().config("core.commentChar", "#") or "#"
+    return "#" if char == "auto" else char
+
+
+@contextmanager
+def _mapped(path: str) -> Iterator[Buffer]:
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file can't be mapped
+            yield b""
+            return
+        try:
+            yield buffer
+        finally:
+            buffer.close()
+
+
+def _end(buffer: Buffer, cleanup: Cleanup, comment: str) -> int:
+    """Offset of the scissors line, where the message ends"""
+    if cleanup not in (Cleanup.STRIP, Cleanup.SCISSORS):
+        return len(buffer)
+    marker = f"{comment} {SCISSORS}\n".encode("utf-8")
+    if buffer[:len(marker)] == marker:
+        return 0
+    found = buffer.find(b"\n" + marker)
+    return len(buffer) if found < 0 else found + 1
+
+
+def _lines(buffer: Buffer, end: int) -> Iterator[bytes]:
+    position = 0
+    while position < end:
+        newline = buffer.find(b"\n", position, end)
+        if newline < 0:
+            newline = end
+        yield buffer[position:newline]
+        position = newline + 1
+
+
+def _clean_lines(buffer: Buffer, cleanup: Cleanup, comment: str) -> Iterator[bytes]:
+    """git's `stripspace`: trailing whitespace removed, runs of blank lines
+    collapsed, no leading nor trailing blank lines"""
+    strip_comments = cleanup is Cleanup.STRIP
+    comment_bytes = comment.encode("utf-8")
+    pending_blank = False
+    started = False
+    for line in _lines(buffer, _end(buffer, cleanup, comment)):
+        if strip_comments and line.startswith(comment_bytes):
+            continue
+        line = line.rstrip()
+        if not line:
+            pending_blank = started
+            continue
+        if pending_blank:
+            yield b""
+            pending_blank = False
+        started = True
+        yield line
+
+
+def read_header(
+    path: str,
+    cleanup: Cleanup = Cleanup.DEFAULT,
+    comment: Optional[str] = None
+) -> str:
+    """The first line of the cleaned up message, reading no further than needed"""
+    cleanup = resolve_cleanup(cleanup)
+    with _mapped(path) as buffer:
+        if cleanup is Cleanup.VERBATIM:
+            first_line = next(_lines(buffer, len(buffer)), b"")
+        else:
+            first_line = next(_clean_lines(buffer, cleanup, comment or comment_char()), b"")
+    return first_line.decode("utf-8", errors="replace")
+
+
+def _read_body(path: str, cleanup: Cleanup, comment: str) -> str:
+    with _mapped(path) as buffer:
+        if cleanup is Cleanup.VERBATIM:
+            end = len(buffer)
+            while end and buffer[end - 1:end] == b"\n":
+                end -= 1
+            lines = _lines(buffer, end)
+        else:
+            lines = _clean_lines(buffer, cleanup, comment)
+        next(lines, None)  # the first line
+        return b"\n".join(lines).decode("utf-8", errors="replace")
+
+
+class _FileCommitMessage(CommitMessage):
+    """A message whose body is read from the file on first access, checks
+    looking at the first line only never copy it"""
+
+    def __init__(self, first_line: str, path: str, cleanup: Cleanup, comment: str):
+        super().__init__(first_line)
+        self._source: Optional[Tuple[str, Cleanup, str]] = (path, cleanup, comment)
+
+    @property  # type: ignore  # a dataclass field on `CommitMessage`
+    def body(self) -> str:
+        if self._source is not None:
+            self._body = _read_body(*self._source)
+            self._source = None
+        return self._body
+
+    @body.setter
+    def body(self, value: str) -> None:
+        self._source = None
+        self._body = value
+
+
+def read_message(
+    path: str,
+    cleanup: Cleanup = Cleanup.DEFAULT,
+    comment: Optional[str] = None
+) -> CommitMessage:
+    """The cleaned up message, split like in hook mode (the body keeps the blank
+    line following the first line)"""
+    cleanup = resolve_cleanup(cleanup)
+    comment = comment or comment_char()
+    return _FileCommitMessage(read_header(path, cleanup, comment), path, cleanup, comment)
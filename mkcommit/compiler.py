@@ -0,0 +1,302 @@
+"""Precompiled rule artifacts for hook mode.
+
+`mkcommit compile` turns a `.mkcommit.py` whose `on_commit` only calls
+built-in suite checks into a JSON artifact holding the keyword sets, header
+grammar options and length limits those checks use. In hook mode a fresh
+artifact (same source hash, same `mkcommit` version) is validated against
+directly, without executing the config. Configs with custom code cannot be
+compiled and keep going through `load_module`.
+"""
+import ast
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from mkcommit import __version__
+from mkcommit.header import HeaderMatcher, Preamble
+from mkcommit.model import PRE_COMMIT_FUNC_NAME, CommitMessage, ValidationFailedException
+
+ARTIFACT_FORMAT = 1
+ARTIFACT_SUFFIX = ".rules.json"
+
+Rule = Dict[str, Any]
+
+# built-in checks that can be compiled, with the keyword arguments they accept
+COMPILABLE_CHECKS: Dict[str, Tuple[str, ...]] = {
+    "semantic.is_semantic": ("allow_default_merge_msg",),
+    "semantic.has_short_commit_msg_proper_length": (),
+    "conventional.is_conventional": ("allow_default_merge_msg",),
+    "technica.is_technica": ("ticket_first", "allow_default_merge_msg"),
+}
+_ALLOWED_IMPORT_ROOTS = ("mkcommit", "typing", "__future__")
+
+
+class NotCompilableException(Exception):
+    pass
+
+
+def artifact_path(file: str) -> str:
+    """`foo.mkcommit.py` -> `foo.mkcommit.rules.json`"""
+    root, ext = os.path.splitext(file)
+    return (root if ext == ".py" else file) + ARTIFACT_SUFFIX
+
+
+def _hash_source(source: bytes) -> str:
+    return hashlib.sha256(source).hexdigest()
+
+
+def _is_literal(node: ast.AST) -> bool:
+    try:
+        ast.literal_eval(node)
+    except ValueError:
+        return False
+    return True
+
+
+def _check_name(node: ast.expr, aliases: Dict[str, str]) -> Optional[str]:
+    """Resolves `semantic.is_semantic` or an imported `is_semantic` to a qualified check name"""
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+        suite = aliases.get(node.value.id)
+        if suite:
+            return f"{suite}.{node.attr}"
+    elif isinstance(node, ast.Name):
+        return aliases.get(node.id)
+    return None
+
+
+def _collect_aliases(tree: ast.Module) -> Dict[str, str]:
+    """Maps local names to `suite` or `suite.check` for imports of the built-in suites"""
+    aliases: Dict[str, str] = {}
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module == "mkcommit.suites":
+            for a in node.names:
+                aliases[a.asname or a.name] = a.name
+        elif isinstance(node, ast.ImportFrom) and \
+                (node.module or "").startswith("mkcommit.suites."):
+            suite = (node.module or "").split(".")[-1]
+            for a in node.names:
+                aliases[a.asname or a.name] = f"{suite}.{a.name}"
+        elif isinstance(node, ast.Import):
+            for a in node.names:
+                if a.name.startswith("mkcommit.suites.") and a.asname:
+                    aliases[a.asname] = a.name.split(".")[-1]
+    return aliases
+
+
+def _check_module_level(tree: ast.Module) -> None:
+    """Only imports, function definitions and the `__main__` guard may run at import time"""
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            roots = [a.name.split(".")[0] for a in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            roots = [(node.module or "").split(".")[0]]
+        elif isinstance(node, ast.FunctionDef) and not node.decorator_list:
+            continue
+        elif isinstance(node, ast.Expr) and _is_literal(node.value):
+            continue  # docstring
+        elif isinstance(node, ast.If) and "__name__" in ast.dump(node.test) \
+                and "__main__" in ast.dump(node.test):
+            continue
+        else:
+            raise NotCompilableException(
+                f"line {node.lineno}: module-level `{type(node).__name__}` statement"
+            )
+        if node.level or any(r not in _ALLOWED_IMPORT_ROOTS for r in roots):  # type: ignore
+            raise NotCompilableException(f"line {node.lineno}: import of a non-`mkcommit` module")
+
+
+def _extract_checks(source: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """Returns the `(check, kwargs)` pairs called by `on_commit`, in order"""
+    tree = ast.parse(source)
+    _check_module_level(tree)
+    aliases = _collect_aliases(tree)
+    definitions = [
+        n for n in tree.body if isinstance(n, ast.FunctionDef) and n.name == PRE_COMMIT_FUNC_NAME
+    ]
+    if not definitions:
+        raise NotCompilableException(f"no `{PRE_COMMIT_FUNC_NAME}` function")
+    # Python binds the last one, imports included; compiling any other would check other rules
+    rebound = [
+        n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))
+        for a in n.names if (a.asname or a.name) == PRE_COMMIT_FUNC_NAME
+    ]
+    if len(definitions) > 1 or rebound:
+        line = max(n.lineno for n in definitions + rebound)
+        raise NotCompilableException(
+            f"line {line}: `{PRE_COMMIT_FUNC_NAME}` is defined more than once"
+        )
+    on_commit = definitions[0]
+    if len(on_commit.args.args) != 1:
+        raise NotCompilableException(f"`{PRE_COMMIT_FUNC_NAME}` should take exactly one argument")
+    msg_arg = on_commit.args.args[0].arg
+
+    checks = []
+    for stmt in on_commit.body:
+        if isinstance(stmt, ast.Expr) and _is_literal(stmt.value):
+            continue  # docstring
+        if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call)):
+            raise NotCompilableException(
+                f"line {stmt.lineno}: only calls to built-in checks are supported"
+            )
+        call = stmt.value
+        name = _check_name(call.func, aliases)
+        if name not in COMPILABLE_CHECKS:
+            raise NotCompilableException(
+                f"line {stmt.lineno}: only built-in checks {list(COMPILABLE_CHECKS)} "
+                "can be compiled"
+            )
+        first = call.args[0] if call.args else None
+        is_first_line = isinstance(first, ast.Attribute) and first.attr == "first_line" and \
+            isinstance(first.value, ast.Name) and first.value.id == msg_arg
+        if not is_first_line:
+            raise NotCompilableException(
+                f"line {stmt.lineno}: checks must be called on `{msg_arg}.first_line`"
+            )
+        params = COMPILABLE_CHECKS[name]
+        kwargs: Dict[str, Any] = {}
+        for param, value in list(zip(params, call.args[1:])) + \
+                [(k.arg, k.value) for k in call.keywords]:
+            if param not in params or not _is_literal(value):
+                raise NotCompilableException(
+                    f"line {stmt.lineno}: arguments of `{name}` must be literal "
+                    f"values of {params}"
+                )
+            kwargs[param] = ast.literal_eval(value)
+        if len(call.args) - 1 > len(params):
+            raise NotCompilableException(f"line {stmt.lineno}: too many arguments to `{name}`")
+        checks.append((name, kwargs))
+    return checks
+
+
+def _header_rule(
+    keywords: List[str],
+    allow_keywords_with_commas: bool,
+    allow_default_merge_msg: bool,
+    error: Optional[str],
+    with_preamble: bool = False,
+    ticket_first: bool = False
+) -> Rule:
+    return {
+        "type": "header",
+        "keywords": keywords,
+        "allow_keywords_with_commas": allow_keywords_with_commas,
+        "allow_default_merge_msg": allow_default_merge_msg,
+        "with_preamble": with_preamble,
+        "ticket_first": ticket_first,
+        "error": error,
+    }
+
+
+def _rules_for(check: str, kwargs: Dict[str, Any]) -> List[Rule]:
+    from mkcommit.suites import conventional, semantic
+    merge = kwargs.get("allow_default_merge_msg", True)
+    semantic_keywords = [k.keyword for k in semantic.commit_keywords]
+    if check == "semantic.is_semantic":
+        return [_header_rule(semantic_keywords, True, merge, semantic.SEMANTIC_ERROR_MESSAGE)]
+    elif check == "conventional.is_conventional":
+        return [_header_rule(
+            [k.keyword for k in conventional.type_keywords], False, merge,
+            conventional.CONVENTIONAL_ERROR_MESSAGE
+        )]
+    elif check == "technica.is_technica":
+        return [
+            _header_rule(semantic_keywords, True, merge, None,
+                         with_preamble=True, ticket_first=kwargs.get("ticket_first", False)),
+            {"type": "technica_preamble"},
+        ]
+    else:  # semantic.has_short_commit_msg_proper_length
+        return [{"type": "subject_length", "max": semantic.SUBJECT_MAX_LEN}]
+
+
+def compile_source(source: bytes) -> Dict[str, Any]:
+    """Compiles the source of a config into an artifact, without executing it
+
+    Raises:
+        NotCompilableException: when the config runs code other than built-in
+            checks, or isn't valid Python
+
+    Returns:
+        Dict[str, Any]: the artifact
+    """
+    try:
+        checks = _extract_checks(source.decode("utf-8"))
+    except (UnicodeDecodeError, SyntaxError) as e:
+        raise NotCompilableException(f"not a valid Python source: {e}") from e
+    rules: List[Rule] = []
+    for check, kwargs in checks:
+        rules += _rules_for(check, kwargs)
+    return {
+        "format": ARTIFACT_FORMAT,
+        "mkcommit_version": __version__,
+        "source_sha256": _hash_source(source),
+        "rules": rules,
+    }
+
+
+def compile_config(file: str) -> Dict[str, Any]:
+    """Compiles a config into an artifact and writes it next to the config
+
+    Raises:
+        NotCompilableException: when the config runs code other than built-in checks
+
+    Returns:
+        Dict[str, Any]: the artifact
+    """
+    with open(file, "rb") as f:
+        source = f.read()
+    try:
+        artifact = compile_source(source)
+    except NotCompilableException:
+        # a stale artifact must not outlive a config that is no longer compilable
+        if os.path.exists(artifact_path(file)):
+            os.remove(artifact_path(file))
+        raise
+    with open(artifact_path(file), "w") as f:
+        json.dump(artifact, f, indent=2)
+    return artifact
+
+
+def load_fresh_artifact(file: str) -> Optional[List[Rule]]:
+    """Returns the compiled rules of `file`, `None` when there is no up-to-date artifact"""
+    path = artifact_path(file)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        artifact = json.load(f)
+    if artifact.get("format") != ARTIFACT_FORMAT or artifact.get("mkcommit_version") != __version__:
+        return None
+    with open(file, "rb") as f:
+        if artifact.get("source_sha256") != _hash_source(f.read()):
+            return None
+    return artifact["rules"]
+
+
+def run_rules(rules: List[Rule], msg: CommitMessage) -> None:
+    """Validates a message against compiled rules
+
+    Raises:
+        ValidationFailedException: with the same messages the built-in checks raise
+    """
+    from mkcommit.suites import semantic, technica
+    preamble: Optional[Preamble] = None
+    for rule in rules:
+        if rule["type"] == "header":
+            matcher = HeaderMatcher(
+                frozenset(rule["keywords"]),
+                rule["allow_keywords_with_commas"],
+                rule["allow_default_merge_msg"],
+                rule["with_preamble"],
+                rule["ticket_first"]
+            )
+            if rule["error"] is None:
+                preamble = matcher.parse(msg.first_line).preamble
+            elif matcher.match(msg.first_line) is None:
+                raise ValidationFailedException(rule["error"].format(header=msg.first_line))
+        elif rule["type"] == "technica_preamble":
+            if preamble is not None:
+                technica._check_preamble(preamble)
+        elif rule["type"] == "subject_length":
+            semantic._check_subject_length(msg.first_line, rule["max"])
+        else:
+            raise ValueError(f"Unknown rule type {rule['type']}. This is a bug!")
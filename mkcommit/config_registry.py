@@ -0,0 +1,150 @@
+"""Registry holding many loaded configs at once.
+
+`load_module` installs a config as `sys.modules[MODULE_SHIM]`, so only one
+config can be active at a time. The registry instead loads every config
+under its own module name, keyed on the file's absolute path and content
+hash, and evicts the least recently used configs beyond `max_size`. A config
+is also reloaded when one of the configs it includes changed. All methods
+are thread-safe.
+"""
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Dict, Optional, Tuple
+
+from mkcommit.model import MODULE_SHIM, CommitFunc, OnCommitFunc
+from mkcommit.module_utils import get_index, load_module
+from mkcommit.register import ConfigIndex
+
+DEFAULT_MAX_SIZE = 128
+
+ConfigKey = Tuple[str, str]
+IncludesStamp = Tuple[Tuple[str, Optional[int]], ...]
+
+
+@dataclass
+class LoadedConfig:
+    path: str
+    digest: str
+    module: ModuleType
+    includes: IncludesStamp = ()
+
+    @property
+    def index(self) -> ConfigIndex:
+        return get_index(self.module)
+
+    def includes_changed(self) -> bool:
+        return self.includes != includes_stamp(self.module)
+
+    def commit_func(self, name: Optional[str] = None) -> Optional[CommitFunc]:
+        return self.index.commit_func(name)
+
+    def on_commit_func(self, name: Optional[str] = None) -> Optional[OnCommitFunc]:
+        # templates without a dedicated hook are validated by the default one
+        return self.index.on_commit_func(name) or self.index.on_commit_func()
+
+
+def file_digest(file: str) -> str:
+    with open(file, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def includes_stamp(module: ModuleType) -> IncludesStamp:
+    """Modification times of the configs `module` includes"""
+    return tuple((path, _mtime(path)) for path in get_index(module).includes)
+
+
+def module_name_for(key: ConfigKey) -> str:
+    """Unique, importable-looking module name for a config"""
+    path, digest = key
+    suffix = hashlib.sha256(f"{path}\0{digest}".encode("utf-8")).hexdigest()[:16]
+    return f"{MODULE_SHIM}_{suffix}"
+
+
+class ConfigRegistry:
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        if max_size < 1:
+            raise ValueError("The registry must be able to hold at least one config")
+        self.max_size = max_size
+        self._configs: "OrderedDict[ConfigKey, LoadedConfig]" = OrderedDict()
+        self._lock = threading.Lock()
+        # one lock per key, so a slow config load doesn't block lookups of other configs
+        self._loading: Dict[ConfigKey, threading.Lock] = {}
+
+    def get(self, file: str) -> LoadedConfig:
+        """Returns the config in `file`, loading it if it is new or has changed
+
+        Raises:
+            ModuleLoaderException: if the config cannot be loaded
+        """
+        path = os.path.abspath(file)
+        key = (path, file_digest(path))
+        with self._lock:
+            config = self._lookup(key)
+            if config is not None:
+                return config
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                # another thread may have loaded it while we were waiting
+                config = self._lookup(key)
+                if config is not None:
+                    return config
+            try:
+                module = load_module(path, module_name_for(key))
+                config = LoadedConfig(path, key[1], module, includes_stamp(module))
+                # published before the key lock is dropped, a thread coming in
+                # between finds either the lock or the config, never neither
+                with self._lock:
+                    self._publish(key, config)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return config
+
+    def _publish(self, key: ConfigKey, config: LoadedConfig) -> None:
+        path = key[0]
+        # an older version of the same file will never be looked up again
+        for stale in [k for k in self._configs if k[0] == path]:
+            module = self._configs.pop(stale).module
+            if sys.modules.get(module.__name__) is module:  # not reloaded under its name
+                del sys.modules[module.__name__]
+        self._configs[key] = config
+        while len(self._configs) > self.max_size:
+            _, evicted = self._configs.popitem(last=False)
+            sys.modules.pop(evicted.module.__name__, None)
+
+    def _lookup(self, key: ConfigKey) -> Optional[LoadedConfig]:
+        config = self._configs.get(key)
+        if config is None or config.includes_changed():
+            return None  # replaced once loaded again
+        self._configs.move_to_end(key)
+        return config
+
+    def clear(self) -> None:
+        with self._lock:
+            for config in self._configs.values():
+                sys.modules.pop(config.module.__name__, None)
+            self._configs.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._configs)
+
+    def __contains__(self, file: str) -> bool:
+        path = os.path.abspath(file)
+        with self._lock:
+            return any(p == path for p, _ in self._configs)
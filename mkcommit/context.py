@@ -0,0 +1,170 @@
+"""Git context prefetched while the user answers prompts.
+
+Templates need facts about the repository (the author for initials, the
+current branch, the staged files, the remote URL), each costing a git
+process. `prefetch` starts these queries on a small thread pool as soon as
+`_main` knows it is going to prompt, so by the time a suite function asks
+for them they are usually resolved and reading them doesn't block::
+
+    from mkcommit.context import get_context
+
+    def commit():
+        branch = get_context().branch  # already fetched while the config loaded
+        ...
+
+Values are fetched once per context. Waiting on a value that isn't ready
+yet shows up as a `context wait` span in `mkcommit --profile`.
+
+The scopes used so far need the whole history read once per repository, so
+they aren't prefetched: `start_scopes` (called when a scope prompt shows, or
+on the first access) builds the index on a daemon thread, which interpreter
+exit doesn't wait for. Until it is built, `scopes` is empty rather than
+blocking the prompt.
+"""
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from mkcommit import trace
+from mkcommit.git import GitClient, get_client
+from mkcommit.model import Author
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from mkcommit.scopes import ScopeIndex
+
+DEFAULT_REMOTE = "origin"
+
+
+def _config(client: GitClient) -> Dict[str, str]:
+    return client.config_snapshot()
+
+
+def _branch(client: GitClient) -> Optional[str]:
+    result = client.run("symbolic-ref", "--quiet", "--short", "HEAD", check=False)
+    if result.returncode != 0:
+        return None  # detached HEAD, or not a repository
+    return result.stdout.decode("utf-8").strip()
+
+
+def _staged_files(client: GitClient) -> List[str]:
+    result = client.run("diff", "--cached", "--name-only", "-z", check=False)
+    if result.returncode != 0:
+        return []
+    return [f for f in result.stdout.decode("utf-8", errors="replace").split("\0") if f]
+
+
+def _scopes(client: GitClient) -> "ScopeIndex":
+    from mkcommit.scopes import load_index
+    return load_index(client.cwd)
+
+
+_QUERIES: Dict[str, Callable[[GitClient], Any]] = {
+    "config": _config,
+    "branch": _branch,
+    "staged_files": _staged_files,
+}
+
+
+def _resolve(future: "Future", query: Callable[[GitClient], Any], client: GitClient) -> None:
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        future.set_result(query(client))
+    except BaseException as e:
+        future.set_exception(e)
+
+
+class GitContext:
+    """Futures of the git queries, started when the context is created,
+    but for the scope index"""
+
+    def __init__(self, client: GitClient):
+        # imported here, hook modes never prefetch and don't pay for the import
+        from concurrent.futures import ThreadPoolExecutor
+        self.client = client
+        executor = ThreadPoolExecutor(len(_QUERIES), thread_name_prefix="mkcommit-context")
+        self._futures: Dict[str, "Future"] = {
+            name: executor.submit(query, client) for name, query in _QUERIES.items()
+        }
+        executor.shutdown(wait=False)  # the queries run on, no more are submitted
+        self._lock = threading.Lock()
+
+    def start_scopes(self) -> None:
+        """Starts building the scope index in the background, if it isn't yet"""
+        from concurrent.futures import Future
+        with self._lock:
+            if "scopes" in self._futures:
+                return
+            future: "Future" = Future()
+            self._futures["scopes"] = future
+        # a daemon thread, exiting doesn't wait for an index nobody asked for;
+        # the index is saved atomically, an interrupted build never leaves a partial one
+        threading.Thread(
+            target=_resolve, args=(future, _scopes, self.client),
+            name="mkcommit-scopes", daemon=True
+        ).start()
+
+    def wait(self) -> None:
+        """Blocks until every started query finished"""
+        for name in list(self._futures):
+            self._get(name)
+
+    def _get(self, name: str) -> Any:
+        future = self._futures[name]
+        if future.done():
+            return future.result()
+        with trace.span("context wait", query=name):
+            return future.result()
+
+    @property
+    def author(self) -> Author:
+        config = self._get("config")
+        return Author(config.get("user.name", ""), config.get("user.email", ""))
+
+    @property
+    def branch(self) -> Optional[str]:
+        """The current branch, `None` on a detached HEAD"""
+        return self._get("branch")
+
+    @property
+    def staged_files(self) -> List[str]:
+        """Paths staged for the commit, relative to the top of the work tree"""
+        return self._get("staged_files")
+
+    @property
+    def remote_url(self) -> Optional[str]:
+        """URL of the remote the current branch tracks, `origin` if it tracks none"""
+        config = self._get("config")
+        remote = DEFAULT_REMOTE
+        if self.branch is not None:
+            remote = config.get(f"branch.{self.branch}.remote", DEFAULT_REMOTE)
+        return config.get(f"remote.{remote}.url")
+
+    @property
+    def scopes(self) -> "ScopeIndex":
+        """Scopes used in the history, see `mkcommit.scopes`; built on the first access
+        unless `start_scopes` started it. Never waits, so a prompt completing from it
+        doesn't freeze: the index is empty until it is built"""
+        self.start_scopes()
+        future = self._futures["scopes"]
+        if not future.done():
+            from mkcommit.scopes import ScopeIndex
+            return ScopeIndex()
+        return future.result()
+
+
+_context: Optional[GitContext] = None
+
+
+def prefetch(client: Optional[GitClient] = None) -> GitContext:
+    """Starts fetching the context of the repository of `client` in the background"""
+    global _context
+    _context = GitContext(client or get_client())
+    return _context
+
+
+def get_context() -> GitContext:
+    """The prefetched context, started now if nothing prefetched it"""
+    if _context is None:
+        return prefetch()
+    return _context
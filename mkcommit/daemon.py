@@ -0,0 +1,151 @@
+"""Opt-in per-user validation daemon.
+
+The daemon keeps `.mkcommit.py` configs loaded and validates commit messages
+sent over a Unix socket, so hook calls (see `mkcommit.hook_client`) skip the
+interpreter start-up and the config execution.
+
+Protocol: the client sends one JSON object per line and gets one back::
+
+    -> {"file": "/abs/path/.mkcommit.py", "message": "feat: something", "cwd": "/abs/repo"}
+    <- {"ok": true}
+    <- {"ok": false, "kind": "validation", "error": "..."}
+    <- {"ok": false, "kind": "error", "error": "..."}
+
+`kind` is `validation` for a rejected message and `error` for anything else
+(e.g. a broken config), in which case the client validates in-process.
+The config runs in `cwd`, the directory the hook was called from, so its
+includes and git queries resolve against the client's repository.
+Configs are held in a `ConfigRegistry`, so each one lives in its own module
+namespace and is reloaded as soon as its content changes.
+"""
+import argparse
+import json
+import os
+import socketserver
+import threading
+import traceback
+import warnings
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from mkcommit.config_registry import DEFAULT_MAX_SIZE, ConfigRegistry
+from mkcommit.hook_client import SOCKET_ENV, default_socket_path, request
+from mkcommit.main import commit_message_from_str
+from mkcommit.model import ValidationFailedException
+
+
+@contextmanager
+def _working_directory(path: Optional[str]) -> Iterator[None]:
+    if path is None:
+        yield
+        return
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+class ValidationServer(socketserver.UnixStreamServer):
+    """Serves validation requests one at a time.
+
+    Requests are handled sequentially on purpose: configs are plain modules
+    and `on_commit` functions are not expected to be thread-safe.
+    """
+
+    def __init__(self, socket_path: str, max_configs: int = DEFAULT_MAX_SIZE):
+        self.socket_path = socket_path
+        self.configs = ConfigRegistry(max_configs)
+        old_umask = os.umask(0o177)  # socket readable and writable by the owner only
+        try:
+            super().__init__(socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def validate(self, file: str, message: str, cwd: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            # requests are sequential, changing the directory of the process is safe
+            with _working_directory(cwd):
+                on_commit = self.configs.get(file).on_commit_func()
+                if on_commit is None:
+                    warnings.warn(f"No hook implemented for template {file}")
+                else:
+                    on_commit(commit_message_from_str(message))
+            return {"ok": True}
+        except ValidationFailedException as e:
+            return {"ok": False, "kind": "validation", "error": str(e)}
+        except Exception:
+            return {"ok": False, "kind": "error", "error": traceback.format_exc()}
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: ValidationServer
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                req = json.loads(line)
+            except ValueError as e:
+                self._respond({"ok": False, "kind": "error", "error": f"Malformed request: {e}"})
+                continue
+            command = req.get("command", "validate")
+            if command == "ping":
+                self._respond({"ok": True})
+            elif command == "shutdown":
+                self._respond({"ok": True})
+                # `shutdown` blocks until `serve_forever` returns, so it can't run on this thread
+                threading.Thread(target=self.server.shutdown).start()
+                return
+            else:
+                self._respond(self.server.validate(
+                    os.path.abspath(req["file"]), req["message"], req.get("cwd")
+                ))
+
+    def _respond(self, response: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+def _is_listening(socket_path: str) -> bool:
+    return request(socket_path, {"command": "ping"}) is not None
+
+
+def serve(socket_path: Optional[str] = None) -> None:
+    """Runs the daemon in the foreground until it receives a `shutdown` command"""
+    socket_path = socket_path or default_socket_path()
+    if os.path.exists(socket_path):
+        if _is_listening(socket_path):
+            raise RuntimeError(f"A daemon is already listening on {socket_path}")
+        os.remove(socket_path)  # left over by a daemon that did not exit cleanly
+    server = ValidationServer(socket_path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keeps `mkcommit` configs loaded and validates commit messages "
+        "sent by `mkcommit-hook` over a Unix socket"
+    )
+    parser.add_argument('--socket', type=str, help="Path to the Unix socket, defaults to "
+                        f"`${SOCKET_ENV}` or `$XDG_RUNTIME_DIR/mkcommit-<uid>.sock`")
+    parser.add_argument('--stop', action='store_true', help="Stop a running daemon")
+    args = parser.parse_args()
+
+    if args.stop:
+        if request(args.socket or default_socket_path(), {"command": "shutdown"}) is None:
+            print("No daemon is running.")
+    else:
+        serve(args.socket)
+
+
+if __name__ == "__main__":
+    main()
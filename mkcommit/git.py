@@ -0,0 +1,209 @@
+"""Access to git shared by the whole package.
+
+Commands run without a shell and are timed, streaming ones (`popen`) until
+their process exits. All the configuration `mkcommit` reads (`user.name`,
+`user.email`, `core.editor`, ...) comes from one `git config --list` snapshot,
+which is reused until one of the config files it was read from (or could be
+read from) changes.
+"""
+import logging
+import os
+import shlex
+import subprocess
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import IO, Deque, Dict, Iterator, Optional, Sequence, Tuple, Union
+
+from mkcommit import trace
+
+logger = logging.getLogger(__name__)
+
+MAX_RECORDED_CALLS = 256
+
+Stream = Union[None, int, IO[bytes]]  # a `subprocess.Popen` stream argument
+
+# environment variables that change which config git reads
+_CONFIG_ENV = (
+    "GIT_DIR", "GIT_CONFIG", "GIT_CONFIG_GLOBAL", "GIT_CONFIG_SYSTEM", "GIT_CONFIG_NOSYSTEM",
+    "GIT_CONFIG_COUNT", "GIT_CONFIG_PARAMETERS", "HOME", "XDG_CONFIG_HOME"
+)
+
+
+@dataclass
+class GitCall:
+    args: Tuple[str, ...]
+    duration: float  # seconds
+    returncode: int
+
+
+def _normalize_key(key: str) -> str:
+    """Section and variable names are case-insensitive, subsections are not"""
+    section, _, rest = key.partition(".")
+    subsection, _, name = rest.rpartition(".")
+    if subsection:
+        return f"{section.lower()}.{subsection}.{name.lower()}"
+    return f"{section.lower()}.{name.lower()}"
+
+
+def _resolve(path: str, cwd: str) -> str:
+    """git prints the local config relative to the top of the work tree, not to `cwd`"""
+    if os.path.isabs(path):
+        return path
+    directory = cwd
+    while True:
+        candidate = os.path.join(directory, path)
+        parent = os.path.dirname(directory)
+        if os.path.exists(candidate) or parent == directory:
+            return candidate
+        directory = parent
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class GitClient:
+
+    def __init__(self, cwd: Optional[str] = None):
+        self.cwd = cwd
+        self.calls: Deque[GitCall] = deque(maxlen=MAX_RECORDED_CALLS)
+        self._config: Optional[Dict[str, str]] = None
+        self._config_files: Tuple[str, ...] = ()
+        self._config_stamp: Optional[tuple] = None
+        # threads sharing the client would otherwise each read the config again
+        self._config_lock = threading.Lock()
+
+    def run(
+        self,
+        *args: str,
+        check: bool = True,
+        capture: bool = True
+    ) -> subprocess.CompletedProcess:
+        """Runs `git <args>`
+
+        Args:
+            *args (str): arguments of `git`, e.g. `"rev-parse", "HEAD"`
+            check (bool): raise `subprocess.CalledProcessError` on a non-zero exit
+            capture (bool): capture the output instead of passing it to the terminal
+        """
+        start = time.perf_counter()
+        try:
+            with trace.span("git", args=" ".join(args)):
+                result = subprocess.run(("git",) + args, cwd=self.cwd, capture_output=capture)
+        finally:
+            duration = time.perf_counter() - start
+        self.calls.append(GitCall(args, duration, result.returncode))
+        logger.debug(f"git {' '.join(args)} took {duration * 1000:.1f} ms")
+        if check:
+            result.check_returncode()
+        return result
+
+    @contextmanager
+    def popen(
+        self,
+        *args: str,
+        stdin: Stream = None,
+        stdout: Stream = subprocess.PIPE,
+        stderr: Stream = None
+    ) -> Iterator[subprocess.Popen]:
+        """Starts `git <args>` for streaming its input or output
+
+        The process is waited for when the block exits, and killed first if
+        the block raised; the call is timed and recorded up to then.
+        Checking its return code is up to the caller.
+
+        Args:
+            *args (str): arguments of `git`, e.g. `"cat-file", "--batch"`
+            stdin, stdout, stderr: as for `subprocess.Popen`, the output is piped by default
+        """
+        start = time.perf_counter()
+        with trace.span("git", args=" ".join(args)):
+            process = subprocess.Popen(
+                ("git",) + args, cwd=self.cwd, stdin=stdin, stdout=stdout, stderr=stderr
+            )
+            try:
+                yield process
+            except BaseException:
+                process.kill()  # nobody reads or feeds it anymore
+                raise
+            finally:
+                process.wait()
+                duration = time.perf_counter() - start
+                self.calls.append(GitCall(args, duration, process.returncode))
+                logger.debug(f"git {' '.join(args)} took {duration * 1000:.1f} ms")
+
+    def output(self, *args: str) -> str:
+        """Runs `git <args>` and returns its standard output, stripped"""
+        return self.run(*args).stdout.decode("utf-8").strip()
+
+    def _cwd(self) -> str:
+        return os.path.abspath(self.cwd or os.getcwd())
+
+    def _stamp(self) -> tuple:
+        return (
+            self._cwd(),
+            tuple(os.environ.get(k) for k in _CONFIG_ENV),
+            tuple((f, _mtime(f)) for f in self._config_files)
+        )
+
+    def _global_config_files(self) -> Tuple[str, ...]:
+        # files that may not exist yet, but would be read once created
+        home = os.path.expanduser("~")
+        xdg = os.environ.get("XDG_CONFIG_HOME") or os.path.join(home, ".config")
+        return (os.path.join(home, ".gitconfig"), os.path.join(xdg, "git", "config"))
+
+    def _read_config(self) -> None:
+        out = self.run("config", "--list", "--show-origin", "-z", check=False).stdout
+        config: Dict[str, str] = {}
+        files = set(self._global_config_files())
+        fields = out.decode("utf-8", errors="replace").split("\0")
+        for origin, entry in zip(fields[0::2], fields[1::2]):
+            key, newline, value = entry.partition("\n")
+            # later entries override earlier ones, a key without a value means `true`
+            config[_normalize_key(key)] = value if newline else "true"
+            if origin.startswith("file:"):
+                files.add(_resolve(origin[len("file:"):], self._cwd()))
+        self._config = config
+        self._config_files = tuple(sorted(files))
+        self._config_stamp = self._stamp()
+
+    def config_snapshot(self) -> Dict[str, str]:
+        """Every config value visible in `cwd`, read again only when a config file changed"""
+        with self._config_lock:
+            if self._config is None or self._config_stamp != self._stamp():
+                self._read_config()
+            assert self._config is not None
+            return self._config
+
+    def config(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """The value of a config key, e.g. `user.name`, or `default` if it isn't set"""
+        return self.config_snapshot().get(_normalize_key(key), default)
+
+    def invalidate(self) -> None:
+        with self._config_lock:
+            self._config = None
+
+
+_client: Optional[GitClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> GitClient:
+    """The client shared by the package, running git in the current directory"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GitClient()
+        return _client
+
+
+def split_command(args: Sequence[str]) -> Tuple[str, ...]:
+    """Splits `git_command`-style arguments the way a shell would, minus the `git`"""
+    words = tuple(shlex.split(" ".join(args)))
+    return words[1:] if words and words[0] == "git" else words
@@ -0,0 +1,228 @@
+"""Single-pass parser for commit message headers (first lines).
+
+The grammar covers everything the built-in suites accept::
+
+    header   := merge | [preamble] types ": " subject
+    merge    := "Merge branch" <anything>
+    preamble := "[" field "/" field "]"
+    types    := type ("," [" "] type)*
+    type     := keyword ["(" scope ")"] ["!"]
+
+Every character is looked at a bounded number of times, so parsing stays
+linear in the length of the header no matter how adversarial the input is.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple
+
+from mkcommit.model import MalformedHeaderException
+
+MERGE_PREFIX = "Merge branch"
+
+# The keyword class excludes every character that may follow a keyword,
+# so the optional groups never compete for input and the match cannot backtrack.
+_TYPE_TOKEN = re.compile(r"([^(!:,]*)(?:\(([^)]*)\))?(!?)")
+
+
+@dataclass(frozen=True)
+class HeaderType:
+    keyword: str
+    scope: Optional[str] = None
+    breaking: bool = False
+
+
+@dataclass(frozen=True)
+class Preamble:
+    initials: str
+    ticket: str
+
+
+@dataclass(frozen=True)
+class Header:
+    types: Tuple[HeaderType, ...] = ()
+    subject: str = ""
+    preamble: Optional[Preamble] = None
+    merge: bool = False
+
+    @property
+    def keywords(self) -> Tuple[str, ...]:
+        return tuple(t.keyword for t in self.types)
+
+    @property
+    def scopes(self) -> Tuple[str, ...]:
+        return tuple(t.scope for t in self.types if t.scope is not None)
+
+    @property
+    def breaking(self) -> bool:
+        return any(t.breaking for t in self.types)
+
+
+def _parse_types(s: str, pos: int) -> Tuple[Tuple[HeaderType, ...], int]:
+    """Parses `types ": "` starting at `pos`, returns the types and the subject offset"""
+    if s.find(": ", pos) == -1:
+        # every valid header has a `": "` separator, reject without tokenizing
+        raise MalformedHeaderException(f"Missing ': ' separator in {s}")
+    types = []
+    while True:
+        m = _TYPE_TOKEN.match(s, pos)
+        # the token pattern can match the empty string, so `m` is never `None`
+        keyword, scope, bang = m.group(1), m.group(2), m.group(3)  # type: ignore
+        if not keyword:
+            raise MalformedHeaderException(f"Missing commit type at position {pos} of {s}")
+        if scope is not None and (not scope or "," in scope or " " in scope):
+            raise MalformedHeaderException(
+                f"Scope ({scope}) should be a single word without commas or spaces"
+            )
+        types.append(HeaderType(keyword, scope, bang == "!"))
+        pos = m.end()  # type: ignore
+        if s.startswith(", ", pos):
+            pos += 2
+        elif s.startswith(",", pos):
+            pos += 1
+        elif s.startswith(": ", pos):
+            return tuple(types), pos + 2
+        else:
+            raise MalformedHeaderException(
+                f"Expected ',' or ': ' after commit type `{keyword}` in {s}"
+            )
+
+
+def _parse_preamble(s: str, ticket_first: bool) -> Tuple[Preamble, str]:
+    end = s.find("]")
+    if end == -1:
+        raise MalformedHeaderException(
+            f"{s} could not be split on ']' character. "
+            "The commit message seems malformed!"
+        )
+    preamble = s[:end].strip()
+    fields = preamble.split("/")
+    if len(fields) < 2:
+        raise MalformedHeaderException(
+            f"The preamble {preamble}] could not be split on '/' character. "
+            "The commit message seems malformed!"
+        )
+    first, second = fields[0].replace("[", ""), fields[1]
+    if ticket_first:
+        return Preamble(initials=second, ticket=first), s[end + 1:].strip()
+    else:
+        return Preamble(initials=first, ticket=second), s[end + 1:].strip()
+
+
+@lru_cache(maxsize=256)
+def parse_header(
+    s: str,
+    allow_default_merge_msg: bool = True,
+    with_preamble: bool = False,
+    ticket_first: bool = False
+) -> Header:
+    """Parses a commit message header into a `Header`
+
+    Results are cached, so validators called one after another on the same
+    header (e.g. `is_semantic` followed by `has_short_commit_msg_proper_length`)
+    share a single parse.
+
+    Args:
+        s (str): the first line of the commit message
+        allow_default_merge_msg (bool): accept `Merge branch ...` headers
+        with_preamble (bool): expect a `[initials/ticket]` preamble (technica suite)
+        ticket_first (bool): the preamble reads `[ticket/initials]` instead
+
+    Raises:
+        MalformedHeaderException: when the header does not follow the grammar
+
+    Returns:
+        Header: the parsed header; keywords are not checked against any suite
+    """
+    if allow_default_merge_msg and s.startswith(MERGE_PREFIX):
+        # with a preamble, a `]` means the merge message is preceded by `[initials/ticket]`
+        if not with_preamble or "]" not in s:
+            return Header(subject=s, merge=True)
+
+    preamble = None
+    rest = s
+    if with_preamble:
+        preamble, rest = _parse_preamble(s, ticket_first)
+        if allow_default_merge_msg and rest.startswith(MERGE_PREFIX):
+            return Header(subject=rest, preamble=preamble, merge=True)
+
+    try:
+        types, subject_start = _parse_types(rest, 0)
+    except MalformedHeaderException as e:
+        if with_preamble:
+            raise MalformedHeaderException(
+                "The semantic part of the message, i.e. <keyword>: <message> is "
+                f"not compliant with the semantic commit specification. Input was: {rest}"
+            ) from e
+        raise
+    subject = rest[subject_start:]
+    if not subject or subject[0] == ",":
+        raise MalformedHeaderException(
+            f"The subject of {s} should be non-empty and must not start with a comma"
+        )
+    return Header(types, subject, preamble)
+
+
+class HeaderMatcher:
+    """Checks parsed headers against a fixed keyword set.
+
+    Instances are cheap to keep around and are cached per keyword set by
+    the suites, see `mkcommit.suites.semantic._compile_header_matcher`.
+    """
+
+    __slots__ = (
+        "keywords", "allow_keywords_with_commas", "allow_default_merge_msg",
+        "with_preamble", "ticket_first"
+    )
+
+    def __init__(
+        self,
+        keywords: FrozenSet[str],
+        allow_keywords_with_commas: bool,
+        allow_default_merge_msg: bool,
+        with_preamble: bool = False,
+        ticket_first: bool = False
+    ):
+        self.keywords = keywords
+        self.allow_keywords_with_commas = allow_keywords_with_commas
+        self.allow_default_merge_msg = allow_default_merge_msg
+        self.with_preamble = with_preamble
+        self.ticket_first = ticket_first
+
+    def parse(self, s: str) -> Header:
+        """Parses `s` and checks its keywords
+
+        Raises:
+            MalformedHeaderException: when the header is malformed or uses
+                keywords outside of the matcher's keyword set
+
+        Returns:
+            Header: the parsed header
+        """
+        header = parse_header(
+            s, self.allow_default_merge_msg, self.with_preamble, self.ticket_first
+        )
+        if header.merge:
+            return header
+        if len(header.types) > 1 and not self.allow_keywords_with_commas:
+            raise MalformedHeaderException(f"Only one commit type is allowed, got {s}")
+        for t in header.types:
+            if t.keyword not in self.keywords:
+                if self.with_preamble:
+                    raise MalformedHeaderException(
+                        "The semantic part of the message, i.e. <keyword>: <message> is "
+                        "not compliant with the semantic commit specification. "
+                        f"`{t.keyword}` is not one of {sorted(self.keywords)}"
+                    )
+                raise MalformedHeaderException(
+                    f"`{t.keyword}` is not a valid keyword. Should be one of: "
+                    f"{sorted(self.keywords)}"
+                )
+        return header
+
+    def match(self, s: str) -> Optional[Header]:
+        """Like `parse`, but returns `None` instead of raising"""
+        try:
+            return self.parse(s)
+        except MalformedHeaderException:
+            return None
@@ -0,0 +1,137 @@
+"""Streaming reader of commit messages.
+
+`git rev-list` is run once and piped straight into a single long-lived
+`git cat-file --batch` process, so reading a range costs two processes no
+matter how many commits it holds. Commits are yielded one by one as they are
+read from the pipe, memory use doesn't grow with the size of the range.
+When only some SHAs are wanted (a shard, commits missing from a cache), the
+others are filtered out before `cat-file` reads their objects.
+"""
+import subprocess
+import threading
+from typing import IO, Callable, Iterator, NamedTuple, Optional, Sequence, Tuple, Union
+
+from mkcommit.git import GitClient
+from mkcommit.model import Body, FirstLine
+
+
+class CommitRecord(NamedTuple):
+    sha: str
+    header: FirstLine
+    body: Body
+
+
+def split_message(message: str) -> Tuple[FirstLine, Body]:
+    """Splits a raw commit message into the first line and the body, as in hook mode"""
+    lines = message.splitlines()
+    if not lines:
+        return "", ""
+    return lines[0], "\n".join(lines[1:])
+
+
+def message_from_object(raw: bytes) -> str:
+    """Extracts the message from the raw content of a commit object"""
+    headers, sep, message = raw.partition(b"\n\n")
+    if not sep:
+        return ""
+    encoding = "utf-8"
+    for line in headers.split(b"\n"):
+        if line.startswith(b"encoding "):
+            encoding = line[len(b"encoding "):].decode("ascii", errors="replace")
+            break
+    try:
+        return message.decode(encoding, errors="replace")
+    except LookupError:  # an encoding Python doesn't know
+        return message.decode("utf-8", errors="replace")
+
+
+def _read_objects(stream: IO[bytes]) -> Iterator[Tuple[str, bytes]]:
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        sha, obj_type, *rest = line.decode("ascii").split()
+        if obj_type == "missing":
+            continue
+        size = int(rest[0])
+        content = stream.read(size)
+        stream.read(1)  # the newline terminating each object
+        if obj_type == "commit":
+            yield sha, content
+
+
+def _feed(
+    shas: IO[bytes],
+    cat_file_stdin: IO[bytes],
+    select: Callable[[str], bool]
+) -> None:
+    try:
+        for line in shas:
+            if select(line.strip().decode("ascii")):
+                cat_file_stdin.write(line)
+    except (BrokenPipeError, ValueError):
+        pass  # `cat-file` was stopped, the consumer doesn't want more commits
+    finally:
+        try:
+            cat_file_stdin.close()
+        except BrokenPipeError:
+            pass
+
+
+def iter_history(
+    revs: Union[str, Sequence[str]] = "HEAD",
+    cwd: Optional[str] = None,
+    select: Optional[Callable[[str], bool]] = None
+) -> Iterator[CommitRecord]:
+    """Yields the commits selected by `revs`, newest first
+
+    Args:
+        revs (Union[str, Sequence[str]]): a revision range or a list of
+            `git rev-list` arguments, e.g. `["new", "--not", "--all"]`
+        cwd (Optional[str]): the repository to read, the current directory if `None`
+        select (Optional[Callable[[str], bool]]): if given, only the SHAs
+            it returns `True` for are read and yielded
+
+    Raises:
+        subprocess.CalledProcessError: if `git rev-list` rejects `revs`
+
+    Yields:
+        CommitRecord: the SHA, the first line and the body of each commit
+    """
+    revs = (revs,) if isinstance(revs, str) else tuple(revs)
+    client = GitClient(cwd)
+    with client.popen("rev-list", *revs, "--", stderr=subprocess.PIPE) as rev_list:
+        assert rev_list.stdout is not None
+        with client.popen(
+            "cat-file", "--batch",
+            stdin=rev_list.stdout if select is None else subprocess.PIPE
+        ) as cat_file:
+            assert cat_file.stdout is not None
+            feeder: Optional[threading.Thread] = None
+            if select is None:
+                rev_list.stdout.close()  # `cat-file` owns the read end of the pipe now
+            else:
+                feeder = threading.Thread(
+                    target=_feed, args=(rev_list.stdout, cat_file.stdin, select), daemon=True
+                )
+                feeder.start()
+            finished = False
+            try:
+                for sha, content in _read_objects(cat_file.stdout):
+                    header, body = split_message(message_from_object(content))
+                    yield CommitRecord(sha, header, body)
+                finished = True
+            finally:
+                if not finished:  # the consumer stopped early
+                    rev_list.kill()
+                    cat_file.kill()
+                cat_file.stdout.close()
+                cat_file.wait()
+                if feeder is not None:
+                    feeder.join()
+                    rev_list.stdout.close()
+        stderr = rev_list.stderr.read() if rev_list.stderr else b""
+    if rev_list.returncode != 0:
+        raise subprocess.CalledProcessError(
+            rev_list.returncode, rev_list.args, stderr=stderr
+        )
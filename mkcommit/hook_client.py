@@ -0,0 +1,139 @@
+"""Thin hook entry point talking to `mkcommit.daemon`.
+
+Only the standard library is imported up front. If the daemon is not
+running (or cannot validate the message), the message is validated
+in-process exactly like `mkcommit -x` would.
+"""
+import argparse
+import json
+import os
+import socket
+import stat
+import struct
+import sys
+from typing import Any, Dict, Optional
+
+CONNECT_TIMEOUT = 5.0
+SOCKET_ENV = "MKCOMMIT_SOCKET"
+
+
+def _private_dir(directory: str, create: bool = False) -> str:
+    """`directory`, checked to be writable by the current user only
+
+    Raises:
+        PermissionError: if another user owns it or can write to it
+    """
+    if create:
+        try:
+            os.mkdir(directory, 0o700)
+        except FileExistsError:
+            pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise PermissionError(f"{directory} is not a private directory of the current user")
+    return directory
+
+
+def default_socket_path() -> str:
+    """Per-user socket path, `$MKCOMMIT_SOCKET` takes precedence
+
+    Without `$XDG_RUNTIME_DIR`, the socket lives in a `mkcommit-<uid>`
+    directory of the temporary directory, created private to the user, so
+    other users can't take the socket path over.
+
+    Raises:
+        PermissionError: if the directory of the socket isn't private to the user
+    """
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        runtime_dir = _private_dir(os.environ["XDG_RUNTIME_DIR"])
+    else:
+        import tempfile
+        runtime_dir = _private_dir(
+            os.path.join(tempfile.gettempdir(), f"mkcommit-{os.getuid()}"), create=True
+        )
+    return os.path.join(runtime_dir, f"mkcommit-{os.getuid()}.sock")
+
+
+def _served_by_user(sock: socket.socket, socket_path: str) -> bool:
+    """The socket is owned, and its daemon run, by the current user"""
+    if os.stat(socket_path).st_uid != os.getuid():
+        return False
+    if hasattr(socket, "SO_PEERCRED"):
+        _, uid, _ = struct.unpack("3i", sock.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+        ))
+        return uid == os.getuid()
+    return True
+
+
+def request(socket_path: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Sends one request to the daemon, `None` if it could not be reached
+    or isn't the current user's"""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(socket_path)
+            if not _served_by_user(sock, socket_path):
+                return None  # never send messages to, nor trust replies of, another user
+            sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError:
+        return None
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def validate(file: str, message: str, socket_path: Optional[str] = None) -> Optional[str]:
+    """Validates `message` against the config in `file`
+
+    Returns:
+        Optional[str]: the validation error, `None` if the message is valid
+    """
+    try:
+        socket_path = socket_path or default_socket_path()
+    except PermissionError:
+        socket_path = None  # no safe place for a socket, validate in-process
+    response = None if socket_path is None else request(
+        socket_path,
+        {"file": os.path.abspath(file), "message": message, "cwd": os.getcwd()}
+    )
+    if response is not None and (response["ok"] or response["kind"] == "validation"):
+        return None if response["ok"] else response["error"]
+
+    # daemon unavailable or the config failed in an unexpected way: validate in-process
+    # so that the actual error surfaces with its traceback
+    from mkcommit.main import _main, Mode
+    from mkcommit.model import ValidationFailedException
+    try:
+        _main(file, Mode.HOOK, message)
+    except ValidationFailedException as e:
+        return str(e)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validates a commit message through the `mkcommit` daemon, "
+        "falling back to in-process validation"
+    )
+    parser.add_argument('-f', '--file', type=str, default=".mkcommit.py",
+                        help="Path to the commit config file")
+    parser.add_argument('-x', '--hook', type=str, required=True,
+                        help="The commit message to validate")
+    parser.add_argument('--socket', type=str, help="Path to the daemon's Unix socket")
+    args = parser.parse_args()
+
+    error = validate(args.file, args.hook, args.socket)
+    if error is not None:
+        print(error, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
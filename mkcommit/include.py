@@ -1,21 +1,50 @@
 from mkcommit.module_utils import (
-    get_commit_msg_func_from_module, get_on_commit_func_from_module, load_module
+    get_commit_msg_func_from_module, get_index, get_on_commit_func_from_module, load_module
 )
+from mkcommit.register import INDEX_ATTR, ConfigIndex
 from mkcommit.model import CommitFunc, NoFilesFoundException, OnCommitFunc
-from typing import Dict, Optional, Tuple
-import requests
+from mkcommit import metrics, trace
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Tuple
 import os
+import sys
 import shutil
 import logging
-import yaml
 import hashlib
 import binascii
 
 
 DEFAULT_TEMP_PATH: str = ".mkcommit-cache"
+INCLUDED_MODULE_PREFIX: str = "mkcommit.included_"
 logger = logging.getLogger(__name__)
 
 
+def included_files(module: Optional[ModuleType] = None) -> List[str]:
+    """Paths of the local copies of the configs a loaded config includes,
+    directly or through its includes
+
+    Args:
+        module (Optional[ModuleType]): loaded config, defaults to `sys.modules[MODULE_SHIM]`
+    """
+    return list(get_index(module).includes)
+
+
+def _caller_namespace() -> Dict[str, Any]:
+    """Globals of the config calling `include`, i.e. the module being executed"""
+    frame = sys._getframe(2)
+    while frame.f_globals.get("__name__") == trace.__name__:
+        frame = frame.f_back  # type: ignore  # `traced` wrappers sit in between
+    return frame.f_globals
+
+
+def _record_include(namespace: Dict[str, Any], path: str, module: ModuleType) -> None:
+    index = namespace.setdefault(INDEX_ATTR, ConfigIndex())
+    # absolute, the downloads are relative to the working directory of the run
+    for included in [os.path.abspath(path)] + get_index(module).includes:
+        if included not in index.includes:
+            index.includes.append(included)
+
+
 def _create_cache(path: str = DEFAULT_TEMP_PATH) -> None:
     if not os.path.exists(path):
         os.makedirs(path)
@@ -31,6 +60,7 @@ def _get_configs_map(temp_path: str = DEFAULT_TEMP_PATH) -> Dict[str, str]:
     configs_map_path = os.path.join(temp_path, "configs.yaml")
     configs_map: Dict[str, str] = {}
     if os.path.exists(configs_map_path):
+        import yaml
         with open(configs_map_path, "r") as f:
             configs_map = yaml.full_load(f)
     return configs_map
@@ -44,6 +74,7 @@ def _add_to_configs_map(
     configs_map_path = os.path.join(temp_path, "configs.yaml")
     configs_map: Dict[str, str] = _get_configs_map(temp_path)
     configs_map[source_url] = target_temp_file_name
+    import yaml
     with open(configs_map_path, "w") as f:
         yaml.dump(configs_map, f)
 
@@ -58,8 +89,11 @@ def _get_mkcommit_config_from_url(
     configs_map = _get_configs_map()
     try:
         target_file_path = os.path.join(temp_path, configs_map[url])
+        metrics.inc("mkcommit_include_cache_total", result="hit")
     except KeyError:
+        metrics.inc("mkcommit_include_cache_total", result="miss")
         # if there is none, get one from remote:
+        import requests
         response = requests.get(url, verify=cert_path)
         logger.debug(f"Return code from {url} was {response.status_code}")
         response.raise_for_status()
@@ -81,6 +115,7 @@ def _get_mkcommit_config_from_url(
     return target_file_path
 
 
+@trace.traced("include")
 def include(
     url: str,
     target_temp_file_name: Optional[str] = None,
@@ -100,9 +135,14 @@ def include(
 
     target_path = _get_mkcommit_config_from_url(url, inferred_temp_file_name, cert)
 
-    load_module(target_path)
+    # included configs get their own namespace, so they never replace the
+    # config that is including them
+    with open(target_path, "rb") as f:
+        content_hash = hashlib.sha256(f.read()).hexdigest()
+    module = load_module(target_path, f"{INCLUDED_MODULE_PREFIX}{content_hash[:16]}")
+    _record_include(_caller_namespace(), target_path, module)
 
-    commit_func_or_none = get_commit_msg_func_from_module()
+    commit_func_or_none = get_commit_msg_func_from_module(module)
 
     if commit_func_or_none is None:
         raise NoFilesFoundException(
@@ -114,6 +154,6 @@ def include(
 
     commit_func: CommitFunc = commit_func_or_none
 
-    on_commit_func = get_on_commit_func_from_module()
+    on_commit_func = get_on_commit_func_from_module(module)
 
     return (commit_func, on_commit_func)
@@ -0,0 +1,243 @@
+"""Validation of existing commits, e.g. `mkcommit lint origin/main..HEAD`.
+
+The config is loaded once and its `on_commit` is run over every commit in a
+revision range. Work is spread over a process pool forked after the config
+was loaded, so workers inherit it instead of loading it again. Where `fork`
+is unavailable (Windows, or when `jobs=1`), commits are validated serially.
+Commits are streamed from `mkcommit.history` as the pool consumes them.
+Metrics recorded in a worker are sent back with its results, so the metrics
+of a run cover every commit, whichever process validated it.
+Commits that passed before with the same config are skipped, see
+`mkcommit.lint_cache`.
+
+Large audits can be split over machines with `shard=(i, n)`: commits are
+assigned to one of `n` shards by their SHA, so every machine lints a
+disjoint part of the same range. Each shard writes its report with
+`write_report` and `merge_reports` combines the reports.
+"""
+import json
+import multiprocessing
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from mkcommit import metrics
+from mkcommit.history import CommitRecord, iter_history
+from mkcommit.include import included_files
+from mkcommit.lint_cache import LintCache, cache_key, default_cache_dir
+from mkcommit.model import (
+    CommitMessage, FailedToFindCommitMessageException, OnCommitFunc, ValidationFailedException
+)
+from mkcommit.module_utils import get_on_commit_func_from_module, load_module
+
+REPORT_FORMAT = 1
+
+Shard = Tuple[int, int]  # (index, count), index is 1-based
+
+# set before the pool forks, inherited by the workers
+_ON_COMMIT: Optional[OnCommitFunc] = None
+
+
+@dataclass
+class LintFailure:
+    sha: str
+    header: str
+    error: str
+
+    def __str__(self) -> str:
+        return f"{self.sha} {self.header}\n    {self.error}"
+
+
+def parse_shard(s: str) -> Shard:
+    """Parses `i/n`, e.g. `2/8` for the second of eight shards"""
+    try:
+        index, count = (int(i) for i in s.split("/"))
+    except ValueError:
+        raise ValueError(f"Expected a shard like `2/8`, got `{s}`")
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+
+def in_shard(sha: str, shard: Shard) -> bool:
+    index, count = shard
+    return int(sha[:16], 16) % count == index - 1
+
+
+def _check(on_commit: OnCommitFunc, commit: CommitRecord) -> Optional[LintFailure]:
+    try:
+        on_commit(CommitMessage(commit.header, commit.body))
+    except ValidationFailedException as e:
+        return LintFailure(commit.sha, commit.header, str(e))
+    except Exception as e:
+        return LintFailure(commit.sha, commit.header, f"{type(e).__name__}: {e}")
+    return None
+
+
+def _worker_check(
+    commit: CommitRecord
+) -> Tuple[str, Optional[LintFailure], Dict[metrics.Series, float]]:
+    assert _ON_COMMIT is not None, "The lint pool was started without a hook. This is a bug!"
+    failure = _check(_ON_COMMIT, commit)
+    return commit.sha, failure, metrics.take()
+
+
+def _can_fork() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def check_commits(
+    on_commit: OnCommitFunc,
+    commits: Iterable[CommitRecord],
+    jobs: Optional[int] = None
+) -> Iterator[Tuple[str, Optional[LintFailure]]]:
+    """Runs `on_commit` over `commits`
+
+    Args:
+        on_commit (OnCommitFunc): the hook of the loaded config
+        commits (Iterable[CommitRecord]): the commits to check, consumed lazily
+        jobs (Optional[int]): number of worker processes, all CPUs if `None`
+
+    Yields:
+        Tuple[str, Optional[LintFailure]]: the SHA of every commit, in the
+            order of `commits`, with its failure or `None` if it passed
+    """
+    global _ON_COMMIT
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or not _can_fork():
+        for commit in commits:
+            yield commit.sha, _check(on_commit, commit)
+        return
+
+    _ON_COMMIT = on_commit
+    try:
+        # the initializer drops the values a worker inherits, the parent reports those
+        with multiprocessing.get_context("fork").Pool(jobs, initializer=metrics.take) as pool:
+            for sha, failure, recorded in pool.imap(_worker_check, commits, chunksize=256):
+                metrics.merge(recorded)
+                yield sha, failure
+    finally:
+        _ON_COMMIT = None
+
+
+def lint_commits(
+    on_commit: OnCommitFunc,
+    commits: Iterable[CommitRecord],
+    jobs: Optional[int] = None
+) -> Iterator[LintFailure]:
+    """Like `check_commits`, but yields the failures only"""
+    for _, failure in check_commits(on_commit, commits, jobs):
+        if failure is not None:
+            yield failure
+
+
+def lint(
+    file: str,
+    rev_range: str,
+    jobs: Optional[int] = None,
+    template: Optional[str] = None,
+    cwd: Optional[str] = None,
+    use_cache: bool = True,
+    shard: Optional[Shard] = None
+) -> List[LintFailure]:
+    """Validates every commit in `rev_range` with the `on_commit` hook of `file`
+
+    With `use_cache`, commits that passed an earlier run with the same config
+    are not validated again. With `shard`, only the commits of that shard are
+    validated.
+
+    Raises:
+        FailedToFindCommitMessageException: if the config doesn't declare a hook
+
+    Returns:
+        List[LintFailure]: the commits that failed validation
+    """
+    module = load_module(file)
+    on_commit = get_on_commit_func_from_module(module, template) or \
+        get_on_commit_func_from_module(module)
+    if on_commit is None:
+        raise FailedToFindCommitMessageException(
+            f"{file} doesn't declare an `on_commit` function, there is nothing to lint with"
+        )
+    if not use_cache:
+        select = None if shard is None else (lambda sha: in_shard(sha, shard))
+        return list(lint_commits(on_commit, iter_history(rev_range, cwd, select), jobs))
+
+    cache = LintCache(
+        default_cache_dir(cwd),
+        cache_key(file, included_files(module), template)
+    )
+
+    def unseen(sha: str) -> bool:
+        return sha not in cache and (shard is None or in_shard(sha, shard))
+
+    failures: List[LintFailure] = []
+    try:
+        commits = iter_history(rev_range, cwd, unseen)
+        for sha, failure in check_commits(on_commit, commits, jobs):
+            if failure is None:
+                cache.add(sha)
+            else:
+                failures.append(failure)
+    finally:
+        cache.save()  # keep the progress of an interrupted run
+    return failures
+
+
+def write_report(
+    path: str,
+    rev_range: str,
+    failures: List[LintFailure],
+    shard: Optional[Shard] = None
+) -> None:
+    """Writes the result of a `lint` run as JSON, for `merge_reports`"""
+    report = {
+        "format": REPORT_FORMAT,
+        "rev_range": rev_range,
+        "shard": list(shard) if shard else None,
+        "failures": [asdict(f) for f in failures]
+    }
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, path)
+
+
+def merge_reports(paths: List[str]) -> Tuple[List[LintFailure], List[str]]:
+    """Combines the reports of the shards of one lint run
+
+    Returns:
+        Tuple[List[LintFailure], List[str]]: all failures, ordered by shard,
+            and the problems preventing the reports from covering the whole
+            range (missing or duplicate shards, mismatched runs)
+    """
+    reports = []
+    for path in paths:
+        with open(path, "r") as f:
+            reports.append((path, json.load(f)))
+
+    problems: List[str] = []
+    runs = {(r["rev_range"], (r["shard"] or [1, 1])[1]) for _, r in reports}
+    if len(runs) > 1:
+        problems.append(f"The reports come from different runs: {sorted(runs)}")
+    for path, r in reports:
+        if r.get("format") != REPORT_FORMAT:
+            problems.append(f"{path} has an unsupported format {r.get('format')}")
+
+    seen = {}
+    for path, r in reports:
+        index = (r["shard"] or [1, 1])[0]
+        if index in seen:
+            problems.append(f"Shard {index} is reported by both {seen[index]} and {path}")
+        seen[index] = path
+    for _, count in runs:
+        missing = sorted(set(range(1, count + 1)) - set(seen))
+        if missing:
+            problems.append(f"No report for shard(s) {', '.join(map(str, missing))} of {count}")
+
+    failures = [
+        LintFailure(**f)
+        for _, r in sorted(reports, key=lambda pr: (pr[1]["shard"] or [1, 1])[0])
+        for f in r["failures"]
+    ]
+    return failures, problems
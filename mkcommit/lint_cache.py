@@ -0,0 +1,107 @@
+"""Persistent record of the commits that already passed `mkcommit lint`.
+
+A commit is immutable, so once it passed validation it passes again as long
+as the rules are the same. The cache is keyed on the content of the config,
+the configs it includes, the selected template and the `mkcommit` version;
+changing any of them selects a new key. It lives in `<git-dir>/mkcommit/`,
+one file of SHAs per key, holding at most `max_entries` of the most recently
+validated commits. The files of the `max_keys` most recently used keys are
+kept, so configs or templates linted in turn (or by concurrent jobs sharing
+the directory) don't wipe each other's cache.
+"""
+import hashlib
+import os
+from typing import Dict, Iterable, Optional
+
+import mkcommit
+from mkcommit.config_registry import file_digest
+from mkcommit.git import GitClient
+
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_MAX_KEYS = 8
+CACHE_DIR_NAME = "mkcommit"
+SUFFIX = ".lint-cache"
+
+
+def cache_key(file: str, included: Iterable[str] = (), template: Optional[str] = None) -> str:
+    """Hash of everything that decides whether a commit passes"""
+    h = hashlib.sha256()
+    for part in (mkcommit.__version__, template or "", file_digest(file)):
+        h.update(part.encode("utf-8") + b"\0")
+    for path in sorted(set(included)):
+        h.update(file_digest(path).encode("utf-8") + b"\0")
+    return h.hexdigest()
+
+
+def default_cache_dir(cwd: Optional[str] = None) -> str:
+    git_dir = GitClient(cwd).output("rev-parse", "--absolute-git-dir")
+    return os.path.join(git_dir, CACHE_DIR_NAME)
+
+
+class LintCache:
+
+    def __init__(
+        self,
+        directory: str,
+        key: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_keys: int = DEFAULT_MAX_KEYS
+    ):
+        self.directory = directory
+        self.path = os.path.join(directory, key + SUFFIX)
+        self.max_entries = max_entries
+        self.max_keys = max_keys
+        # a dict keeps insertion order, the oldest entries are evicted first
+        self._shas: Dict[str, None] = {}
+        self._dirty = False
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self._shas = dict.fromkeys(line.strip() for line in f if line.strip())
+            os.utime(self.path)  # used, even if nothing new is saved
+            self._evict()
+
+    def __contains__(self, sha: str) -> bool:
+        return sha in self._shas
+
+    def __len__(self) -> int:
+        return len(self._shas)
+
+    def add(self, sha: str) -> None:
+        if sha not in self._shas:
+            self._shas[sha] = None
+            self._dirty = True
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self._shas) > self.max_entries:
+            del self._shas[next(iter(self._shas))]
+            self._dirty = True
+
+    def _remove_stale(self) -> None:
+        """Drops the caches of the least recently used other keys, beyond `max_keys`"""
+        others = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(SUFFIX) and path != self.path:
+                try:
+                    others.append((os.stat(path).st_mtime_ns, path))
+                except FileNotFoundError:
+                    pass  # removed by a concurrent run
+        others.sort(reverse=True)
+        for _, path in others[max(self.max_keys - 1, 0):]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def save(self) -> None:
+        """Writes the cache, dropping the caches of the least recently used keys"""
+        if not self._dirty:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._remove_stale()
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.writelines(sha + "\n" for sha in self._shas)
+        os.replace(tmp, self.path)  # concurrent readers see the old or the new file
+        self._dirty = False
@@ -1,18 +1,23 @@
 import argparse
 import glob
+import json
 import os
-from typing import Callable, Optional, Union
+from typing import IO, Callable, Iterator, Optional, TextIO, Union
 import warnings
 from enum import Enum
 import sys
-import pyperclip
-import subprocess
 
 from mkcommit.model import (
     CommitMessage, WrongModeException, NoFilesFoundException, select, confirm,
-    PRE_COMMIT_FUNC_NAME, MODULE_SHIM
+    PRE_COMMIT_FUNC_NAME, MODULE_SHIM, OnCommitFunc, ValidationFailedException
 )
 
+from mkcommit import context, metrics, trace
+from mkcommit.git import get_client
+from mkcommit.history import split_message
+from mkcommit.compiler import (
+    NotCompilableException, artifact_path, compile_config, load_fresh_artifact, run_rules
+)
 from mkcommit.module_utils import (
     get_on_commit_func_from_module, load_module, check_commit_msg_exists, get_commit_msg_from_module
 )
@@ -24,6 +29,8 @@ class Mode(Enum):
     BOTH = "both"
     RUN = "run"
     HOOK = "hook"
+    HOOK_FILE = "hook-file"
+    STREAM = "stream"
 
 
 def to_stdout(msg: Union[str, CommitMessage]):
@@ -34,6 +41,7 @@ def to_stdout(msg: Union[str, CommitMessage]):
 
 
 def to_clipboard(msg: Union[str, CommitMessage]):
+    import pyperclip
     if type(msg) is CommitMessage:
         pyperclip.copy(msg.make())
     else:
@@ -51,16 +59,17 @@ def to_cmd(msg: Union[str, CommitMessage]):
         )
     yes = confirm(f"The commit message is:\n{msg_str}\n Confirm?")
     if yes:
-        subprocess.call(("git", "commit", "-m", msg_str))
+        get_client().run("commit", "-m", msg_str, check=False, capture=False)
     else:
         print("Canceling.")
 
 
-def to_hook(msg: Union[str, CommitMessage]):
+def to_hook(msg: Union[str, CommitMessage], template: Optional[str] = None):
     module = sys.modules[MODULE_SHIM]
-    hook_func = get_on_commit_func_from_module()
+    # templates without a dedicated hook are validated by the default one
+    hook_func = get_on_commit_func_from_module(name=template) or get_on_commit_func_from_module()
     if hook_func:
-        if type(msg) is CommitMessage:
+        if isinstance(msg, CommitMessage):
             hook_func(msg)
         else:
             raise TypeError(
@@ -72,6 +81,57 @@ def to_hook(msg: Union[str, CommitMessage]):
         warnings.warn(f"No hook implemented for template {module.__file__}")
 
 
+def commit_message_from_str(msg: str) -> CommitMessage:
+    """Splits a raw commit message into the first line and the body, as in hook mode"""
+    return CommitMessage(*split_message(msg))
+
+
+def read_nul_separated(stream: IO[bytes], chunk_size: int = 1 << 16) -> Iterator[str]:
+    """Yields the NUL-separated messages of `stream`, e.g. `git log -z --format=%B`,
+    as soon as each one is complete"""
+    # `read1` returns what is available instead of waiting for a full chunk
+    read = getattr(stream, "read1", stream.read)
+    pending = b""
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        *messages, pending = (pending + chunk).split(b"\0")
+        for m in messages:
+            yield m.decode("utf-8", errors="replace")
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+def validate_stream(
+    validate: Callable[[CommitMessage], None],
+    stream_in: IO[bytes],
+    stream_out: TextIO
+) -> int:
+    """Validates every message of `stream_in`, writing one JSON result per line
+
+    Results look like the responses of `mkcommit-daemon`, with the position of
+    the message in the stream as `index`.
+
+    Returns:
+        int: the number of messages that failed validation
+    """
+    failed = 0
+    for index, raw in enumerate(read_nul_separated(stream_in)):
+        msg = commit_message_from_str(raw)
+        result = {"index": index, "ok": True, "header": msg.first_line}
+        try:
+            validate(msg)
+        except ValidationFailedException as e:
+            result.update(ok=False, kind="validation", error=str(e))
+        except Exception as e:
+            result.update(ok=False, kind="error", error=f"{type(e).__name__}: {e}")
+        failed += not result["ok"]
+        stream_out.write(json.dumps(result) + "\n")
+        stream_out.flush()
+    return failed
+
+
 def _main(  # noqa: C901
     file: str,
     mode: Mode,
@@ -79,49 +139,145 @@ def _main(  # noqa: C901
     to_stdout: Callable[[Union[str, CommitMessage]], None] = to_stdout,
     to_clipboard: Callable[[Union[str, CommitMessage]], None] = to_clipboard,
     to_cmd: Callable[[Union[str, CommitMessage]], None] = to_cmd,
-    to_hook: Callable[[Union[str, CommitMessage]], None] = to_hook
+    to_hook: Callable[[Union[str, CommitMessage]], None] = to_hook,
+    template: Optional[str] = None,
+    commit_msg_file: Optional[str] = None,
+    cleanup: str = "default"
 ):
-    load_module(file)
-
-    if mode == mode.HOOK:
-        # in hook mode we check the message fed in as a command line argument
-        if commit_msg_str_from_hook is None:
+    if mode in (mode.HOOK, mode.HOOK_FILE):
+        # in hook mode we check the message fed in as a command line argument,
+        # or the file git passes to the `commit-msg` hook
+        if mode == mode.HOOK_FILE:
+            if commit_msg_file is None:
+                raise ValueError("No commit message file given!")
+            from mkcommit.commit_msg import Cleanup, read_header, read_message
+            cleanup_mode = Cleanup(cleanup)
+        elif commit_msg_str_from_hook is None:
             raise ValueError("Commit message was empty!")
+        # a fresh `mkcommit compile` artifact spares executing the config
+        with trace.span("compiled rules"):
+            rules = load_fresh_artifact(file)
+            if rules is not None:
+                # compiled rules only check the first line, the rest of the file isn't read
+                if mode == mode.HOOK_FILE:
+                    commit_message_instance = CommitMessage(
+                        read_header(commit_msg_file, cleanup_mode)
+                    )
+                else:
+                    commit_message_instance = commit_message_from_str(commit_msg_str_from_hook)
+                with metrics.outcome("compiled_rules"):
+                    run_rules(rules, commit_message_instance)
+                return
+        if mode == mode.HOOK_FILE:
+            commit_message_instance = read_message(commit_msg_file, cleanup_mode)
         else:
-            lines = commit_msg_str_from_hook.splitlines()
-            first_line = lines[0]
-            if len(lines) > 1:
-                body: str = "\n".join(lines[1:])
+            commit_message_instance = commit_message_from_str(commit_msg_str_from_hook)
+        with trace.span("load_module", file=file):
+            load_module(file)
+        with trace.span("on_commit"), metrics.outcome("on_commit"):
+            if template is None:
+                to_hook(commit_message_instance)
             else:
-                body: str = ""
-            commit_message_instance = CommitMessage(first_line, body)
-            to_hook(commit_message_instance)
-    elif mode == mode.STDOUT:
-        commit_message_instance = get_commit_msg_from_module()
-        to_stdout(check_commit_msg_exists(commit_message_instance, file))
-    elif mode == mode.CLIPBOARD:
-        commit_message_instance = get_commit_msg_from_module()
-        to_clipboard(check_commit_msg_exists(commit_message_instance, file))
-    elif mode == mode.BOTH:
-        commit_message_instance = get_commit_msg_from_module()
-        m = check_commit_msg_exists(commit_message_instance, file)
-        to_stdout(m)
-        to_clipboard(m)
-    elif mode == mode.RUN:
-        commit_message_instance = get_commit_msg_from_module()
-        to_cmd(check_commit_msg_exists(commit_message_instance, file))
-    else:
+                to_hook(commit_message_instance, template=template)  # type: ignore
+        return
+
+    if mode == mode.STREAM:
+        # the config is loaded once for the whole stream
+        rules = load_fresh_artifact(file)
+        if rules is not None:
+            validate: Callable[[CommitMessage], None] = lambda m: run_rules(rules, m)
+        else:
+            with trace.span("load_module", file=file):
+                load_module(file)
+            on_commit: Optional[OnCommitFunc] = \
+                get_on_commit_func_from_module(name=template) or get_on_commit_func_from_module()
+            if on_commit is None:
+                warnings.warn(f"No hook implemented for template {file}")
+                on_commit = lambda m: None
+            validate = on_commit
+        with trace.span("validate stream"):
+            failed = validate_stream(validate, sys.stdin.buffer, sys.stdout)
+        if failed:
+            sys.exit(1)
+        return
+
+    # git queries of the templates run while the config loads and the user answers prompts
+    context.prefetch()
+    with trace.span("load_module", file=file):
+        load_module(file)
+
+    if mode not in (mode.STDOUT, mode.CLIPBOARD, mode.BOTH, mode.RUN):
         raise WrongModeException(f"You've used invalid mode: {mode}")
+    with trace.span("commit"):
+        m = check_commit_msg_exists(get_commit_msg_from_module(name=template), file)
+    with trace.span("validate"):
+        # messages built with e.g. `validate=RuleSet(...).validate` check themselves,
+        # failing by raising or by returning `False` (`None` passes)
+        if m.validate(m) is False:
+            raise ValidationFailedException(f"The message built by {file} failed its validation")
+    if mode in (mode.STDOUT, mode.BOTH):
+        with trace.span("to_stdout"):
+            to_stdout(m)
+    if mode in (mode.CLIPBOARD, mode.BOTH):
+        with trace.span("to_clipboard"):
+            to_clipboard(m)
+    if mode == mode.RUN:
+        with trace.span("to_cmd"):
+            to_cmd(m)
 
 
-def main():  # noqa: C901
+def main():
     parser = argparse.ArgumentParser(
         description="`mkcommit` runs `git commit` with an autogenerated message"
     )
 
-    # subparsers = parser.add_subparsers()
-    # parser_mk = subparsers.add_parser("mk", help="Create commit messages from templates")
-    # parser_lint = subparsers.add_parser("lint", help="Lint a commit message")
+    subparsers = parser.add_subparsers(dest="command")
+    parser_compile = subparsers.add_parser(
+        "compile", help="Precompile the `on_commit` checks of a config for hook mode"
+    )
+    parser_compile.add_argument('-f', '--file', type=str, default=".mkcommit.py",
+                                help="Path to the commit config file to compile")
+    parser_lint = subparsers.add_parser(
+        "lint", help="Validate existing commits with the `on_commit` hook of a config"
+    )
+    parser_lint.add_argument('rev_range', type=str, nargs="?", default="HEAD",
+                             help="Revision range to lint, e.g. `origin/main..HEAD`")
+    parser_lint.add_argument('-f', '--file', type=str, default=".mkcommit.py",
+                             help="Path to the commit config file")
+    parser_lint.add_argument('-j', '--jobs', type=int, default=None,
+                             help="Number of worker processes, defaults to the number of CPUs")
+    parser_lint.add_argument('-t', '--template', type=str, default=None,
+                             help="Name of the registered hook to lint with")
+    parser_lint.add_argument('--no-cache', action='store_true',
+                             help="Validate commits that passed an earlier run again")
+    parser_lint.add_argument('--shard', type=str, default=None,
+                             help="Lint only the i-th of n disjoint parts of the range, e.g. `2/8`")
+    parser_lint.add_argument('-o', '--output', type=str, default=None,
+                             help="Write the result to a JSON file, for `mkcommit lint-merge`")
+    parser_lint_merge = subparsers.add_parser(
+        "lint-merge", help="Combine the results of sharded `mkcommit lint` runs"
+    )
+    parser_lint_merge.add_argument('reports', type=str, nargs="+",
+                                   help="JSON files written by `mkcommit lint --output`")
+    parser_pre_receive = subparsers.add_parser(
+        "pre-receive", help="Validate pushed commits, as a server-side `pre-receive` hook"
+    )
+    parser_pre_receive.add_argument('-f', '--file', type=str, default=None,
+                                    help="Path of a commit config file on the server, "
+                                    "defaults to the one in the repository's HEAD")
+    parser_pre_receive.add_argument('--config-path', type=str, default=".mkcommit.py",
+                                    help="Path of the commit config file within the tree")
+    parser_pre_receive.add_argument('--pushed-config', action='store_true',
+                                    help="Validate with the config of the pushed commits, "
+                                    "accepted only if it compiles (see `mkcommit compile`)")
+    parser_pre_receive.add_argument('-j', '--jobs', type=int, default=None,
+                                    help="Number of worker processes, "
+                                    "defaults to the number of CPUs")
+    parser_pre_receive.add_argument('-t', '--template', type=str, default=None,
+                                    help="Name of the registered hook of the `-f` config "
+                                    "to validate with")
+    parser_pre_receive.add_argument('--fail-fast', action='store_true',
+                                    help="Reject the push at the first invalid commit")
     # parser_config = subparsers.add_parser("config", help="Configure `mkcommit`")
 
     parser.add_argument('-c', '--clipboard',
@@ -142,11 +298,125 @@ def main():  # noqa: C901
                         "This is intended to be used mainly as an entrypoint for `pre-commit` "
                         "hooks"
                         )
+    parser.add_argument('--hook-file', type=str, default=None, metavar="COMMIT_MSG_FILE",
+                        help="Like `--hook`, but validates the message file git passes "
+                        "to a `commit-msg` hook (e.g. `.git/COMMIT_EDITMSG`)")
+    parser.add_argument('--cleanup', type=str, default="default",
+                        choices=("default", "strip", "whitespace", "verbatim", "scissors"),
+                        help="How to clean up the `--hook-file` message, as `git commit "
+                        "--cleanup` does (default: like git, `strip` if the message was "
+                        "edited, `whitespace` otherwise)")
+    parser.add_argument('--hook-stdin', action="store_true",
+                        help="Like `--hook`, but validates NUL-separated messages read from "
+                        "standard input (e.g. `git log -z --format=%%B`) and writes one JSON "
+                        "result per line")
+    parser.add_argument('-t', '--template',
+                        type=str, help="Name of the commit template to use, for configs "
+                        "registering several templates with `mkcommit.register`")
     parser.add_argument('-a', '--autoselect',
                         action="store_true", help="Automatically selects "
                         "the first found `*.mkcommit.py` file")
 
+    parser.add_argument('--profile', nargs="?", const=trace.DEFAULT_TRACE_FILE, default=None,
+                        metavar="TRACE_FILE", help="Record how long each phase takes, write "
+                        f"a Chrome trace (default: {trace.DEFAULT_TRACE_FILE}) and print a summary")
+
+    parser.add_argument('--metrics-file', type=str, default=None,
+                        help="Add counters and durations of this run to a Prometheus "
+                        f"textfile, defaults to `${metrics.METRICS_FILE_ENV}` if set")
+
     args = parser.parse_args()
+    if args.command == "pre-receive" and args.template is not None and args.file is None:
+        parser_pre_receive.error("`--template` needs a config on the server (`-f`)")
+
+    metrics.start(args.metrics_file)
+    if args.profile:
+        trace.start()
+    try:
+        _run(args, parser_lint)
+    finally:
+        metrics.finish(_mode_label(args))
+        tracer = trace.stop()
+        if tracer is not None:
+            tracer.write(args.profile)
+            print(tracer.summary(), file=sys.stderr)
+            print(f"Trace written to {args.profile}", file=sys.stderr)
+
+
+def _mode_label(args: argparse.Namespace) -> str:
+    if args.command:
+        return args.command
+    if args.hook:
+        return Mode.HOOK.value
+    if args.hook_file:
+        return Mode.HOOK_FILE.value
+    if args.hook_stdin:
+        return Mode.STREAM.value
+    if args.clipboard and args.stdout:
+        return Mode.BOTH.value
+    if args.clipboard:
+        return Mode.CLIPBOARD.value
+    return Mode.STDOUT.value if args.stdout else Mode.RUN.value
+
+
+def _run(args: argparse.Namespace, parser_lint: argparse.ArgumentParser):  # noqa: C901
+
+    if args.command == "compile":
+        try:
+            artifact = compile_config(args.file)
+        except NotCompilableException as e:
+            print(f"{args.file} cannot be compiled, hook mode will execute it: {e}")
+            sys.exit(1)
+        print(f"Compiled {len(artifact['rules'])} rule(s) to {artifact_path(args.file)}")
+        return
+
+    if args.command == "lint":
+        # imported here, `mkcommit.lint` builds on this module
+        from mkcommit.lint import lint, parse_shard, write_report
+        try:
+            shard = parse_shard(args.shard) if args.shard else None
+        except ValueError as e:
+            parser_lint.error(str(e))
+        failures = lint(args.file, args.rev_range, args.jobs, args.template,
+                        use_cache=not args.no_cache, shard=shard)
+        if args.output:
+            write_report(args.output, args.rev_range, failures, shard)
+        for failure in failures:
+            print(failure)
+        if failures:
+            print(f"{len(failures)} commit(s) in {args.rev_range} failed validation")
+            sys.exit(1)
+        return
+
+    if args.command == "lint-merge":
+        from mkcommit.lint import merge_reports
+        failures, problems = merge_reports(args.reports)
+        for failure in failures:
+            print(failure)
+        for problem in problems:
+            print(problem)
+        if failures:
+            print(f"{len(failures)} commit(s) failed validation")
+        if failures or problems:
+            sys.exit(1)
+        return
+
+    if args.command == "pre-receive":
+        from mkcommit.pre_receive import check_updates, parse_updates
+        failures = 0
+        try:
+            for failure in check_updates(parse_updates(sys.stdin), args.config_path,
+                                         args.template, args.jobs, args.fail_fast,
+                                         file=args.file, pushed_config=args.pushed_config):
+                print(failure)
+                failures += 1
+        except NotCompilableException as e:
+            print(f"Push rejected: {e}")
+            sys.exit(1)
+        if failures:
+            print(f"Push rejected, {failures} commit(s) failed validation")
+            sys.exit(1)
+        return
 
     if args.clipboard and args.stdout:
         mode = Mode.BOTH
@@ -161,6 +431,10 @@ def main():  # noqa: C901
     # so no `to_stdout` and no `to_clipboard` calls will be heeded:
     if args.hook:
         mode = Mode.HOOK
+    elif args.hook_file:
+        mode = Mode.HOOK_FILE
+    elif args.hook_stdin:
+        mode = Mode.STREAM
 
     def _find_files_and_run(root: str):
         with_root = lambda p: os.path.join(root, p)
@@ -177,12 +451,14 @@ def main():  # noqa: C901
             selected_file = select(
                 "Select one of the following files I've found", mkcommit_files)
         if type(selected_file) is str:
-            _main(selected_file, mode, args.hook)
+            _main(selected_file, mode, args.hook, template=args.template,
+                  commit_msg_file=args.hook_file, cleanup=args.cleanup)
         else:
             raise TypeError("Result was not a string. This is a bug!")
 
     if args.file:
-        _main(args.file, mode, args.hook)
+        _main(args.file, mode, args.hook, template=args.template,
+              commit_msg_file=args.hook_file, cleanup=args.cleanup)
     else:
         if os.path.exists(".mkcommit"):
             try:
@@ -0,0 +1,235 @@
+"""Opt-in metrics in the Prometheus text format, for a node-exporter textfile collector.
+
+Enabled with `mkcommit --metrics-file PATH` or `$MKCOMMIT_METRICS_FILE`. A run
+collects its metrics in memory and `flush` adds them to the totals already
+in the file. Every metric is a counter (a histogram is a set of counters),
+so merging is a sum. The read-modify-write is serialised with an exclusive
+lock on `PATH.lock`, and the file is replaced atomically, so the collector
+and concurrent hooks never see a partial file.
+
+Until `start` is called every recording function returns immediately. Forked
+worker processes hand what they recorded to the parent with `take`, and the
+parent adds it to its run with `merge`.
+"""
+import os
+import re
+import time
+import warnings
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from mkcommit.model import ValidationFailedException
+from mkcommit.trace import IMPORTED_AT
+
+try:
+    import fcntl
+except ImportError:  # Windows, `os.replace` alone keeps the file whole
+    fcntl = None  # type: ignore
+
+METRICS_FILE_ENV = "MKCOMMIT_METRICS_FILE"
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+FAMILIES = {
+    "mkcommit_invocations_total": ("counter", "Number of mkcommit runs per mode"),
+    "mkcommit_validations_total": ("counter", "Validation outcomes per check"),
+    "mkcommit_include_cache_total": ("counter", "Lookups of included configs in the local cache"),
+    "mkcommit_duration_seconds": ("histogram", "End-to-end duration of mkcommit runs"),
+}
+
+_SERIES = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+Labels = Tuple[Tuple[str, str], ...]
+Series = Tuple[str, Labels]
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r'\\(.)', lambda m: "\n" if m.group(1) == "n" else m.group(1), value)
+
+
+def _format_value(v: float) -> str:
+    return str(int(v)) if v == int(v) else repr(v)
+
+
+def _format_le(le: float) -> str:
+    return "+Inf" if le == float("inf") else repr(le)
+
+
+def _family(name: str) -> str:
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+            return name[:-len(suffix)]
+    return name
+
+
+def parse(text: str) -> Dict[Series, float]:
+    series: Dict[Series, float] = {}
+    for line in text.splitlines():
+        match = _SERIES.match(line.strip())
+        if line.startswith("#") or match is None:
+            continue
+        name, labels, value = match.groups()
+        key = (name, tuple((k, _unescape(v)) for k, v in _LABEL.findall(labels or "")))
+        series[key] = series.get(key, 0.0) + float(value)
+    return series
+
+
+def _sort_key(item: Tuple[Series, float]) -> tuple:
+    (name, labels), _ = item
+    family = _family(name)
+    order = list(FAMILIES).index(family) if family in FAMILIES else len(FAMILIES)
+    base = tuple(kv for kv in labels if kv[0] != "le")
+    le = dict(labels).get("le")
+    le_value = float(le.replace("+Inf", "inf")) if le is not None else 0.0
+    return (order, family, base, name != f"{family}_bucket", le_value, name)
+
+
+def render(series: Dict[Series, float]) -> str:
+    lines: List[str] = []
+    current = None
+    for (name, labels), value in sorted(series.items(), key=_sort_key):
+        family = _family(name)
+        if family != current:
+            current = family
+            if family in FAMILIES:
+                kind, help_text = FAMILIES[family]
+                lines.append(f"# HELP {family} {help_text}")
+                lines.append(f"# TYPE {family} {kind}")
+        label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+        lines.append(f"{name}{{{label_str}}} {_format_value(value)}" if labels
+                     else f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class Recorder:
+
+    def __init__(self, path: str, started: float = IMPORTED_AT):
+        self.path = path
+        self.series: Dict[Series, float] = {}
+        self.started = started  # the duration includes importing the package
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items(), key=lambda kv: (kv[0] == "le", kv[0]))))
+        self.series[key] = self.series.get(key, 0.0) + amount
+
+    def observe_duration(self, seconds: float, **labels: str) -> None:
+        name = "mkcommit_duration_seconds"
+        for le in DURATION_BUCKETS:
+            if seconds <= le:
+                self.inc(f"{name}_bucket", le=_format_le(le), **labels)
+            else:
+                # every bucket of the run is written, so buckets exist before they are hit
+                self.inc(f"{name}_bucket", 0.0, le=_format_le(le), **labels)
+        self.inc(f"{name}_sum", seconds, **labels)
+        self.inc(f"{name}_count", **labels)
+
+    def flush(self) -> None:
+        """Adds the recorded values to the file"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with _locked(self.path + ".lock"):
+            totals: Dict[Series, float] = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    totals = parse(f.read())
+            for key, value in self.series.items():
+                totals[key] = totals.get(key, 0.0) + value
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                f.write(render(totals))
+            os.replace(tmp, self.path)
+        self.series.clear()
+
+
+@contextmanager
+def _locked(lock_path: str) -> Iterator[None]:
+    with open(lock_path, "a") as lock:
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+_recorder: Optional[Recorder] = None
+
+
+def start(path: Optional[str] = None) -> Optional[Recorder]:
+    """Turns metrics on if `path` or `$MKCOMMIT_METRICS_FILE` is set"""
+    global _recorder
+    path = path or os.environ.get(METRICS_FILE_ENV)
+    _recorder = Recorder(path) if path else None
+    return _recorder
+
+
+def finish(mode: str) -> None:
+    """Records the run as an invocation of `mode` and writes the metrics"""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is None:
+        return
+    recorder.inc("mkcommit_invocations_total", mode=mode)
+    recorder.observe_duration(time.perf_counter() - recorder.started, mode=mode)
+    try:
+        recorder.flush()
+    except OSError as e:  # metrics must never fail a commit
+        warnings.warn(f"Could not write metrics to {recorder.path}: {e}")
+
+
+def take() -> Dict[Series, float]:
+    """Removes and returns the values recorded so far, e.g. in a worker process"""
+    if _recorder is None:
+        return {}
+    series, _recorder.series = _recorder.series, {}
+    return series
+
+
+def merge(series: Dict[Series, float]) -> None:
+    """Adds values `take`n in a worker process to the run"""
+    if _recorder is not None:
+        for key, value in series.items():
+            _recorder.series[key] = _recorder.series.get(key, 0.0) + value
+
+
+def inc(name: str, **labels: str) -> None:
+    if _recorder is not None:
+        _recorder.inc(name, **labels)
+
+
+@contextmanager
+def outcome(check: str) -> Iterator[None]:
+    """Counts the enclosed validation as passed, or failed if it raises
+    `ValidationFailedException`"""
+    if _recorder is None:
+        yield
+        return
+    try:
+        yield
+    except ValidationFailedException:
+        inc("mkcommit_validations_total", check=check, result="fail")
+        raise
+    inc("mkcommit_validations_total", check=check, result="pass")
+
+
+def counted(check: str) -> Callable[[F], F]:
+    """Decorator counting the outcomes of a check function, see `outcome`"""
+    def decorator(func: F) -> F:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _recorder is None:
+                return func(*args, **kwargs)
+            with outcome(check):
+                return func(*args, **kwargs)
+        return wrapper  # type: ignore
+    return decorator
@@ -1,14 +1,14 @@
 from __future__ import annotations
-import subprocess
 from typing import Any, Callable, List, Optional, Tuple, TypeVar
-from InquirerPy import inquirer
 from dataclasses import dataclass
-from prettyprinter import pprint
 
 import platform
 
-if platform.system() == "Windows":
-    from prompt_toolkit.output.win32 import NoConsoleScreenBufferError
+from mkcommit import trace
+from mkcommit.git import get_client, split_command
+
+# `InquirerPy`, `prompt_toolkit` and `prettyprinter` are imported inside the
+# prompt functions, so validation-only runs (hook mode) never pay for them.
 
 
 class QuestionConflictException(Exception):
@@ -35,6 +35,10 @@ class ValidationFailedException(Exception):
     pass
 
 
+class MalformedHeaderException(ValidationFailedException):
+    pass
+
+
 class InvalidStateException(Exception):
     pass
 
@@ -53,12 +57,8 @@ MODULE_SHIM = "mkcommit.loaded_config"
 
 
 def git_command(*args):
-    return subprocess.run(
-        " ".join(args),
-        check=True,
-        shell=True,
-        capture_output=True
-    ).stdout.decode("utf-8").strip()
+    """Runs a git command, e.g. `git_command("git", "rev-parse", "HEAD")`, and returns its output"""
+    return get_client().output(*split_command(args))
 
 
 @dataclass(init=False)
@@ -103,9 +103,8 @@ class Author:
 
     @classmethod
     def from_git(cls) -> Author:
-        name = git_command("git", "config", "--get", "user.name")
-        email = git_command("git", "config", "--get", "user.email")
-        return cls(name, email)
+        client = get_client()
+        return cls(client.config("user.name", ""), client.config("user.email", ""))
 
 
 Question = str
@@ -115,14 +114,19 @@ T = TypeVar("T")
 Rule = Callable[[str], T]
 CommitFunc = Callable[[], CommitMessage]
 OnCommitFunc = Callable[[CommitMessage], None]
+Completion = Callable[[str], List[str]]  # suggestions for the text typed so far
 
 
+@trace.traced("prompt")
 def select(question: str, one_of: List[Any]):
+    from InquirerPy import inquirer
     inquirer_exec = lambda: inquirer.select(question, one_of).execute()
     if platform.system() == "Windows":
+        from prompt_toolkit.output.win32 import NoConsoleScreenBufferError
         try:
             return inquirer_exec()
         except NoConsoleScreenBufferError:
+            from prettyprinter import pprint
             print(question)
             pprint([str(i) + " - " + str(j) for i, j in enumerate(one_of)])
             print("\n")
@@ -131,12 +135,16 @@ def select(question: str, one_of: List[Any]):
         return inquirer_exec()
 
 
+@trace.traced("prompt")
 def checkbox(question: str, one_or_more: List[Any]):
+    from InquirerPy import inquirer
     inquirer_exec = lambda: inquirer.checkbox(question, one_or_more).execute()
     if platform.system() == "Windows":
+        from prompt_toolkit.output.win32 import NoConsoleScreenBufferError
         try:
             return inquirer_exec()
         except NoConsoleScreenBufferError:
+            from prettyprinter import pprint
             print(question)
             pprint([str(i) + " - " + str(j) for i, j in enumerate(one_or_more)])
             print("\n")
@@ -146,9 +154,12 @@ def checkbox(question: str, one_or_more: List[Any]):
         return inquirer_exec()
 
 
+@trace.traced("prompt")
 def confirm(question: str):
+    from InquirerPy import inquirer
     inquirer_exec = lambda: inquirer.confirm(question).execute()
     if platform.system() == "Windows":
+        from prompt_toolkit.output.win32 import NoConsoleScreenBufferError
         try:
             return inquirer_exec()
         except NoConsoleScreenBufferError:
@@ -164,11 +175,26 @@ def confirm(question: str):
         return inquirer_exec()
 
 
-def text(question: str):
-    inquirer_exec = lambda: inquirer.text(question).execute()
+def _completer(complete: Completion):
+    from prompt_toolkit.completion import Completer, Completion as PromptCompletion
+
+    class _Completer(Completer):
+        def get_completions(self, document, complete_event):
+            typed = document.text_before_cursor
+            for suggestion in complete(typed):
+                yield PromptCompletion(suggestion, start_position=-len(typed))
+    return _Completer()
+
+
+@trace.traced("prompt")
+def text(question: str, complete: Optional[Completion] = None):
+    from InquirerPy import inquirer
+    completer = None if complete is None else _completer(complete)
+    inquirer_exec = lambda: inquirer.text(question, completer=completer).execute()
     if platform.system() == "Windows":
+        from prompt_toolkit.output.win32 import NoConsoleScreenBufferError
         try:
-            return inquirer.text(question).execute()
+            return inquirer_exec()
         except NoConsoleScreenBufferError:
             print(question)
             print("\n")
@@ -182,7 +208,8 @@ def ask(
     one_of: Optional[List[Any]] = None,
     one_or_more: Optional[List[Any]] = None,
     yes_no: bool = False,
-    check: Optional[Validator] = None
+    check: Optional[Validator] = None,
+    complete: Optional[Completion] = None
 ) -> Any:
 
     result = None
@@ -215,7 +242,7 @@ def ask(
             )
         result: Any = confirm(question)
     if not stepped_in_flag:
-        result: Any = text(question)
+        result: Any = text(question, complete)
 
     # WARNING: do not refactor as `if result`, will fail!!!
     if result is not None:
@@ -1,26 +1,33 @@
 import importlib.util
 import inspect
 import sys
+from types import ModuleType
 from typing import Optional
 
 from mkcommit.model import (
     PRE_COMMIT_FUNC_NAME, CommitFunc, CommitMessage, FailedToFindCommitMessageException,
     ModuleLoaderException, COMMIT_FUNC_NAME, MODULE_SHIM, OnCommitFunc
 )
+from mkcommit.register import DEFAULT_NAME, INDEX_ATTR, ConfigIndex
 
 
-def load_module(file: str):
+def load_module(file: str, name: str = MODULE_SHIM) -> ModuleType:
     """Loads module from filepath using `importlib`
 
     Args:
         file (str): path to a Python file, intended to use with `.mkcommit.py` files
+        name (str): module name to install the module under in `sys.modules`;
+            anything other than `MODULE_SHIM` leaves the active config untouched
+
+    Returns:
+        ModuleType: the loaded module, also installed as `sys.modules[name]`
 
     Raises:
         ModuleLoaderException: if the loader didn't instantiate for module spec
         ModuleLoaderException: if the module cannot be loaded for any other reason
     """
     spec = importlib.util.spec_from_file_location(
-        MODULE_SHIM,
+        name,
         file
     )
 
@@ -28,34 +35,82 @@ def load_module(file: str):
         cfg_module = importlib.util.module_from_spec(spec)
         if spec.loader:
             getattr(spec.loader, "exec_module")(cfg_module)
+            build_index(cfg_module)
         else:
             raise ModuleLoaderException(
                 f"Loaded module ({file}) spec does not have a valid loader"
             )
-        sys.modules[MODULE_SHIM] = cfg_module
+        sys.modules[name] = cfg_module
+        return cfg_module
     else:
         raise ModuleLoaderException(f"Could not load module located at {file}")
 
 
-def get_commit_msg_func_from_module() -> Optional[CommitFunc]:
-    for _, obj in inspect.getmembers(sys.modules[MODULE_SHIM]):
-        if inspect.isfunction(obj) and obj.__name__ == COMMIT_FUNC_NAME:
-            return obj
+def build_index(module: ModuleType) -> ConfigIndex:
+    """Indexes the commit templates and hooks of a loaded config
+
+    Functions registered through `mkcommit.register` come first. Functions
+    named `commit`/`on_commit` are added under the default name when nothing
+    else claimed it, so configs written before the registration API keep working.
+
+    Args:
+        module (ModuleType): the loaded config
 
+    Returns:
+        ConfigIndex: the index, also stored on the module
+    """
+    namespace = vars(module)
+    index = namespace.get(INDEX_ATTR)
+    if not isinstance(index, ConfigIndex):
+        index = ConfigIndex()
+        setattr(module, INDEX_ATTR, index)
+    commit_func = namespace.get(COMMIT_FUNC_NAME)
+    if inspect.isfunction(commit_func) and DEFAULT_NAME not in index.commits:
+        index.commits[DEFAULT_NAME] = commit_func
+    on_commit_func = namespace.get(PRE_COMMIT_FUNC_NAME)
+    if inspect.isfunction(on_commit_func) and DEFAULT_NAME not in index.on_commits:
+        index.on_commits[DEFAULT_NAME] = on_commit_func
+    return index
+
+
+def get_index(module: Optional[ModuleType] = None) -> ConfigIndex:
+    module = module or sys.modules[MODULE_SHIM]
+    index = vars(module).get(INDEX_ATTR)
+    if isinstance(index, ConfigIndex):
+        return index
+    return build_index(module)
+
+
+def get_commit_msg_func_from_module(
+    module: Optional[ModuleType] = None,
+    name: Optional[str] = None
+) -> Optional[CommitFunc]:
+    return get_index(module).commit_func(name)
+
+
+def get_commit_msg_from_module(
+    module: Optional[ModuleType] = None,
+    name: Optional[str] = None
+) -> Optional[CommitMessage]:
+    """Finds the commit template of the module and builds the `CommitMessage`
 
-def get_commit_msg_from_module() -> Optional[CommitMessage]:
-    """Inspects the module and finds the `CommitMessage` instance
+    Args:
+        module (Optional[ModuleType]): loaded config, defaults to `sys.modules[MODULE_SHIM]`
+        name (Optional[str]): name of the template, the default one if `None`
 
     Returns:
         CommitMessage: the `CommitMessage` object
     """
-    commit_message_instance: Optional[CommitMessage] = None
-    for _, obj in inspect.getmembers(sys.modules[MODULE_SHIM]):
-        if isinstance(obj, CommitMessage):
-            commit_message_instance = obj
-        elif inspect.isfunction(obj) and obj.__name__ == COMMIT_FUNC_NAME:
-            commit_message_instance = obj()
-    return commit_message_instance
+    module = module or sys.modules[MODULE_SHIM]
+    commit_func = get_commit_msg_func_from_module(module, name)
+    if commit_func is not None:
+        return commit_func()
+    if name is None:
+        # configs may also declare a ready-made `CommitMessage` instance
+        for obj in vars(module).values():
+            if isinstance(obj, CommitMessage):
+                return obj
+    return None
 
 
 def check_commit_msg_exists(
@@ -84,8 +139,8 @@ def check_commit_msg_exists(
         return commit_message_instance
 
 
-def get_on_commit_func_from_module() -> Optional[OnCommitFunc]:
-    module = sys.modules[MODULE_SHIM]
-    for _, obj in inspect.getmembers(module):
-        if inspect.isfunction(obj) and obj.__name__ == PRE_COMMIT_FUNC_NAME:
-            return obj
+def get_on_commit_func_from_module(
+    module: Optional[ModuleType] = None,
+    name: Optional[str] = None
+) -> Optional[OnCommitFunc]:
+    return get_index(module).on_commit_func(name)
@@ -0,0 +1,152 @@
+"""Server-side enforcement, run as a `pre-receive` hook: `mkcommit pre-receive`.
+
+git feeds the hook one `<old> <new> <ref>` line per updated ref. Only the
+commits that are new to the repository (`git rev-list <new>... --not --all`)
+are validated, so a push of an already known branch costs nothing.
+
+Only a config on the server, given as `file` (e.g. `mkcommit pre-receive -f
+/srv/mkcommit.py`), is ever executed. A config taken from the repository is
+accepted only if it compiles to a rule artifact (see `mkcommit.compiler`): its
+built-in checks are read from the source without running it, and a push is
+rejected when the config it would be validated with doesn't compile. Without
+`file`, the config is:
+
+* with `pushed_config`, the config in each pushed tip; a tip without one is
+  validated with the config of `HEAD`, so deleting the config doesn't turn
+  the checks off;
+* otherwise the config checked into the repository's `HEAD` before the push,
+  so a push can't change the rules it is validated with.
+
+Without a config, nothing is checked.
+"""
+from collections import defaultdict
+from contextlib import closing
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from mkcommit.compiler import NotCompilableException, compile_source, run_rules
+from mkcommit.config_registry import file_digest
+from mkcommit.git import GitClient
+from mkcommit.history import iter_history
+from mkcommit.lint import LintFailure, lint_commits
+from mkcommit.model import MODULE_SHIM, FailedToFindCommitMessageException, OnCommitFunc
+from mkcommit.module_utils import get_on_commit_func_from_module, load_module
+
+DEFAULT_CONFIG_PATH = ".mkcommit.py"
+
+
+class RefUpdate(NamedTuple):
+    old: str
+    new: str
+    ref: str
+
+    @property
+    def is_deletion(self) -> bool:
+        return set(self.new) == {"0"}
+
+
+def parse_updates(stream: TextIO) -> List[RefUpdate]:
+    updates = []
+    for line in stream:
+        if line.strip():
+            old, new, ref = line.split()
+            updates.append(RefUpdate(old, new, ref))
+    return updates
+
+
+def _config_blob(rev: str, config_path: str, client: GitClient) -> Optional[str]:
+    result = client.run("rev-parse", "--verify", "--quiet", f"{rev}:{config_path}", check=False)
+    return result.stdout.decode("ascii").strip() if result.returncode == 0 else None
+
+
+def _server_hook(file: str, template: Optional[str]) -> OnCommitFunc:
+    """The hook of the config on the server, the only config that is executed"""
+    module = load_module(file, f"{MODULE_SHIM}_{file_digest(file)[:16]}")
+    on_commit = get_on_commit_func_from_module(module, template) or \
+        get_on_commit_func_from_module(module)
+    if on_commit is None:
+        raise FailedToFindCommitMessageException(
+            f"The config ({file}) doesn't declare an `on_commit` function"
+        )
+    return on_commit
+
+
+def _compiled_hook(blob: str, origin: str, client: GitClient) -> OnCommitFunc:
+    """The compiled rules of a config of the repository, which is never executed"""
+    try:
+        rules = compile_source(client.run("cat-file", "blob", blob).stdout)["rules"]
+    except NotCompilableException as e:
+        raise NotCompilableException(
+            f"The config {origin} may only call built-in checks: {e}"
+        ) from e
+    return partial(run_rules, rules)
+
+
+def check_updates(
+    updates: Iterable[RefUpdate],
+    config_path: str = DEFAULT_CONFIG_PATH,
+    template: Optional[str] = None,
+    jobs: Optional[int] = None,
+    fail_fast: bool = False,
+    cwd: Optional[str] = None,
+    file: Optional[str] = None,
+    pushed_config: bool = False
+) -> Iterator[LintFailure]:
+    """Validates the commits a push introduces
+
+    Args:
+        updates (Iterable[RefUpdate]): the ref updates of the push
+        config_path (str): path of the config within the tree of `HEAD`, and of
+            the pushed tips with `pushed_config`
+        template (Optional[str]): name of the registered hook of `file` to validate with
+        jobs (Optional[int]): number of worker processes, all CPUs if `None`
+        fail_fast (bool): stop at the first failure
+        cwd (Optional[str]): the repository receiving the push
+        file (Optional[str]): config on the server, takes precedence over any tree
+        pushed_config (bool): validate with the compiled config of each pushed tip
+
+    Raises:
+        NotCompilableException: if a config of the repository doesn't compile,
+            before any commit is validated
+        ValueError: if `template` is given without `file`, compiled configs
+            only have the default hook
+
+    Yields:
+        LintFailure: the commits that failed validation
+    """
+    if file is None and template is not None:
+        raise ValueError("Configs of the repository are compiled and only have the "
+                         "default hook, `template` needs a config on the server")
+    client = GitClient(cwd)
+    tips = [u.new for u in updates if not u.is_deletion]
+    if not tips:
+        return
+    # refs sharing a config are checked together, so shared commits are read once
+    groups: List[Tuple[OnCommitFunc, List[str]]] = []
+    if file is not None:
+        groups.append((_server_hook(file, template), tips))
+    else:
+        trusted = _config_blob("HEAD", config_path, client)
+        by_config: Dict[str, List[str]] = defaultdict(list)
+        origins: Dict[str, str] = {}
+        for tip in tips:
+            blob = _config_blob(tip, config_path, client) if pushed_config else None
+            if blob is not None:
+                origins.setdefault(blob, f"pushed in {tip}")
+            else:
+                blob = trusted  # no config pushed, the one of `HEAD` still applies
+                if blob is None:
+                    continue
+                origins.setdefault(blob, "in HEAD")
+            by_config[blob].append(tip)
+        for blob, blob_tips in by_config.items():
+            groups.append((_compiled_hook(blob, origins[blob], client), blob_tips))
+
+    for on_commit, group_tips in groups:
+        new_commits = iter_history(group_tips + ["--not", "--all"], cwd)
+        # closing stops the pool and `git` early on `fail_fast`
+        with closing(lint_commits(on_commit, new_commits, jobs)) as failures:
+            for failure in failures:
+                yield failure
+                if fail_fast:
+                    return
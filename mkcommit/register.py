@@ -0,0 +1,77 @@
+"""Explicit registration of commit templates and hooks.
+
+Config files can register their functions instead of relying on the
+`commit`/`on_commit` naming convention, and may declare several named
+templates in one file::
+
+    from mkcommit import CommitMessage, register
+    from mkcommit.suites import conventional
+
+    @register.commit("feature")
+    def feature():
+        return CommitMessage(*conventional.default())
+
+    @register.on_commit()
+    def check(msg: CommitMessage):
+        conventional.is_conventional(msg.first_line)
+
+Select a template with `mkcommit -t feature`. Registration writes into an
+index stored in the config module's globals, so lookups after loading are
+plain dictionary accesses.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from mkcommit.model import CommitFunc, OnCommitFunc
+
+INDEX_ATTR = "__mkcommit_index__"
+DEFAULT_NAME = "default"
+
+F = TypeVar("F", bound=Callable)
+
+
+def _resolve(registered: Dict[str, F], name: Optional[str]) -> Optional[F]:
+    if name is not None:
+        return registered.get(name)
+    if DEFAULT_NAME in registered:
+        return registered[DEFAULT_NAME]
+    # dicts keep insertion order, i.e. the first function registered in the file
+    return next(iter(registered.values()), None)
+
+
+@dataclass
+class ConfigIndex:
+    commits: Dict[str, CommitFunc] = field(default_factory=dict)
+    on_commits: Dict[str, OnCommitFunc] = field(default_factory=dict)
+    # local copies of the configs this config includes, directly or not
+    includes: List[str] = field(default_factory=list)
+
+    def commit_func(self, name: Optional[str] = None) -> Optional[CommitFunc]:
+        """The template called `name`, or the default one when `name` is `None`"""
+        return _resolve(self.commits, name)
+
+    def on_commit_func(self, name: Optional[str] = None) -> Optional[OnCommitFunc]:
+        """The hook called `name`, or the default one when `name` is `None`"""
+        return _resolve(self.on_commits, name)
+
+
+def _index_of(func: Callable) -> ConfigIndex:
+    # `__globals__` is the namespace of the module being executed, so this
+    # works while the config is still loading
+    return func.__globals__.setdefault(INDEX_ATTR, ConfigIndex())
+
+
+def commit(name: str = DEFAULT_NAME) -> Callable[[F], F]:
+    """Registers a function returning a `CommitMessage` as a named template"""
+    def decorator(func: F) -> F:
+        _index_of(func).commits[name] = func
+        return func
+    return decorator
+
+
+def on_commit(name: str = DEFAULT_NAME) -> Callable[[F], F]:
+    """Registers a function validating a `CommitMessage` as a named hook"""
+    def decorator(func: F) -> F:
+        _index_of(func).on_commits[name] = func
+        return func
+    return decorator
@@ -0,0 +1,242 @@
+"""Declarative validation rules.
+
+Instead of a hand-written series of checks in `on_commit`, a config can
+declare its rules, each with a severity, and let a `RuleSet` run them::
+
+    from mkcommit import CommitMessage
+    from mkcommit.rules import RuleSet, Severity, body_line_length, header_grammar, \\
+        required_trailers, subject_length
+    from mkcommit.suites import conventional
+
+    RULES = RuleSet(
+        header_grammar("conventional"),
+        subject_length(),
+        body_line_length(72, severity=Severity.WARNING),
+        required_trailers("Refs"),
+    )
+
+    def commit():
+        first_line, body = conventional.default()
+        return CommitMessage(first_line, body, validate=RULES.validate)
+
+    on_commit = RULES.hook()
+
+Rules run cheapest first, whatever the order they are declared in. With
+`fail_fast`, a set stops at the first error; otherwise it reports every
+finding. Hook mode, `--hook-stdin`, `mkcommit lint` and `check_commits` all
+call the same `RuleSet.run`, so a message gets the same findings everywhere.
+"""
+import sys
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from mkcommit import metrics
+from mkcommit.batch import Reason, conventional_check, semantic_check, technica_check
+from mkcommit.history import CommitRecord
+from mkcommit.model import CommitMessage, OnCommitFunc, ValidationFailedException
+from mkcommit.suites import semantic
+from mkcommit import trailers
+
+# relative costs, rules run in ascending order
+COST_SUBJECT_LENGTH = 10
+COST_HEADER_GRAMMAR = 20
+COST_BODY_LINE_LENGTH = 30
+COST_REQUIRED_TRAILERS = 40
+COST_CUSTOM = 100
+
+BODY_MAX_LINE_LEN = 72
+
+_GRAMMARS = {
+    "semantic": semantic_check,
+    "conventional": conventional_check,
+    "technica": technica_check,
+}
+
+_REASONS = {
+    Reason.MALFORMED_HEADER: "The header should look like `type(scope): subject`",
+    Reason.UNKNOWN_KEYWORD: "The header uses an unknown type",
+    Reason.MULTIPLE_TYPES: "The header should have a single type",
+    Reason.BAD_INITIALS: "The initials should be 2 letters of the first name "
+                         "and 2 letters of the last name, e.g. `KrCz`",
+    Reason.BAD_TICKET: "The ticket should look like `PROJ-123`",
+}
+
+Problem = Optional[str]  # what is wrong with the message, `None` if nothing
+
+
+class Severity(IntEnum):
+    INFO = 0
+    WARNING = 1
+    ERROR = 2
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    check: Callable[[CommitMessage], Problem]
+    severity: Severity = Severity.ERROR
+    cost: int = COST_CUSTOM
+
+
+@dataclass(frozen=True)
+class Finding:
+    rule: str
+    severity: Severity
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.severity.name.lower()}: {self.message} [{self.rule}]"
+
+
+def header_grammar(
+    style: str = "semantic",
+    severity: Severity = Severity.ERROR,
+    **options
+) -> Rule:
+    """The header follows one of the built-in suites: `semantic`, `conventional`
+    or `technica`, with the options of the matching `mkcommit.batch` check"""
+    if style not in _GRAMMARS:
+        raise ValueError(f"Unknown header style `{style}`, expected one of {sorted(_GRAMMARS)}")
+    batch_check = _GRAMMARS[style](**options)
+
+    def _check(msg: CommitMessage) -> Problem:
+        reason = batch_check(msg.first_line)
+        if reason == Reason.OK:
+            return None
+        return f"{_REASONS.get(reason, reason.name)}, was `{msg.first_line}`"
+    return Rule(f"header-grammar:{style}", _check, severity, COST_HEADER_GRAMMAR)
+
+
+def subject_length(
+    limit: int = semantic.SUBJECT_MAX_LEN,
+    severity: Severity = Severity.ERROR
+) -> Rule:
+    """The subject (after the colon) is shorter than `limit` characters,
+    or the whole header is if it has no colon"""
+    def _check(msg: CommitMessage) -> Problem:
+        try:
+            subject = semantic._description(msg.first_line)
+        except ValidationFailedException:
+            subject = msg.first_line
+        if subject is None:
+            return None
+        length = len(subject.strip())
+        if length < limit:
+            return None
+        return f"The subject should be shorter than {limit} characters, was {length}"
+    return Rule("subject-length", _check, severity, COST_SUBJECT_LENGTH)
+
+
+def body_line_length(
+    limit: int = BODY_MAX_LINE_LEN,
+    severity: Severity = Severity.ERROR
+) -> Rule:
+    """No line of the body is longer than `limit` characters, comments excepted"""
+    def _check(msg: CommitMessage) -> Problem:
+        for number, line in enumerate(msg.body.split("\n"), 1):
+            if len(line) > limit and not line.startswith(trailers.COMMENT_CHAR):
+                return f"Line {number} of the body is {len(line)} characters long, " \
+                    f"the limit is {limit}"
+        return None
+    return Rule("body-line-length", _check, severity, COST_BODY_LINE_LENGTH)
+
+
+def required_trailers(*keys: str, severity: Severity = Severity.ERROR) -> Rule:
+    """The trailer block of the body has every trailer in `keys`, e.g. `Refs`"""
+    def _check(msg: CommitMessage) -> Problem:
+        present = {t.key.lower() for t in trailers.parse(msg.body).trailers}
+        missing = [k for k in keys if k.lower() not in present]
+        if not missing:
+            return None
+        return f"Missing trailer(s): {', '.join(missing)}"
+    return Rule("required-trailers", _check, severity, COST_REQUIRED_TRAILERS)
+
+
+def custom(
+    func: Callable[[CommitMessage], bool],
+    name: Optional[str] = None,
+    severity: Severity = Severity.ERROR,
+    cost: int = COST_CUSTOM
+) -> Rule:
+    """Wraps a check of the config: it fails by returning `False` or by raising
+    `ValidationFailedException`, whose message becomes the finding"""
+    def _check(msg: CommitMessage) -> Problem:
+        try:
+            if func(msg) is not False:
+                return None
+        except ValidationFailedException as e:
+            return str(e)
+        return (func.__doc__ or "").strip() or f"{func.__name__} failed"
+    return Rule(name or func.__name__, _check, severity, cost)
+
+
+class RuleSet:
+    """Rules of a config, sorted by cost; rules of equal cost keep their order.
+    `validate` prints the findings other than errors to `output`, standard
+    error if `None`"""
+
+    def __init__(
+        self,
+        *rules: Rule,
+        fail_fast: bool = False,
+        output: Optional[TextIO] = None
+    ):
+        self.rules = sorted(rules, key=lambda r: r.cost)
+        self.fail_fast = fail_fast
+        self.output = output
+
+    def run(self, msg: CommitMessage, fail_fast: Optional[bool] = None) -> List[Finding]:
+        """Checks `msg` against the rules
+
+        Args:
+            msg (CommitMessage): the message to check
+            fail_fast (Optional[bool]): stop at the first error, the set's default if `None`
+
+        Returns:
+            List[Finding]: the findings, in the order the rules ran
+        """
+        fail_fast = self.fail_fast if fail_fast is None else fail_fast
+        findings = []
+        for rule in self.rules:
+            problem = rule.check(msg)
+            if problem is None:
+                continue
+            findings.append(Finding(rule.name, rule.severity, problem))
+            if fail_fast and rule.severity == Severity.ERROR:
+                break
+        return findings
+
+    @metrics.counted("rules.validate")
+    def validate(self, msg: CommitMessage) -> bool:
+        """Raises on errors and prints the other findings, every time,
+        usable as `CommitMessage.validate`
+
+        Raises:
+            ValidationFailedException: listing every error found
+        """
+        findings = self.run(msg)
+        errors = [f for f in findings if f.severity == Severity.ERROR]
+        output = self.output or sys.stderr
+        for finding in findings:
+            if finding.severity != Severity.ERROR:
+                print(finding, file=output)
+        if errors:
+            raise ValidationFailedException("\n".join(str(f) for f in errors))
+        return True
+
+    def hook(self) -> OnCommitFunc:
+        """An `on_commit` function validating with this set"""
+        def on_commit(msg: CommitMessage) -> None:
+            self.validate(msg)
+        return on_commit
+
+    def check_commits(
+        self,
+        commits: Iterable[CommitRecord],
+        fail_fast: Optional[bool] = None
+    ) -> Iterator[Tuple[str, List[Finding]]]:
+        """Yields the SHA and the findings of every commit, e.g. of
+        `iter_history("origin/main..HEAD")`"""
+        for commit in commits:
+            yield commit.sha, self.run(CommitMessage(commit.header, commit.body), fail_fast)
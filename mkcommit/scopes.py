@@ -0,0 +1,255 @@
+"""Scopes used in the history of a repository, for completing the scope prompt.
+
+Scopes are read from the headers of all commits reachable from `HEAD` and
+counted in a prefix trie. The trie is saved next to the lint cache, in
+`<git-dir>/mkcommit/scopes.json`, with the tips it was built from; the next
+run only reads the commits added since, so building it is paid once per
+repository. Tips reachable from other tips are dropped, they add nothing
+to what is excluded, and so are tips no ref reaches anymore (amended,
+rebased or deleted branches). Their commits stay counted: once `MAX_TIPS`
+tips are tracked, the index is built again from scratch instead of
+forgetting tips, whose history would then be counted twice::
+
+    >>> index = ScopeIndex()
+    >>> for scope in ["core", "core", "cli", "docs", "config"]:
+    ...     index.add(scope)
+    >>> index.complete("c")
+    ['core', 'cli', 'config']
+    >>> index.suggest("cf")
+    ['config']
+
+`suggest` lists the scopes starting with the typed text first, then the
+ones containing its characters in order, most used first. Fuzzy matches
+are looked for among the `FUZZY_MAX` most used scopes, which keeps every
+lookup within a few milliseconds however large the history is.
+"""
+import bisect
+import heapq
+import json
+import os
+import re
+import subprocess
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from mkcommit.git import GitClient
+from mkcommit.header import parse_header
+from mkcommit.history import iter_history
+from mkcommit.lint_cache import default_cache_dir
+from mkcommit.model import MalformedHeaderException
+
+INDEX_FORMAT = 1
+INDEX_FILE_NAME = "scopes.json"
+MAX_TIPS = 32  # tips tracked before the index is built again
+DEFAULT_LIMIT = 10
+FUZZY_MAX = 4096  # fuzzy matches are looked for among the most used scopes only
+_SCAN_THRESHOLD = 512
+
+
+class _Node:
+    __slots__ = ("children", "count")
+
+    def __init__(self):
+        self.children: Dict[str, _Node] = {}
+        self.count = 0  # uses of the scope ending at this node
+
+    def to_list(self) -> list:
+        return [self.count, {c: n.to_list() for c, n in self.children.items()}]
+
+    @classmethod
+    def from_list(cls, data: list) -> "_Node":
+        node = cls()
+        node.count = data[0]
+        node.children = {c: cls.from_list(child) for c, child in data[1].items()}
+        return node
+
+
+def scopes_of(header: str) -> Tuple[str, ...]:
+    """Scopes of a header of any built-in suite, none if it doesn't parse"""
+    for with_preamble in (False, True):
+        try:
+            return parse_header(header, with_preamble=with_preamble).scopes
+        except MalformedHeaderException:
+            continue
+    return ()
+
+
+class ScopeIndex:
+
+    def __init__(self):
+        self.tips: List[str] = []
+        self._root = _Node()
+        # derived from the trie on the first lookup after a change
+        self._ranked: Optional[List[Tuple[str, int]]] = None
+        self._sorted: List[Tuple[str, int]] = []
+        self._names: List[str] = []
+
+    def add(self, scope: str, count: int = 1) -> None:
+        node = self._root
+        for char in scope:
+            node = node.children.setdefault(char, _Node())
+        node.count += count
+        self._ranked = None
+
+    def _find(self, prefix: str) -> Optional[_Node]:
+        node = self._root
+        for char in prefix:
+            child = node.children.get(char)
+            if child is None:
+                return None
+            node = child
+        return node
+
+    def count(self, scope: str) -> int:
+        node = self._find(scope)
+        return 0 if node is None else node.count
+
+    def items(self, prefix: str = "") -> Iterable[Tuple[str, int]]:
+        """Every scope starting with `prefix`, with its number of uses"""
+        start = self._find(prefix)
+        if start is None:
+            return
+        stack = [(prefix, start)]
+        while stack:
+            scope, node = stack.pop()
+            if node.count:
+                yield scope, node.count
+            stack.extend((scope + c, child) for c, child in node.children.items())
+
+    def __len__(self) -> int:
+        return len(self.ranked())
+
+    def ranked(self) -> List[Tuple[str, int]]:
+        """All scopes, most used first"""
+        if self._ranked is None:
+            self._ranked = sorted(self.items(), key=lambda sc: (-sc[1], sc[0]))
+            self._sorted = sorted(self._ranked)
+            self._names = [s for s, _ in self._sorted]
+        return self._ranked
+
+    def complete(self, prefix: str, limit: int = DEFAULT_LIMIT) -> List[str]:
+        """The most used scopes starting with `prefix`"""
+        ranked = self.ranked()
+        if not prefix:
+            return [s for s, _ in ranked[:limit]]
+        # the scopes starting with `prefix` are contiguous in name order
+        first = bisect.bisect_left(self._names, prefix)
+        last = bisect.bisect_left(self._names, prefix + "\U0010ffff", first)
+        if last - first > _SCAN_THRESHOLD:
+            # so many match that the most used ones come early in `ranked`
+            found = []
+            for scope, _ in ranked:
+                if scope.startswith(prefix):
+                    found.append(scope)
+                    if len(found) == limit:
+                        break
+            return found
+        best = heapq.nsmallest(
+            limit, self._sorted[first:last], key=lambda sc: (-sc[1], sc[0])
+        )
+        return [s for s, _ in best]
+
+    def suggest(self, text: str, limit: int = DEFAULT_LIMIT) -> List[str]:
+        """Prefix completions of `text`, then fuzzy matches: scopes holding the
+        characters of `text` in the same order, ignoring case"""
+        found = self.complete(text, limit)
+        if len(found) >= limit or not text:
+            return found
+        # `[^c]*c` only matches up to the next `c`, a scope is never backtracked over
+        pattern = re.compile(
+            "".join(f"[^{c}]*{c}" for c in map(re.escape, text)), re.IGNORECASE
+        )
+        seen = set(found)
+        for scope, _ in self.ranked()[:FUZZY_MAX]:
+            if scope not in seen and pattern.match(scope):
+                found.append(scope)
+                if len(found) == limit:
+                    break
+        return found
+
+    def update(self, cwd: Optional[str] = None) -> int:
+        """Indexes the commits reachable from `HEAD` that aren't indexed yet
+
+        Returns:
+            int: the number of commits read
+        """
+        client = GitClient(cwd)
+        result = client.run("rev-parse", "--verify", "--quiet", "HEAD", check=False)
+        head = result.stdout.decode("ascii").strip() if result.returncode == 0 else ""
+        if not head or head in self.tips:
+            return 0  # an empty repository, or nothing new
+        if self.tips:
+            # tips no ref reaches anymore are listed by `rev-list`, with their
+            # own unreachable history only
+            unreachable = set(client.output("rev-list", *self.tips, "--not", "--all").split())
+            self.tips = [t for t in self.tips if t not in unreachable]
+        if len(self.tips) >= MAX_TIPS:
+            self.clear()
+        read = 0
+        for commit in iter_history([head, "--not"] + self.tips, cwd):
+            for scope in scopes_of(commit.header):
+                self.add(scope)
+            read += 1
+        # every tip is kept, a dropped one would have its history counted again
+        # once it is reachable from a new tip; only tips reachable from others go
+        tips = [head] + self.tips
+        if len(tips) > 1:
+            independent = set(client.output("merge-base", "--independent", *tips).split())
+            tips = [t for t in tips if t in independent]
+        self.tips = tips
+        return read
+
+    def clear(self) -> None:
+        self.tips = []
+        self._root = _Node()
+        self._ranked = None
+
+    def to_dict(self) -> dict:
+        return {"format": INDEX_FORMAT, "tips": self.tips, "trie": self._root.to_list()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScopeIndex":
+        if data.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported scope index format {data.get('format')}")
+        index = cls()
+        index.tips = list(data["tips"])
+        index._root = _Node.from_list(data["trie"])
+        return index
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+
+def index_path(cwd: Optional[str] = None) -> str:
+    return os.path.join(default_cache_dir(cwd), INDEX_FILE_NAME)
+
+
+def load_index(cwd: Optional[str] = None) -> ScopeIndex:
+    """The saved index of the repository in `cwd`, brought up to date with `HEAD`
+
+    Outside of a repository the index is empty. A corrupt index, or one
+    whose tips were garbage collected, is built again from scratch.
+    """
+    try:
+        path = index_path(cwd)
+    except subprocess.CalledProcessError:
+        return ScopeIndex()
+    index = ScopeIndex()
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                index = ScopeIndex.from_dict(json.load(f))
+        except (ValueError, KeyError, IndexError, TypeError):
+            index = ScopeIndex()
+    try:
+        read = index.update(cwd)
+    except subprocess.CalledProcessError:  # a tip doesn't exist anymore
+        index = ScopeIndex()
+        read = index.update(cwd)
+    if read:
+        index.save(path)
+    index.ranked()  # prepared here, off the prompt
+    return index
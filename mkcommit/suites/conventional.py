@@ -4,6 +4,7 @@ from mkcommit.model import ValidationFailedException, ask
 from mkcommit.blocks import Keyword
 from mkcommit.validators import matches
 from mkcommit.suites import semantic
+from mkcommit import metrics
 
 type_keywords = semantic.commit_keywords + [
     Keyword("perf", "A code change that improves performance"),
@@ -12,12 +13,16 @@ type_keywords = semantic.commit_keywords + [
 ]
 
 
+CONVENTIONAL_ERROR_MESSAGE = "The message is not a valid Conventional Commit"
+
+
+@metrics.counted("conventional.is_conventional")
 def is_conventional(s: str, allow_default_merge_msg: bool = True) -> bool:
     """Returns `true` if the message is a valid Conventional Commit"""
     return semantic._is_semantic_with_custom_keyword_set(
         type_keywords,
         allow_keywords_with_commas=False,
-        validation_error_message="The message is not a valid Conventional Commit"
+        validation_error_message=CONVENTIONAL_ERROR_MESSAGE
     )(s, allow_default_merge_msg)
 
 
@@ -38,7 +43,7 @@ ask_type = lambda: ask(
     one_of=type_keywords
 )
 
-ask_scope = lambda: ask(
+ask_scope = lambda: semantic._ask_scope(
     "What is the scope of this change (Optional)",
     check=is_word
 )
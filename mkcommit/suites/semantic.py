@@ -1,8 +1,13 @@
-from typing import Callable, List, Tuple
-from mkcommit.model import ValidationFailedException, ask, CommaSeparatedList
+from functools import lru_cache
+from typing import Callable, FrozenSet, List, Optional, Sequence, Tuple
+from mkcommit.model import (
+    MalformedHeaderException, ValidationFailedException, ask, CommaSeparatedList
+)
+from mkcommit.header import HeaderMatcher, parse_header
 from mkcommit.blocks import Keyword
-from mkcommit.validators import are_keywords_selected, matches, max_len
+from mkcommit.validators import are_keywords_selected, max_len
 from mkcommit.editor_handler import editor
+from mkcommit import context, metrics
 
 commit_keywords = [
     Keyword("feat", "A new feature"),
@@ -22,12 +27,69 @@ def is_shorter_than_55_chars(s: str) -> bool:
     return max_len(55)(s)
 
 
+def _keyword_key(keywords: Sequence[Keyword]) -> Tuple[str, ...]:
+    """Turns a keyword list into a hashable key for the matcher caches.
+
+    The key holds the keyword strings themselves, so extending or replacing
+    a suite's keyword list yields a new key and a freshly compiled matcher
+    on the next call.
+    """
+    return tuple(k.keyword for k in keywords)
+
+
+@lru_cache(maxsize=64)
+def _keyword_set(keywords: Tuple[str, ...]) -> FrozenSet[str]:
+    return frozenset(keywords)
+
+
+@lru_cache(maxsize=64)
+def _compile_header_matcher(
+    keywords: Tuple[str, ...],
+    allow_keywords_with_commas: bool,
+    allow_default_merge_msg: bool,
+    with_preamble: bool = False,
+    ticket_first: bool = False
+) -> HeaderMatcher:
+    """Builds the header matcher for a keyword set.
+
+    Args:
+        keywords (Tuple[str, ...]): keywords allowed in the header, see `_keyword_key`
+        allow_keywords_with_commas (bool): whether `feat, fix: ...` style headers are valid
+        allow_default_merge_msg (bool): whether `Merge branch ...` headers are valid
+        with_preamble (bool): whether a `[initials/ticket]` preamble is expected
+        ticket_first (bool): whether the preamble reads `[ticket/initials]`
+
+    Returns:
+        HeaderMatcher: matcher cached per argument combination
+    """
+    return HeaderMatcher(
+        _keyword_set(keywords),
+        allow_keywords_with_commas,
+        allow_default_merge_msg,
+        with_preamble,
+        ticket_first
+    )
+
+
+def clear_matcher_cache() -> None:
+    """Drops every cached header matcher and keyword set.
+
+    Matchers are keyed on the keyword strings, so a modified keyword list is
+    picked up without calling this. Use it to release matchers built for
+    keyword lists that are no longer in use, e.g. after replacing
+    `commit_keywords` or a suite's `type_keywords` at runtime.
+    """
+    _compile_header_matcher.cache_clear()
+    _keyword_set.cache_clear()
+
+
+@metrics.counted("semantic.is_keyword")
 def is_keyword(s: str) -> bool:
     """True if the input is a valid Semantic Commit keyword."""
-    str_keywords = [k.keyword for k in commit_keywords]
-    if s not in str_keywords:
+    key = _keyword_key(commit_keywords)
+    if s not in _keyword_set(key):
         raise ValidationFailedException(
-            f"{s} is not a valid keyword. Should be one of: {str_keywords}"
+            f"{s} is not a valid keyword. Should be one of: {list(key)}"
         )
     else:
         return True
@@ -40,27 +102,12 @@ def _is_semantic_with_custom_keyword_set(
 ) -> Callable[[str, bool], bool]:
 
     def closure(s: str, allow_default_merge_msg: bool = True):
-        scope = r"(\([^, ]+\))?"
-        breaking = r"!?"
-
-        kwds = "(" + "|".join([
-            "(" + k.keyword + scope + breaking + ")"
-            for k in commit_keywords]) + ")"
-
-        kwds_with_commas = "(" + "|".join([
-            "((" + k.keyword + scope + breaking + ")" + r", ?" + ")"
-            for k in commit_keywords]) + ")"
-
-        subject = r"[^,]+"
-        if allow_default_merge_msg:
-            merge_msg = "Merge branch.*|"
-        else:
-            merge_msg = ""
-
-        expression = f"^{merge_msg}{kwds}: {subject}"
-        if allow_keywords_with_commas:
-            expression = f"{expression}|^{merge_msg}{kwds_with_commas}+{kwds}: {subject}"
-        if not matches(expression)(s):
+        matcher = _compile_header_matcher(
+            _keyword_key(commit_keywords),
+            allow_keywords_with_commas,
+            allow_default_merge_msg
+        )
+        if matcher.match(s) is None:
             raise ValidationFailedException(
                 validation_error_message
             )
@@ -69,39 +116,80 @@ def _is_semantic_with_custom_keyword_set(
     return closure
 
 
+SEMANTIC_ERROR_MESSAGE = (
+    "The message does not comply with semantic commit formatting rules. "
+    "Was {header}, but should look like e.g. 'feat: something implemented'"
+)
+SUBJECT_MAX_LEN = 55
+
+
+@metrics.counted("semantic.is_semantic")
 def is_semantic(s: str, allow_default_merge_msg: bool = True) -> bool:
     """True if the message corresponds to a Semantic Commit message."""
     return _is_semantic_with_custom_keyword_set(
         commit_keywords,
         allow_keywords_with_commas=True,
-        validation_error_message="The message does not comply with "
-                                 "semantic commit formatting rules. "
-                                 f"Was {s}, but should look like e.g. 'feat: something implemented'"
+        validation_error_message=SEMANTIC_ERROR_MESSAGE.format(header=s)
     )(s, allow_default_merge_msg)
 
 
-def has_short_commit_msg_proper_length(s: str) -> bool:
-    """True if the included raw commit message (after colon) is less than
-    55 characters.
+def _description(s: str) -> Optional[str]:
+    """The raw description (after the colon) of a header, `None` for a merge message
+
+    Headers the grammar rejects, e.g. `feat:x` or `feat(): x`, fall back to the
+    text between the first and the second colon, as the length check always did.
     """
-    desc = s.split(":")[1].strip()
-    if not is_shorter_than_55_chars(desc):
+    try:
+        header = parse_header(s)
+    except MalformedHeaderException as e:
+        if ":" not in s:
+            raise ValidationFailedException(
+                f"Could not find the raw description in {s}: {e}"
+            ) from e
+        return s.split(":")[1]
+    return None if header.merge else header.subject
+
+
+def _check_subject_length(s: str, limit: int) -> bool:
+    description = _description(s)
+    if description is None:
+        return True
+    desc = description.strip()
+    if not len(desc) < limit:
         raise ValidationFailedException(
             "The raw description included in the semantic commit message "
-            f"should be shorter than 55 characters, was {len(desc)}"
+            f"should be shorter than {limit} characters, was {len(desc)}"
         )
     return True
 
 
+@metrics.counted("semantic.has_short_commit_msg_proper_length")
+def has_short_commit_msg_proper_length(s: str) -> bool:
+    """True if the included raw commit message (after colon) is less than
+    55 characters.
+    """
+    return _check_subject_length(s, SUBJECT_MAX_LEN)
+
+
 ask_keywords = lambda: ask(
     "Select one or more keywords applicable (use TAB): ",
     one_or_more=commit_keywords,
     check=are_keywords_selected()
 )
 
-ask_scope = lambda: ask(
-    "(Optional) provide change scope: "
-)
+
+def suggest_scopes(typed: str) -> List[str]:
+    """Scopes used in the history of the repository, best matches of `typed` first"""
+    return context.get_context().scopes.suggest(typed)
+
+
+def _ask_scope(question: str, **kwargs) -> str:
+    # the scope index is only built by templates asking for a scope, while the prompt shows
+    context.get_context().start_scopes()
+    return ask(question, complete=suggest_scopes, **kwargs)
+
+
+ask_scope = lambda: _ask_scope("(Optional) provide change scope: ")
 
 ask_short_commit_msg = lambda: ask(
     "Provide the short commit msg, max 55 characters long: ",
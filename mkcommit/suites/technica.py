@@ -2,9 +2,11 @@ from __future__ import annotations
 from typing import List, Tuple
 from mkcommit.model import CommaSeparatedList, ValidationFailedException, ask
 from mkcommit.blocks import Project
+from mkcommit.header import Preamble
 from mkcommit.model import Author as BaseAuthor
 from mkcommit.validators import is_int, matches, validate_initials
 from mkcommit.suites import semantic
+from mkcommit import context, metrics
 from enum import Enum, auto
 
 
@@ -26,62 +28,47 @@ class Author(BaseAuthor):
         return cls(author.name, author.email)
 
 
+_initials_2_2 = validate_initials(2, 2)
+_ticket_id = matches(r"^\w+-\d+$|^---$|^-$")
+
+
 def initials_are_2_chars_each(s: str) -> bool:
     """Validates if first name and last name initials have both 2 letters, e.g. 'AbCd'."""
-    return validate_initials(2, 2)(s)
+    return _initials_2_2(s)
 
 
 def ticket_id_correctly_formatted(s: str) -> bool:
     """Checks if Ticket ID is in the form of 'PROJECTNAME-1234'"""
-    return matches(r"^\w+-\d+$|^---$|^-$")(s)
+    return _ticket_id(s)
 
 
+@metrics.counted("technica.is_technica")
 def is_technica(s: str, ticket_first: bool = False, allow_default_merge_msg: bool = True) -> bool:
-    two_parts = s.split("]")
-    if len(two_parts) < 2:
-        if allow_default_merge_msg and matches(r"Merge branch.*")(s):
-            return True
-        else:
-            raise ValidationFailedException(
-                f"{s} could not be split on ']' character. "
-                "The commit message seems malformed!"
-            )
-    else:
-        preamble = two_parts[0].strip()
-        semantic_part = two_parts[1].strip()
-
-        # split the preamble:
-        preamble_split = preamble.split("/")
-        if len(preamble_split) < 2:
-            raise ValidationFailedException(
-                "The preamble {preamble}] could not be split on '/' character. "
-                "The commit message seems malformed!"
-            )
-        else:
-            # validate the preamble:
-            if ticket_first:
-                ticket = preamble_split[0].replace("[", "")
-                initials = preamble_split[1]
-            else:
-                initials = preamble_split[0].replace("[", "")
-                ticket = preamble_split[1]
-
-        # validate the semantic part:
-        if not semantic.is_semantic(semantic_part):
-            raise ValidationFailedException(
-                "The semantic part of the message, i.e. <keyword>: <message> is "
-                f"not compliant with the semantic commit specification. Input was: {semantic_part}"
-            )
-        else:
-            if not initials_are_2_chars_each(initials):
-                raise ValidationFailedException(
-                    f"Initials should look like AbCd but were {initials}"
-                )
-            if not ticket_id_correctly_formatted(ticket):
-                raise ValidationFailedException(
-                    f"Ticket ID should look like PROJECTNAME-1234 but was {ticket}"
-                )
-            return True
+    matcher = semantic._compile_header_matcher(
+        semantic._keyword_key(semantic.commit_keywords),
+        allow_keywords_with_commas=True,
+        allow_default_merge_msg=allow_default_merge_msg,
+        with_preamble=True,
+        ticket_first=ticket_first
+    )
+    header = matcher.parse(s)
+    if header.preamble is None:
+        # merge message without a preamble
+        return True
+    return _check_preamble(header.preamble)
+
+
+def _check_preamble(preamble: Preamble) -> bool:
+    initials, ticket = preamble.initials, preamble.ticket
+    if not initials_are_2_chars_each(initials):
+        raise ValidationFailedException(
+            f"Initials should look like AbCd but were {initials}"
+        )
+    if not ticket_id_correctly_formatted(ticket):
+        raise ValidationFailedException(
+            f"Ticket ID should look like PROJECTNAME-1234 but was {ticket}"
+        )
+    return True
 
 
 ask_initials = lambda: ask(
@@ -106,7 +93,9 @@ def default_short(
     initials_from_git: bool = True
 ) -> str:
     if initials_from_git:
-        initials = Author.from_git().make_initials(2, 2)
+        # fetched in the background since the config was loaded
+        author = context.get_context().author
+        initials = Author(author.name, author.email).make_initials(2, 2)
     else:
         initials = ask_initials()
     is_related_to_ticket = ask_include_ticket()
@@ -0,0 +1,126 @@
+"""Phase-level tracing behind `mkcommit --profile`.
+
+Code marks its phases with `with span("load_module"): ...`. Until `start`
+is called, `span` returns a shared no-op context manager, so tracing costs a
+function call when profiling is off. Recorded spans are written as a Chrome
+trace (open it in `chrome://tracing` or https://ui.perfetto.dev) and
+summarised in a table.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, TypeVar
+
+DEFAULT_TRACE_FILE = "mkcommit-trace.json"
+
+# taken when the package is imported, so the import itself can be traced
+IMPORTED_AT = time.perf_counter()
+
+_NO_SPAN: ContextManager[None] = nullcontext()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    end: float
+    thread: int
+    args: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class Tracer:
+
+    def __init__(self, origin: float = IMPORTED_AT):
+        self.origin = origin
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, end: float, **args: Any) -> None:
+        with self._lock:
+            self.spans.append(Span(name, start, end, threading.get_ident(), args))
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter(), **args)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        return {"traceEvents": [
+            {
+                "name": s.name,
+                "ph": "X",
+                "ts": (s.start - self.origin) * 1e6,
+                "dur": s.duration * 1e6,
+                "pid": pid,
+                "tid": s.thread,
+                "args": {k: str(v) for k, v in s.args.items()}
+            }
+            for s in self.spans
+        ]}
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self) -> str:
+        """Count, total and maximum duration of every span name, slowest first"""
+        totals: Dict[str, List[float]] = {}
+        for s in self.spans:
+            totals.setdefault(s.name, []).append(s.duration * 1000)
+        lines = [f"{'phase':<24} {'count':>6} {'total ms':>10} {'max ms':>10}"]
+        for name, durations in sorted(totals.items(), key=lambda kv: -sum(kv[1])):
+            lines.append(
+                f"{name:<24} {len(durations):>6} {sum(durations):>10.1f} {max(durations):>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def span(name: str, **args: Any) -> ContextManager[None]:
+    """Records the enclosed block as a span named `name`, if tracing is on"""
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.span(name, **args)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator recording every call of a function as a span named `name`"""
+    def decorator(func: F) -> F:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(name, function=func.__name__):
+                return func(*args, **kwargs)
+        return wrapper  # type: ignore
+    return decorator
+
+
+def start() -> Tracer:
+    """Turns tracing on, the package import is recorded as the first span"""
+    global _tracer
+    _tracer = Tracer()
+    _tracer.add("import", IMPORTED_AT, time.perf_counter())
+    return _tracer
+
+
+def stop() -> Optional[Tracer]:
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
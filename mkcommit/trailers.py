@@ -0,0 +1,222 @@
+"""Commit message trailers (`Key: value` lines at the end of a message).
+
+The trailer block is found the way `git interpret-trailers` finds it: it is
+the last paragraph of the body, ignoring comment lines and trailing blank
+lines, and it qualifies when all its lines are trailers (or continuation
+lines, which start with whitespace), or when it contains a git-generated
+trailer such as `Signed-off-by:` and at least 25% of its lines are
+trailers. Besides git's `token: value` form, Conventional Commits'
+`BREAKING CHANGE: value` is recognised.
+
+`parse` reads a body once, from the end, and the returned `TrailerBody`
+is edited in place; only `render` joins the lines again::
+
+    >>> body = parse("Fixes things.\\n\\nRefs: #1\\nSigned-off-by: A <a@b.c>")
+    >>> [str(t) for t in body.trailers]
+    ['Refs: #1', 'Signed-off-by: A <a@b.c>']
+    >>> body.add("Refs", "#2")
+    >>> body.render()
+    'Fixes things.\\n\\nRefs: #1\\nSigned-off-by: A <a@b.c>\\nRefs: #2'
+"""
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from mkcommit.history import CommitRecord
+
+GIT_GENERATED_PREFIXES = ("Signed-off-by: ", "(cherry picked from commit ")
+COMMENT_CHAR = "#"
+
+# git allows alphanumerics and dashes in tokens, followed by optional whitespace
+_TRAILER = re.compile(r"^(BREAKING CHANGE|[A-Za-z0-9-]+)[ \t]*:[ \t]*(.*)$")
+_DIVIDER = re.compile(r"^---(\s|$)")
+
+
+@dataclass(frozen=True)
+class Trailer:
+    key: str
+    value: str
+
+    def matches(self, key: str) -> bool:
+        """Keys are compared case-insensitively, as git does"""
+        return self.key.lower() == key.lower()
+
+    def __str__(self) -> str:
+        return f"{self.key}: {self.value}"
+
+
+@dataclass
+class _Item:
+    """Lines of the trailer block: a trailer with its continuation lines, or a comment"""
+    lines: List[str]
+    trailer: Optional[Trailer]
+
+
+def _parse_line(line: str) -> Optional[Trailer]:
+    # `(cherry picked from commit ...)` marks a trailer block, but has no key nor value
+    match = _TRAILER.match(line)
+    if match is None:
+        return None
+    return Trailer(match.group(1), match.group(2).strip())
+
+
+def _find_block(lines: Sequence[str], end: int) -> Optional[int]:
+    """Start of the trailer block ending at `end` (exclusive), per git's rules"""
+    trailer_lines = non_trailer_lines = possible_continuation_lines = 0
+    recognized_prefix = False
+    start = 0
+    for index in range(end - 1, -1, -1):
+        line = lines[index]
+        if line.startswith(COMMENT_CHAR):
+            # continuation lines don't continue across a comment
+            non_trailer_lines += possible_continuation_lines
+            possible_continuation_lines = 0
+            continue
+        if not line.strip():
+            start = index + 1
+            break
+        if line.startswith(GIT_GENERATED_PREFIXES):
+            trailer_lines += 1
+            possible_continuation_lines = 0
+            recognized_prefix = True
+        elif not line[0].isspace() and _TRAILER.match(line):
+            trailer_lines += 1
+            possible_continuation_lines = 0
+        elif line[0].isspace():
+            possible_continuation_lines += 1
+        else:
+            non_trailer_lines += 1 + possible_continuation_lines
+            possible_continuation_lines = 0
+    # at the top of the block, no trailer is left for them to continue
+    non_trailer_lines += possible_continuation_lines
+    if trailer_lines and (
+        not non_trailer_lines or (recognized_prefix and trailer_lines * 3 >= non_trailer_lines)
+    ):
+        return start
+    return None
+
+
+class TrailerBody:
+    """A body split into the text before its trailer block, the block and what follows"""
+
+    def __init__(self, lines: List[str], start: int, end: int, items: List[_Item]):
+        self._lines = lines
+        self._start = start
+        self._end = end
+        self._items = items
+
+    @property
+    def trailers(self) -> List[Trailer]:
+        return [i.trailer for i in self._items if i.trailer is not None]
+
+    def get(self, key: str) -> List[str]:
+        """Values of every trailer named `key`, in order"""
+        return [t.value for t in self.trailers if t.matches(key)]
+
+    def add(self, key: str, value: str) -> None:
+        """Appends a trailer at the end of the block, creating the block if needed"""
+        if not self._items and self._start == self._end:
+            # a new block is separated from the text by a blank line
+            if any(line.strip() for line in self._lines[:self._start]):
+                has_blank_line = self._start < len(self._lines) and \
+                    not self._lines[self._start].strip()
+                if not has_blank_line:
+                    self._lines.insert(self._start, "")
+                self._start += 1
+                self._end += 1
+        trailer = Trailer(key, value)
+        self._items.append(_Item([str(trailer)], trailer))
+
+    def remove(self, key: str) -> None:
+        self._items = [i for i in self._items if i.trailer is None or not i.trailer.matches(key)]
+
+    def replace(self, key: str, value: str) -> None:
+        """Sets the first `key` trailer to `value` and drops the other `key` trailers,
+        adds the trailer if there is none"""
+        for position, item in enumerate(self._items):
+            if item.trailer is not None and item.trailer.matches(key):
+                trailer = Trailer(item.trailer.key, value)
+                self._items[position] = _Item([str(trailer)], trailer)
+                self._items[position + 1:] = [
+                    i for i in self._items[position + 1:]
+                    if i.trailer is None or not i.trailer.matches(key)
+                ]
+                return
+        self.add(key, value)
+
+    def dedupe(self) -> None:
+        """Drops trailers repeating an earlier key and value, keeping the first one"""
+        seen = set()
+        items = []
+        for item in self._items:
+            if item.trailer is not None:
+                identity = (item.trailer.key.lower(), item.trailer.value)
+                if identity in seen:
+                    continue
+                seen.add(identity)
+            items.append(item)
+        self._items = items
+
+    def render(self) -> str:
+        block = [line for item in self._items for line in item.lines]
+        return "\n".join(self._lines[:self._start] + block + self._lines[self._end:])
+
+
+def _end_of_message(lines: Sequence[str]) -> int:
+    """Index past the last line of the message proper, before a patch divider,
+    trailing comments and trailing blank lines"""
+    end = len(lines)
+    for index, line in enumerate(lines):
+        if _DIVIDER.match(line):
+            end = index
+            break
+    while end > 0 and (not lines[end - 1].strip() or lines[end - 1].startswith(COMMENT_CHAR)):
+        end -= 1
+    return end
+
+
+def parse(body: str) -> TrailerBody:
+    """Splits `body` into its lines and trailer block in one pass"""
+    lines = body.split("\n") if body else []
+    end = _end_of_message(lines)
+    start = _find_block(lines, end)
+    if start is None:
+        return TrailerBody(lines, end, end, [])
+
+    items: List[_Item] = []
+    for line in lines[start:end]:
+        trailer = None if line.startswith(COMMENT_CHAR) else _parse_line(line)
+        if trailer is None and items and items[-1].trailer is not None \
+                and line[:1].isspace():
+            # continuation lines are folded into the value of their trailer
+            previous = items[-1]
+            previous.lines.append(line)
+            assert previous.trailer is not None
+            previous.trailer = Trailer(
+                previous.trailer.key, f"{previous.trailer.value} {line.strip()}".strip()
+            )
+        else:
+            items.append(_Item([line], trailer))
+    return TrailerBody(lines, start, end, items)
+
+
+def extract(
+    commits: Iterable[CommitRecord],
+    keys: Optional[Sequence[str]] = None
+) -> Iterator[Tuple[str, Trailer]]:
+    """Yields `(sha, trailer)` for the trailers of every commit, e.g. every
+    `Refs` and `BREAKING CHANGE` trailer of a release range::
+
+        extract(iter_history("v1.0..v1.1"), ["Refs", "BREAKING CHANGE"])
+
+    Args:
+        commits (Iterable[CommitRecord]): the commits to read, see `mkcommit.history`
+        keys (Optional[Sequence[str]]): only yield trailers with these keys, all if `None`
+    """
+    wanted = None if keys is None else {k.lower() for k in keys}
+    for commit in commits:
+        if ":" not in commit.body:
+            continue  # no trailer can be found without a separator
+        for trailer in parse(commit.body).trailers:
+            if wanted is None or trailer.key.lower() in wanted:
+                yield commit.sha, trailer
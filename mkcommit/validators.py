@@ -3,9 +3,11 @@ import re
 
 
 def matches(pattern: str) -> Validator:
+    compiled = re.compile(pattern)
+
     def _v(msg: str) -> bool:
         """Checks if the input matches a RegEx pattern"""
-        if re.match(pattern, msg):
+        if compiled.match(msg):
             return True
         else:
             return False
@@ -14,16 +16,20 @@ def matches(pattern: str) -> Validator:
 
 
 def is_int() -> Validator:
+    _is_int = matches(r'^\d+$')
+
     def _v(msg: str) -> bool:
         """Checks if the input is an integer"""
-        return matches(r'^\d+$')(msg)
+        return _is_int(msg)
     return _v
 
 
 def is_float() -> Validator:
+    _is_float = matches(r'^\d+\.\d+$|^\d+$')
+
     def _v(msg: str) -> bool:
         """Checks if the input is a float"""
-        return matches(r'^\d+\.\d+$|^\d+$')(msg)
+        return _is_float(msg)
     return _v
 
 
@@ -46,9 +52,11 @@ def validate_initials(
     last_name_chars: int,
     verbose: bool = False
 ) -> Validator:
+    tot = str(first_name_chars + last_name_chars)
+    _has_enough_word_chars = matches(r"\w{" + tot + r"}")
+
     def _v(msg: str) -> bool:
-        tot = str(first_name_chars + last_name_chars)
-        if not matches(r"\w{" + tot + r"}")(msg):
+        if not _has_enough_word_chars(msg):
             return False
         else:
             if not msg[0].isupper():
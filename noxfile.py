@@ -29,6 +29,27 @@ def lint(session: nox.Session):
     session.run('flake8')
 
 
+@nox.session()
+def bench(session: nox.Session):
+    """Run microbenchmarks and compare them against the stored baseline"""
+    session.install('.')
+    session.run('python', 'bench/micro.py', *session.posargs)
+
+
+@nox.session()
+def latency(session: nox.Session):
+    """Time cold `mkcommit` runs and break down their import cost"""
+    session.install('.')
+    session.run('python', 'bench/cli.py', *session.posargs)
+
+
+@nox.session()
+def redos(session: nox.Session):
+    """Check worst-case latency of header validation on adversarial input"""
+    session.install('.')
+    session.run('python', 'bench/redos.py', *session.posargs)
+
+
 @nox.session()
 def whl(session: nox.Session):
     """Build the wheel"""
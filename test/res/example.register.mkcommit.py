@@ -0,0 +1,28 @@
+from mkcommit import CommitMessage, ValidationFailedException, register, to_stdout
+from mkcommit.fixtures import _ask
+
+
+@register.commit()
+def feature() -> CommitMessage:
+    return CommitMessage(f"feat: {_ask('Short commit message')}")
+
+
+@register.commit("fix")
+def bugfix() -> CommitMessage:
+    return CommitMessage(f"fix: {_ask('Short commit message')}")
+
+
+@register.on_commit()
+def starts_with_feat(msg: CommitMessage):
+    if not msg.first_line.startswith("feat: "):
+        raise ValidationFailedException("feat")
+
+
+@register.on_commit("fix")
+def starts_with_fix(msg: CommitMessage):
+    if not msg.first_line.startswith("fix: "):
+        raise ValidationFailedException("fix")
+
+
+if __name__ == "__main__":
+    to_stdout(feature())
@@ -0,0 +1,17 @@
+from mkcommit import CommitMessage
+from mkcommit.rules import RuleSet, Severity, body_line_length, header_grammar, \
+    required_trailers, subject_length
+
+RULES = RuleSet(
+    required_trailers("Refs"),
+    header_grammar("conventional"),
+    subject_length(),
+    body_line_length(72, severity=Severity.WARNING),
+)
+
+
+def commit():
+    return CommitMessage("feat: something", "\nRefs: #1", validate=RULES.validate)
+
+
+on_commit = RULES.hook()
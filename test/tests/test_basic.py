@@ -1,10 +1,14 @@
 from mkcommit.include import include
+import io
+import json
 import os
+import subprocess
+import sys
 import unittest
 import pyperclip
 import shutil
 
-from mkcommit.main import _main, Mode
+from mkcommit.main import _main, Mode, read_nul_separated
 from mkcommit.model import (
     CommaSeparatedList, ValidationFailedException, COMMIT_FUNC_NAME, PRE_COMMIT_FUNC_NAME
 )
@@ -27,6 +31,12 @@ class TestBasic(unittest.TestCase):
             'res',
             'example.hook.mkcommit.py'
         )
+        cls.path_register = os.path.join(
+            os.path.dirname(__file__),
+            '..',
+            'res',
+            'example.register.mkcommit.py'
+        )
 
     def test_basic_file_config_stdout(self):
         """Test whether STDOUT write works properly"""
@@ -81,6 +91,59 @@ class TestBasic(unittest.TestCase):
                 "KrCz | asdf"
             )
 
+    def test_registered_templates(self):
+        """Templates registered by name should be selectable"""
+        stdout_writes = []
+        for template in (None, "fix"):
+            _main(
+                self.path_register,
+                Mode.STDOUT,
+                None,
+                lambda msg: stdout_writes.append(msg.first_line),
+                template=template
+            )
+        self.assertEqual(stdout_writes, ["feat: cool", "fix: cool"])
+
+    def test_registered_hooks(self):
+        _main(self.path_register, Mode.HOOK, "feat: cool")
+        _main(self.path_register, Mode.HOOK, "fix: cool", template="fix")
+        with self.assertRaises(ValidationFailedException):
+            _main(self.path_register, Mode.HOOK, "fix: cool")
+
+    def test_hook_does_not_import_prompt_dependencies(self):
+        """Hook mode should not pay for interactive-only dependencies"""
+        script = (
+            "import sys\n"
+            "from mkcommit.main import _main, Mode\n"
+            f"_main({self.path_hook!r}, Mode.HOOK, 'KrCz | blah')\n"
+            "heavy = {'InquirerPy', 'prompt_toolkit', 'prettyprinter', 'pyperclip', "
+            "'requests', 'yaml'}\n"
+            "print(sorted(heavy & set(sys.modules)))\n"
+        )
+        out = subprocess.run(
+            (sys.executable, "-c", script), check=True, capture_output=True, text=True
+        ).stdout
+        self.assertEqual(out.strip(), "[]")
+
+    def test_hook_stdin(self):
+        """Streamed messages should be validated one by one, as JSON Lines"""
+        out = subprocess.run(
+            (sys.executable, "-m", "mkcommit.main", "-f", self.path_hook, "--hook-stdin"),
+            input=b"KrCz | blah\n\nbody\n\0KrCz | asdf\n\0KrCz | blah",
+            capture_output=True
+        )
+        results = [json.loads(line) for line in out.stdout.decode("utf-8").splitlines()]
+        self.assertEqual([r["ok"] for r in results], [True, False, True])
+        self.assertEqual([r["index"] for r in results], [0, 1, 2])
+        self.assertEqual(results[1]["kind"], "validation")
+        self.assertEqual(out.returncode, 1)
+
+    def test_read_nul_separated(self):
+        stream = io.BytesIO("feat: a\n\0fix: \u00e9\n\0".encode("utf-8"))
+        self.assertEqual(
+            list(read_nul_separated(stream, chunk_size=3)), ["feat: a\n", "fix: \u00e9\n"]
+        )
+
     def test_include(self):
         url = "https://raw.githubusercontent.com/" + \
               "kjczarne/mkcommit/master/test/res/example.semantic.mkcommit.py"
@@ -0,0 +1,88 @@
+import unittest
+
+from mkcommit.batch import (
+    Reason, conventional_check, from_suite, from_validator, semantic_check,
+    subject_length_check, technica_check, validate_batch
+)
+from mkcommit.model import ValidationFailedException
+from mkcommit.suites import conventional, semantic, technica
+from mkcommit.validators import is_int
+
+HEADERS = [
+    "feat: something",
+    "feat, fix: two types",
+    "feat(core)!: breaking",
+    "feet: typo",
+    "no colon at all",
+    "feat: " + "x" * 60,
+    "Merge branch 'main' into feature",
+    "perf: faster",
+    "",
+    "feat:x",
+    "feat(): " + "x" * 60,
+]
+
+TECHNICA = [
+    "[KrCz/PROJ-123] feat: something",
+    "[Krcz/PROJ-123] feat: something",
+    "[KrCz/123] feat: something",
+    "[KrCz/PROJ-123] feet: something",
+    "[KrCz PROJ-123] feat: something",
+    "Merge branch 'main' into feature",
+]
+
+
+def _passes(func, s) -> bool:
+    try:
+        return bool(func(s))
+    except ValidationFailedException:
+        return False
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_agrees_with_suites(self):
+        pairs = [
+            (semantic.is_semantic, semantic_check(), HEADERS),
+            (conventional.is_conventional, conventional_check(), HEADERS),
+            (semantic.has_short_commit_msg_proper_length, subject_length_check(), HEADERS),
+            (technica.is_technica, technica_check(), TECHNICA),
+        ]
+        for func, check, headers in pairs:
+            results = validate_batch(headers, check)
+            self.assertEqual(
+                [r.ok for r in results], [_passes(func, h) for h in headers], func.__name__
+            )
+
+    def test_reasons(self):
+        results = validate_batch(
+            ["feet: typo", "feat, fix: a", "oops", "feat: " + "x" * 60],
+            conventional_check(), subject_length_check()
+        )
+        self.assertEqual([r.reason for r in results], [
+            Reason.UNKNOWN_KEYWORD, Reason.MULTIPLE_TYPES,
+            Reason.MALFORMED_HEADER, Reason.SUBJECT_TOO_LONG
+        ])
+        results = validate_batch(TECHNICA[1:3], technica_check())
+        self.assertEqual([r.reason for r in results], [Reason.BAD_INITIALS, Reason.BAD_TICKET])
+
+    def test_duplicates_are_validated_once(self):
+        calls = []
+
+        def check(s: str) -> bool:
+            calls.append(s)
+            raise ValidationFailedException(s)
+
+        merge = "Merge branch 'main' into feature"
+        results = validate_batch([merge] * 1000 + ["other"], from_suite(check))
+        self.assertEqual(len(results), 1001)
+        self.assertEqual(calls, [merge, "other"])
+        self.assertEqual(results[0].reason, Reason.FAILED)
+
+    def test_validators(self):
+        results = validate_batch(["12", "a"], from_validator(is_int()))
+        self.assertEqual([r.reason for r in results], [Reason.OK, Reason.NO_MATCH])
+
+
+if __name__ == "__main__":
+    unittest.main()
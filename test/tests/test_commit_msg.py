@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from mkcommit import commit_msg
+from mkcommit.commit_msg import SCISSORS, Cleanup, read_header, read_message, resolve_cleanup
+from mkcommit.compiler import compile_config
+from mkcommit.main import Mode, _main
+from mkcommit.model import ValidationFailedException
+
+RES = os.path.join(os.path.dirname(__file__), '..', 'res')
+
+EDITMSG = (
+    "# Please enter the commit message for your changes.\n"
+    "\n"
+    "feat: something   \n"
+    "\n"
+    "\n"
+    "Body line\n"
+    "# a comment inside\n"
+    "Refs: #1\n"
+    "\n"
+    f"# {SCISSORS}\n"
+    "# Do not modify or remove the line above.\n"
+    "diff --git a/x b/x\n"
+    "+feat: not part of the message\n"
+)
+
+
+class TestCommitMsgFile(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.mkdtemp()
+        self.path = self._write("COMMIT_EDITMSG", EDITMSG)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp)
+
+    def _write(self, name: str, content: str) -> str:
+        path = os.path.join(self.tmp, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_strip(self):
+        msg = read_message(self.path, Cleanup.STRIP, "#")
+        self.assertEqual(msg.first_line, "feat: something")
+        self.assertEqual(msg.body, "\nBody line\nRefs: #1")
+        self.assertEqual(read_header(self.path, Cleanup.STRIP, "#"), "feat: something")
+
+    def test_scissors_keeps_comments(self):
+        msg = read_message(self.path, Cleanup.SCISSORS, "#")
+        self.assertEqual(msg.first_line, "# Please enter the commit message for your changes.")
+        self.assertIn("# a comment inside", msg.body)
+        self.assertNotIn("diff --git", msg.body)
+
+    def test_whitespace_and_verbatim(self):
+        msg = read_message(self.path, Cleanup.WHITESPACE, "#")
+        self.assertIn("diff --git", msg.body)
+        self.assertNotIn("\n\n\n", msg.body)
+        self.assertEqual(read_header(self.path, Cleanup.VERBATIM), EDITMSG.splitlines()[0])
+
+    def test_comment_char_and_empty_file(self):
+        path = self._write("custom", "; comment\nfix: a\n")
+        self.assertEqual(read_header(path, Cleanup.STRIP, ";"), "fix: a")
+        empty = self._write("empty", "")
+        self.assertEqual(read_message(empty, Cleanup.STRIP, "#").first_line, "")
+
+    def test_default_cleanup(self):
+        path = self._write("message", "#123 fix\n\nbody\n")
+        environ = {k: v for k, v in os.environ.items() if k != "GIT_EDITOR"}
+        with mock.patch.dict(os.environ, environ, clear=True):
+            self.assertIs(resolve_cleanup(Cleanup.DEFAULT), Cleanup.STRIP)
+            self.assertEqual(read_header(path, comment="#"), "body")
+            # `git commit -m` doesn't strip comments
+            os.environ["GIT_EDITOR"] = ":"
+            self.assertIs(resolve_cleanup(Cleanup.DEFAULT), Cleanup.WHITESPACE)
+            self.assertEqual(read_message(path, comment="#").first_line, "#123 fix")
+            os.environ["GIT_CONFIG_PARAMETERS"] = "'commit.cleanup=verbatim'"
+            self.assertIs(resolve_cleanup(Cleanup.DEFAULT), Cleanup.VERBATIM)
+            self.assertIs(resolve_cleanup(Cleanup.STRIP), Cleanup.STRIP)
+
+    def test_body_read_on_access(self):
+        with mock.patch.object(commit_msg, "_read_body", wraps=commit_msg._read_body) as read:
+            msg = read_message(self.path, Cleanup.STRIP, "#")
+            self.assertEqual(msg.first_line, "feat: something")
+            read.assert_not_called()
+            self.assertEqual(msg.body, "\nBody line\nRefs: #1")
+            self.assertEqual(msg.make(), "feat: something\n\n\nBody line\nRefs: #1")
+            read.assert_called_once()
+        msg.body = "replaced"
+        self.assertEqual(msg.body, "replaced")
+        verbatim = read_message(self.path, Cleanup.VERBATIM)
+        self.assertEqual(verbatim.body, EDITMSG.rstrip("\n").partition("\n")[2])
+
+    def test_hook_file_mode(self):
+        config = os.path.join(self.tmp, "semantic.mkcommit.py")
+        shutil.copy(os.path.join(RES, "example.semantic.mkcommit.py"), config)
+        bad = self._write("bad", "# comment\nnot semantic\n")
+        for compiled in (False, True):
+            if compiled:
+                compile_config(config)
+            _main(config, Mode.HOOK_FILE, commit_msg_file=self.path, cleanup="strip")
+            with self.assertRaises(ValidationFailedException):
+                _main(config, Mode.HOOK_FILE, commit_msg_file=bad)
+
+
+if __name__ == "__main__":
+    unittest.main()
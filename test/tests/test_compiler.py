@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+from typing import Optional
+
+from mkcommit.compiler import (
+    NotCompilableException, artifact_path, compile_config, load_fresh_artifact, run_rules
+)
+from mkcommit.main import _main, Mode
+from mkcommit.model import CommitMessage, ValidationFailedException
+from mkcommit.module_utils import get_on_commit_func_from_module, load_module
+
+RES = os.path.join(os.path.dirname(__file__), '..', 'res')
+
+
+class TestCompiler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp)
+
+    def copy(self, name: str) -> str:
+        target = os.path.join(self.tmp, name)
+        shutil.copy(os.path.join(RES, name), target)
+        return target
+
+    @staticmethod
+    def error_of(f, *args) -> Optional[str]:
+        try:
+            f(*args)
+        except ValidationFailedException as e:
+            return str(e)
+        return None
+
+    def test_compiled_rules_match_on_commit(self):
+        """Compiled rules should accept and reject exactly like the config itself"""
+        messages = [
+            "feat: something", "feat, fix(cli)!: something", "feat(a b): x",
+            "perf: faster", "feat: " + "a" * 60, "Merge branch a into b",
+            "[KrCz/PROJECT-1234] feat: x", "[PROJECT-1234/KrCz] feat: x",
+            "[KrCZ/PROJECT-1234] feat: x", "asdf: x",
+        ]
+        for name in ("example.semantic.mkcommit.py", "example.conventional.mkcommit.py",
+                     "example.technica.mkcommit.py"):
+            file = self.copy(name)
+            rules = compile_config(file)["rules"]
+            load_module(file)
+            on_commit = get_on_commit_func_from_module()
+            for m in messages:
+                self.assertEqual(
+                    self.error_of(on_commit, CommitMessage(m)),
+                    self.error_of(run_rules, rules, CommitMessage(m)),
+                    f"{name} disagrees with its compiled rules on `{m}`"
+                )
+
+    def test_custom_code_is_not_compiled(self):
+        file = self.copy("example.hook.mkcommit.py")
+        with self.assertRaises(NotCompilableException):
+            compile_config(file)
+        self.assertFalse(os.path.exists(artifact_path(file)))
+        self.assertIsNone(load_fresh_artifact(file))
+
+    def test_redefined_on_commit_is_not_compiled(self):
+        """Only the last `on_commit` would run, compiling the first checks the wrong rules"""
+        file = os.path.join(self.tmp, ".mkcommit.py")
+        with open(file, "w") as f:
+            f.write("from mkcommit.suites import technica\n\n\n"
+                    "def on_commit(commit_message):\n"
+                    "    semantic.has_short_commit_msg_proper_length(commit_message)\n\n\n"
+                    "def on_commit(commit_message):\n"
+                    "    semantic.is_semantic(commit_message)\n")
+        with self.assertRaises(NotCompilableException) as e:
+            compile_config(file)
+        self.assertIn("line 8", str(e.exception))
+        self.assertFalse(os.path.exists(artifact_path(file)))
+
+    def test_hook_uses_fresh_artifact_only(self):
+        file = self.copy("example.semantic.mkcommit.py")
+        compile_config(file)
+        self.assertIsNotNone(load_fresh_artifact(file))
+        with self.assertRaises(ValidationFailedException):
+            _main(file, Mode.HOOK, "asdf: not semantic")
+        with open(file, "a") as f:
+            f.write("\n# changed\n")
+        self.assertIsNone(load_fresh_artifact(file))
+        _main(file, Mode.HOOK, "feat: still validated by the config itself")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from mkcommit import context
+from mkcommit.context import GitContext, get_context, prefetch
+from mkcommit.git import GitClient
+from mkcommit.scopes import ScopeIndex
+from mkcommit.suites import semantic, technica
+from mkcommit.blocks import Project
+from test.tests.utils import git, make_repo
+
+
+class TestGitContext(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.repo = make_repo(["feat: first"])
+        git(self.repo, "config", "user.name", "Krzysztof Czarnecki")
+        git(self.repo, "checkout", "-q", "-b", "feature.x")
+        git(self.repo, "remote", "add", "origin", "https://example.com/origin.git")
+        git(self.repo, "remote", "add", "fork", "https://example.com/fork.git")
+        with open(os.path.join(self.repo, "a b.txt"), "w") as f:
+            f.write("a")
+        git(self.repo, "add", "a b.txt")
+        self.client = GitClient(self.repo)
+        self.contexts = []
+
+    def tearDown(self) -> None:
+        for ctx in self.contexts:
+            ctx.wait()  # the scope index is written into the repository
+        shutil.rmtree(self.repo)
+        context._context = None
+
+    def _context(self, client=None) -> GitContext:
+        ctx = GitContext(client or self.client)
+        self.contexts.append(ctx)
+        return ctx
+
+    def test_values(self):
+        ctx = self._context()
+        self.assertEqual(ctx.author.name, "Krzysztof Czarnecki")
+        self.assertEqual(ctx.branch, "feature.x")
+        self.assertEqual(ctx.staged_files, ["a b.txt"])
+        self.assertEqual(ctx.remote_url, "https://example.com/origin.git")
+        self.assertEqual(ctx.scopes.ranked(), [])
+        git(self.repo, "config", "branch.feature.x.remote", "fork")
+        self.assertEqual(self._context(GitClient(self.repo)).remote_url,
+                         "https://example.com/fork.git")
+
+    def test_queries_run_once(self):
+        ctx = self._context()
+        for _ in range(3):
+            ctx.author, ctx.branch, ctx.staged_files, ctx.remote_url
+        self.assertEqual(len(self.client.calls), 3)
+
+    def test_scopes_start_on_demand(self):
+        ctx = self._context()
+        ctx.wait()
+        index = os.path.join(self.repo, ".git", "mkcommit", "scopes.json")
+        self.assertFalse(os.path.exists(index))  # prefetching doesn't read the history
+        with mock.patch("threading.Thread", wraps=threading.Thread) as thread:
+            ctx.start_scopes()
+            ctx.start_scopes()
+        thread.assert_called_once()
+        self.assertTrue(thread.call_args.kwargs["daemon"])
+        ctx.wait()
+        self.assertEqual(ctx.scopes.ranked(), [])
+        self.assertTrue(os.path.exists(index))
+
+    def test_scope_completion_never_waits(self):
+        built = threading.Event()
+
+        def slow_index(client):
+            built.wait(5)
+            index = ScopeIndex()
+            index.add("core")
+            return index
+
+        with mock.patch.object(context, "_scopes", slow_index):
+            context._context = self._context()
+            start = time.perf_counter()
+            self.assertEqual(semantic.suggest_scopes("c"), [])  # still building
+            self.assertLess(time.perf_counter() - start, 0.5)
+            built.set()
+            context._context.wait()
+        self.assertEqual(semantic.suggest_scopes("c"), ["core"])
+
+    def test_detached_and_outside_of_a_repository(self):
+        git(self.repo, "checkout", "-q", "--detach")
+        self.assertIsNone(self._context().branch)
+        outside = tempfile.mkdtemp()
+        try:
+            ctx = GitContext(GitClient(outside))
+            ctx.wait()
+            self.assertIsNone(ctx.branch)
+            self.assertEqual(ctx.staged_files, [])
+        finally:
+            shutil.rmtree(outside)
+
+    def test_prefetch_is_shared(self):
+        ctx = prefetch(self.client)
+        self.contexts.append(ctx)
+        self.assertIs(get_context(), ctx)
+        self.contexts.append(prefetch(self.client))
+        self.assertIsNot(self.contexts[-1], ctx)
+
+    def test_technica_initials(self):
+        self.contexts.append(prefetch(self.client))
+        answers = iter([False, [], "something", False])
+        with mock.patch.object(technica, "ask_include_ticket", lambda: next(answers)), \
+                mock.patch.object(technica.semantic, "ask_keywords", lambda: next(answers)), \
+                mock.patch.object(technica, "ask_short_commit_msg", lambda: next(answers)), \
+                mock.patch.object(technica, "ask_breaking", lambda: next(answers)):
+            short = technica.default_short(Project("Project", "PROJ"))
+        self.assertEqual(short, "[KrCz/-] : something")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from mkcommit import hook_client
+from mkcommit.hook_client import default_socket_path, request, validate
+
+HOOK_CONFIG = os.path.join(os.path.dirname(__file__), '..', 'res', 'example.hook.mkcommit.py')
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not available")
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self) -> None:
+        from mkcommit.daemon import ValidationServer
+        self.tmp = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmp, "mkcommit.sock")
+        self.config = os.path.join(self.tmp, "example.hook.mkcommit.py")
+        shutil.copy(HOOK_CONFIG, self.config)
+        self.server = ValidationServer(self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        shutil.rmtree(self.tmp)
+
+    def test_validate_through_daemon(self):
+        self.assertIsNone(validate(self.config, "KrCz | blah", self.socket_path))
+        self.assertEqual(validate(self.config, "KrCz | asdf", self.socket_path), "something")
+        self.assertEqual(len(self.server.configs), 1)
+
+    def test_reload_on_change(self):
+        self.assertIsNone(validate(self.config, "KrCz | blah", self.socket_path))
+        with open(self.config, "a") as f:
+            f.write("\n\ndef on_commit(commit_message):\n"
+                    "    raise ValidationFailedException('changed')\n")
+        # make sure the modification time moves even on coarse-grained file systems
+        stat = os.stat(self.config)
+        os.utime(self.config, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(validate(self.config, "KrCz | blah", self.socket_path), "changed")
+
+    def test_validate_in_client_cwd(self):
+        with open(self.config, "a") as f:
+            f.write("\n\ndef on_commit(commit_message):\n"
+                    "    import os\n"
+                    "    raise ValidationFailedException(os.getcwd())\n")
+        cwd = os.getcwd()
+        response = request(self.socket_path, {
+            "file": self.config, "message": "KrCz | blah", "cwd": self.tmp
+        })
+        self.assertEqual(response["error"], os.path.realpath(self.tmp))
+        self.assertEqual(os.getcwd(), cwd)
+
+    def test_other_users_daemon_is_not_trusted(self):
+        self.assertIsNotNone(request(self.socket_path, {"command": "ping"}))
+        with mock.patch("os.getuid", return_value=os.getuid() + 1):
+            self.assertIsNone(request(self.socket_path, {"command": "ping"}))
+
+    def test_private_socket_directory(self):
+        environ = {k: v for k, v in os.environ.items()
+                   if k not in ("XDG_RUNTIME_DIR", hook_client.SOCKET_ENV)}
+        with mock.patch.dict(os.environ, environ, clear=True), \
+                mock.patch("tempfile.gettempdir", return_value=self.tmp):
+            path = default_socket_path()
+            directory = os.path.dirname(path)
+            self.assertEqual(os.path.dirname(directory), self.tmp)
+            self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+            # a directory others can write to may hold a socket planted by another user
+            os.chmod(directory, 0o777)
+            with self.assertRaises(PermissionError):
+                default_socket_path()
+            self.assertEqual(validate(self.config, "KrCz | asdf"), "something")
+
+    def test_fallback_without_daemon(self):
+        missing = os.path.join(self.tmp, "missing.sock")
+        self.assertIsNone(request(missing, {"command": "ping"}))
+        start = time.perf_counter()
+        self.assertEqual(validate(self.config, "KrCz | asdf", missing), "something")
+        self.assertLess(time.perf_counter() - start, 5.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import shutil
+import subprocess
+import threading
+import unittest
+
+from mkcommit.git import GitClient
+from mkcommit.model import git_command
+from test.tests.utils import git, make_repo
+
+
+class TestGitClient(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.repo = make_repo(["feat: first"])
+        self.client = GitClient(self.repo)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.repo)
+
+    def _config_reads(self):
+        return sum(1 for c in self.client.calls if c.args[0] == "config")
+
+    def test_snapshot_is_cached(self):
+        self.assertEqual(self.client.config("user.name"), "Test")
+        self.assertEqual(self.client.config("User.Email"), "test@example.com")
+        self.assertIsNone(self.client.config("core.editor"))
+        self.assertEqual(self.client.config("core.editor", "vi"), "vi")
+        self.assertEqual(self._config_reads(), 1)
+        self.assertGreaterEqual(self.client.calls[0].duration, 0)
+
+    def test_snapshot_follows_config_changes(self):
+        self.assertEqual(self.client.config("user.name"), "Test")
+        git(self.repo, "config", "user.name", "Someone Else")
+        self.assertEqual(self.client.config("user.name"), "Someone Else")
+        self.assertEqual(self._config_reads(), 2)
+
+    def test_snapshot_read_once_across_threads(self):
+        barrier = threading.Barrier(8)
+
+        def work():
+            barrier.wait()
+            self.client.config("user.name")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self._config_reads(), 1)
+
+    def test_subdirectory(self):
+        sub = os.path.join(self.repo, "sub")
+        os.mkdir(sub)
+        client = GitClient(sub)
+        self.assertEqual(client.config("user.name"), "Test")
+        git(self.repo, "config", "user.name", "Changed")
+        self.assertEqual(client.config("user.name"), "Changed")
+
+    def test_no_shell(self):
+        out = self.client.output("log", "--format=%s", "-1")
+        self.assertEqual(out, "feat: first")
+        cwd = os.getcwd()
+        os.chdir(self.repo)
+        try:
+            # `git_command` keeps accepting shell-style strings
+            self.assertEqual(git_command("git log --format=%s -1"), "feat: first")
+            self.assertEqual(git_command("git", "log", "--format='%s; rm -rf x'", "-1"),
+                             "feat: first; rm -rf x")
+        finally:
+            os.chdir(cwd)
+
+    def test_popen_is_recorded(self):
+        with self.client.popen("log", "--format=%s") as process:
+            out = process.stdout.read()
+        self.assertEqual(out, b"feat: first\n")
+        self.assertEqual(self.client.calls[-1].args, ("log", "--format=%s"))
+        self.assertEqual(self.client.calls[-1].returncode, 0)
+
+    def test_popen_killed_on_error(self):
+        with self.assertRaises(KeyError):
+            with self.client.popen("cat-file", "--batch", stdin=subprocess.PIPE) as process:
+                raise KeyError()
+        self.assertIsNotNone(process.returncode)
+        self.assertEqual(self.client.calls[-1].args, ("cat-file", "--batch"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import shutil
+import subprocess
+import unittest
+
+from mkcommit.history import iter_history, message_from_object, split_message
+from mkcommit.main import commit_message_from_str
+from test.tests.utils import git, make_repo
+
+MESSAGES = [
+    "feat: first",
+    "fix(core): second\n\nWith a body.\n\nRefs: #1",
+    "chore: third",
+]
+
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.repo = make_repo(MESSAGES)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.repo)
+
+    def test_iter_history(self):
+        records = list(iter_history("HEAD", cwd=self.repo))
+        self.assertEqual(
+            [r.header for r in records], ["chore: third", "fix(core): second", "feat: first"]
+        )
+        self.assertEqual(records[1].body, "\nWith a body.\n\nRefs: #1")
+        self.assertEqual(records[0].sha, git(self.repo, "rev-parse", "HEAD").strip())
+
+    def test_same_split_as_hook_mode(self):
+        record = list(iter_history("HEAD~1", cwd=self.repo))[0]
+        msg = commit_message_from_str(MESSAGES[1])
+        self.assertEqual((record.header, record.body), (msg.first_line, msg.body))
+
+    def test_rev_list_arguments(self):
+        records = list(iter_history(["HEAD", "--not", "HEAD~2"], cwd=self.repo))
+        self.assertEqual(len(records), 2)
+
+    def test_select(self):
+        wanted = git(self.repo, "rev-parse", "HEAD~1").strip()
+        records = list(iter_history("HEAD", cwd=self.repo, select=lambda sha: sha == wanted))
+        self.assertEqual([r.sha for r in records], [wanted])
+        history = iter_history("HEAD", cwd=self.repo, select=lambda sha: True)
+        next(history)
+        history.close()
+
+    def test_early_stop(self):
+        history = iter_history("HEAD", cwd=self.repo)
+        self.assertEqual(next(history).header, "chore: third")
+        history.close()  # must not hang nor leave processes behind
+
+    def test_bad_range(self):
+        with self.assertRaises(subprocess.CalledProcessError):
+            list(iter_history("no-such-branch", cwd=self.repo))
+
+    def test_message_from_object(self):
+        raw = b"tree abc\nencoding ISO-8859-1\n\nfeat: caf\xe9\n"
+        self.assertEqual(message_from_object(raw), "feat: café\n")
+        self.assertEqual(split_message(""), ("", ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
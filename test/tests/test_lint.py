@@ -0,0 +1,199 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from mkcommit import metrics
+from mkcommit.include import included_files
+from mkcommit.lint import lint, merge_reports, parse_shard, write_report
+from mkcommit.lint_cache import LintCache, default_cache_dir
+from mkcommit.module_utils import load_module
+from test.tests.utils import make_repo
+
+RES = os.path.join(os.path.dirname(__file__), '..', 'res')
+
+MESSAGES = [
+    "feat: add something",
+    "not semantic at all",
+    "fix(core): repair something\n\nWith a body.\n",
+    "docs: a subject that is far too long to ever pass the length check of the suite",
+]
+
+
+class TestLint(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.repo = make_repo(MESSAGES)
+        self.config = os.path.join(RES, "example.semantic.mkcommit.py")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.repo)
+
+    def test_lint_serial_and_parallel_agree(self):
+        for jobs in (1, 2):
+            failures = lint(self.config, "HEAD", jobs=jobs, cwd=self.repo)
+            self.assertEqual(
+                [f.header for f in failures], [MESSAGES[3], MESSAGES[1]], f"jobs={jobs}"
+            )
+            self.assertTrue(all(len(f.sha) == 40 for f in failures))
+
+    def test_worker_metrics_are_counted(self):
+        path = os.path.join(self.repo, "mkcommit.prom")
+        metrics.start(path)
+        self.addCleanup(metrics.start, None)
+        metrics.inc("mkcommit_include_cache_total", result="hit")  # before the pool forks
+        lint(self.config, "HEAD", jobs=2, cwd=self.repo, use_cache=False)
+        metrics.finish("lint")
+        with open(path) as f:
+            series = metrics.parse(f.read())
+
+        def validations(check, result):
+            return series.get(("mkcommit_validations_total",
+                               (("check", f"semantic.{check}"), ("result", result))))
+        self.assertEqual(validations("is_semantic", "pass"), 3)
+        self.assertEqual(validations("is_semantic", "fail"), 1)
+        self.assertEqual(validations("has_short_commit_msg_proper_length", "pass"), 2)
+        self.assertEqual(validations("has_short_commit_msg_proper_length", "fail"), 1)
+        self.assertEqual(series[("mkcommit_include_cache_total", (("result", "hit"),))], 1)
+
+    def test_lint_range(self):
+        failures = lint(self.config, "HEAD~2..HEAD", jobs=1, cwd=self.repo)
+        self.assertEqual([f.header for f in failures], [MESSAGES[3]])
+
+
+class TestShards(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.repo = make_repo(MESSAGES + [f"bad {i}" for i in range(10)])
+        self.config = os.path.join(RES, "example.semantic.mkcommit.py")
+        self.out = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.repo)
+        shutil.rmtree(self.out)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/8"), (2, 8))
+        for bad in ("0/8", "9/8", "2", "a/b"):
+            with self.assertRaises(ValueError):
+                parse_shard(bad)
+
+    def test_shards_partition_the_range(self):
+        everything = lint(self.config, "HEAD", jobs=1, cwd=self.repo, use_cache=False)
+        reports = []
+        for i in (1, 2, 3):
+            failures = lint(self.config, "HEAD", jobs=1, cwd=self.repo, shard=(i, 3))
+            reports.append(os.path.join(self.out, f"{i}.json"))
+            write_report(reports[-1], "HEAD", failures, (i, 3))
+        merged, problems = merge_reports(reports)
+        self.assertEqual(problems, [])
+        self.assertEqual(sorted(f.sha for f in merged), sorted(f.sha for f in everything))
+
+    def test_missing_shard(self):
+        path = os.path.join(self.out, "1.json")
+        write_report(path, "HEAD", [], (1, 2))
+        _, problems = merge_reports([path, path])
+        self.assertEqual(len(problems), 2)  # shard 1 twice, shard 2 missing
+
+
+class TestLintCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.repo = make_repo(MESSAGES)
+        self.config = os.path.join(self.repo, ".mkcommit.py")
+        shutil.copy(os.path.join(RES, "example.semantic.mkcommit.py"), self.config)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.repo)
+
+    def _cache_files(self):
+        return os.listdir(default_cache_dir(self.repo))
+
+    def test_passed_commits_are_skipped(self):
+        first = lint(self.config, "HEAD", jobs=1, cwd=self.repo)
+        self.assertEqual(len(first), 2)
+        cache_file = os.path.join(default_cache_dir(self.repo), self._cache_files()[0])
+        with open(cache_file) as f:
+            self.assertEqual(len(f.readlines()), 2)
+        # failures are not cached, they are reported on every run
+        self.assertEqual(lint(self.config, "HEAD", jobs=1, cwd=self.repo), first)
+
+    def test_config_change_invalidates(self):
+        lint(self.config, "HEAD", jobs=1, cwd=self.repo)
+        before = self._cache_files()
+        with open(self.config, "a") as f:
+            f.write("\n# changed\n")
+        lint(self.config, "HEAD", jobs=1, cwd=self.repo)
+        after = self._cache_files()
+        self.assertEqual(len(after), 2)
+        self.assertNotEqual(before, after)
+
+    def test_alternating_keys_stay_warm(self):
+        directory = default_cache_dir(self.repo)
+        for _ in range(2):
+            for key, sha in (("one", "a"), ("two", "b")):
+                cache = LintCache(directory, key)
+                cache.add(sha)
+                cache.save()
+        self.assertIn("a", LintCache(directory, "one"))
+        self.assertIn("b", LintCache(directory, "two"))
+
+    def test_least_recently_used_keys_evicted(self):
+        directory = default_cache_dir(self.repo)
+        for i, key in enumerate(("one", "two", "three")):
+            cache = LintCache(directory, key, max_keys=2)
+            cache.add("a")
+            cache.save()
+            os.utime(cache.path, ns=(i * 10 ** 9, i * 10 ** 9))
+        LintCache(directory, "two", max_keys=2)  # used again
+        cache = LintCache(directory, "four", max_keys=2)
+        cache.add("a")
+        cache.save()
+        self.assertEqual(
+            sorted(self._cache_files()), ["four.lint-cache", "two.lint-cache"]
+        )
+
+    def test_included_config_change_invalidates(self):
+        included = os.path.join(self.repo, "base.py")
+        shutil.copy(os.path.join(RES, "example.semantic.mkcommit.py"), included)
+        with open(self.config, "w") as f:
+            f.write("from mkcommit import include\n"
+                    "commit, on_commit = include('https://example.com/base.py')\n")
+        fetch = mock.patch.object(
+            sys.modules["mkcommit.include"], "_get_mkcommit_config_from_url",
+            lambda *args, **kwargs: included
+        )
+        cwd = os.getcwd()
+        os.chdir(self.repo)  # `include` keeps its downloads in the working directory
+        try:
+            with fetch:
+                lint(self.config, "HEAD", jobs=1, cwd=self.repo)
+                before = self._cache_files()
+                with open(included, "a") as f:
+                    f.write("\n# changed\n")
+                lint(self.config, "HEAD", jobs=1, cwd=self.repo)
+                self.assertNotEqual(before, self._cache_files())
+                # includes are recorded per config, not accumulated by the process
+                for name in ("first", "second"):
+                    module = load_module(self.config, f"mkcommit.test_include_{name}")
+                    self.assertEqual(included_files(module), [included])
+                    del sys.modules[module.__name__]
+        finally:
+            os.chdir(cwd)
+
+    def test_size_cap(self):
+        directory = default_cache_dir(self.repo)
+        cache = LintCache(directory, "key", max_entries=2)
+        for sha in ("a", "b", "c"):
+            cache.add(sha)
+        cache.save()
+        cache = LintCache(directory, "key", max_entries=2)
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("a", cache)
+        self.assertIn("c", cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
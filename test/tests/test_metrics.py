@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+from multiprocessing import get_context
+
+from mkcommit import metrics
+from mkcommit.model import ValidationFailedException
+from mkcommit.suites import semantic
+
+
+def _record(path: str) -> None:
+    metrics.start(path)
+    metrics.inc("mkcommit_include_cache_total", result="hit")
+    metrics.finish("hook")
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "mkcommit.prom")
+
+    def tearDown(self) -> None:
+        metrics.start(None)
+        shutil.rmtree(self.tmp)
+
+    def _read(self):
+        with open(self.path) as f:
+            return metrics.parse(f.read())
+
+    def test_off_by_default(self):
+        metrics.start(None)
+        with self.assertRaises(ValidationFailedException):
+            semantic.is_semantic("oops")
+        metrics.finish("hook")
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_outcomes(self):
+        metrics.start(self.path)
+        semantic.is_semantic("feat: ok")
+        with self.assertRaises(ValidationFailedException):
+            semantic.is_semantic("oops")
+        metrics.finish("hook")
+        series = self._read()
+        check = "semantic.is_semantic"
+        self.assertEqual(series[("mkcommit_validations_total",
+                                 (("check", check), ("result", "pass")))], 1)
+        self.assertEqual(series[("mkcommit_validations_total",
+                                 (("check", check), ("result", "fail")))], 1)
+        self.assertEqual(series[("mkcommit_invocations_total", (("mode", "hook"),))], 1)
+        self.assertEqual(series[("mkcommit_duration_seconds_count", (("mode", "hook"),))], 1)
+        self.assertEqual(series[("mkcommit_duration_seconds_bucket",
+                                 (("mode", "hook"), ("le", "+Inf")))], 1)
+
+    def test_render_round_trip(self):
+        series = {("mkcommit_validations_total", (("check", 'a "quoted"\\ name'),)): 3.0}
+        self.assertEqual(metrics.parse(metrics.render(series)), series)
+
+    def test_concurrent_updates(self):
+        ctx = get_context("spawn")
+        processes = [ctx.Process(target=_record, args=(self.path,)) for _ in range(8)]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+        series = self._read()
+        self.assertEqual(series[("mkcommit_invocations_total", (("mode", "hook"),))], 8)
+        self.assertEqual(series[("mkcommit_include_cache_total", (("result", "hit"),))], 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import io
+import os
+import shutil
+import unittest
+
+from mkcommit.compiler import NotCompilableException
+from mkcommit.pre_receive import check_updates, parse_updates
+from test.tests.utils import git, make_repo
+
+RES = os.path.join(os.path.dirname(__file__), '..', 'res')
+ZERO = "0" * 40
+LONG = "feat: " + "x" * 80  # valid conventional header, too long for the semantic config
+
+
+class TestPreReceive(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.repo = make_repo([])
+        shutil.copy(
+            os.path.join(RES, "example.semantic.mkcommit.py"),
+            os.path.join(self.repo, ".mkcommit.py")
+        )
+        git(self.repo, "add", ".mkcommit.py")
+        git(self.repo, "commit", "-q", "-m", "feat: add config")
+        self.base = git(self.repo, "rev-parse", "HEAD").strip()
+        # commits only reachable from `pushed` stand for the objects of a push
+        git(self.repo, "checkout", "-q", "-b", "pushed")
+        for m in ("bad one", "feat: fine", "bad two"):
+            git(self.repo, "commit", "-q", "--allow-empty", "-m", m)
+        self.new = git(self.repo, "rev-parse", "HEAD").strip()
+        git(self.repo, "checkout", "-q", "-")
+        git(self.repo, "branch", "-q", "-D", "pushed")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.repo)
+
+    def _push(self, config_source, *messages):
+        """Commits only reachable from the returned SHA, the first one changing
+        the config, or deleting it if `config_source` is `None`"""
+        git(self.repo, "checkout", "-q", "-b", "pushed")
+        if config_source is None:
+            git(self.repo, "rm", "-q", ".mkcommit.py")
+        else:
+            with open(os.path.join(self.repo, ".mkcommit.py"), "w") as f:
+                f.write(config_source)
+        git(self.repo, "commit", "-q", "-a", "-m", "feat: change config")
+        for m in messages:
+            git(self.repo, "commit", "-q", "--allow-empty", "-m", m)
+        new = git(self.repo, "rev-parse", "HEAD").strip()
+        git(self.repo, "checkout", "-q", "-")
+        git(self.repo, "branch", "-q", "-D", "pushed")
+        return self._updates(f"{self.base} {new} refs/heads/main")
+
+    def _malicious(self):
+        marker = os.path.join(self.repo, "executed")
+        source = f"open({marker!r}, 'w').close()\n\n\ndef on_commit(msg):\n    pass\n"
+        return marker, source
+
+    def _conventional(self):
+        with open(os.path.join(RES, "example.conventional.mkcommit.py")) as f:
+            return f.read()
+
+    def _updates(self, *lines):
+        return parse_updates(io.StringIO("".join(line + "\n" for line in lines)))
+
+    def test_only_new_commits_are_checked(self):
+        updates = self._updates(f"{self.base} {self.new} refs/heads/main")
+        failures = list(check_updates(updates, jobs=1, cwd=self.repo))
+        self.assertEqual([f.header for f in failures], ["bad two", "bad one"])
+
+    def test_fail_fast(self):
+        updates = self._updates(f"{self.base} {self.new} refs/heads/main")
+        failures = list(check_updates(updates, jobs=2, fail_fast=True, cwd=self.repo))
+        self.assertEqual([f.header for f in failures], ["bad two"])
+
+    def test_known_commits_and_deletions_are_skipped(self):
+        updates = self._updates(
+            f"{ZERO} {self.base} refs/heads/copy",
+            f"{self.base} {ZERO} refs/heads/gone"
+        )
+        self.assertEqual(list(check_updates(updates, jobs=1, cwd=self.repo)), [])
+
+    def test_tree_without_config(self):
+        updates = self._updates(f"{self.base} {self.new} refs/heads/main")
+        self.assertEqual(
+            list(check_updates(updates, "missing.mkcommit.py", jobs=1, cwd=self.repo)), []
+        )
+
+    def test_pushed_config_is_not_executed(self):
+        marker, source = self._malicious()
+        updates = self._push(source, "bad three")
+        failures = list(check_updates(updates, jobs=1, cwd=self.repo))
+        # validated with the config of `HEAD` before the push
+        self.assertEqual([f.header for f in failures], ["bad three"])
+        self.assertFalse(os.path.exists(marker))
+
+    def test_pushed_config_is_compiled(self):
+        updates = self._push(self._conventional(), LONG, "bad three")
+        failures = list(check_updates(updates, jobs=1, cwd=self.repo, pushed_config=True))
+        self.assertEqual([f.header for f in failures], ["bad three"])
+
+    def test_uncompilable_pushed_config_is_rejected(self):
+        marker, source = self._malicious()
+        updates = self._push(source, "feat: fine")
+        with self.assertRaises(NotCompilableException):
+            list(check_updates(updates, jobs=1, cwd=self.repo, pushed_config=True))
+        self.assertFalse(os.path.exists(marker))
+
+    def test_uncompilable_head_config_is_rejected(self):
+        marker, source = self._malicious()
+        with open(os.path.join(self.repo, ".mkcommit.py"), "w") as f:
+            f.write(source)
+        git(self.repo, "commit", "-q", "-a", "-m", "feat: landed config")
+        updates = self._updates(f"{self.base} {self.new} refs/heads/main")
+        with self.assertRaises(NotCompilableException):
+            list(check_updates(updates, jobs=1, cwd=self.repo))
+        self.assertFalse(os.path.exists(marker))
+
+    def test_deleted_pushed_config_falls_back_to_head(self):
+        updates = self._push(None, "bad three")
+        failures = list(check_updates(updates, jobs=1, cwd=self.repo, pushed_config=True))
+        self.assertEqual([f.header for f in failures], ["bad three"])
+
+    def test_server_config(self):
+        updates = self._push(self._conventional(), LONG)
+        failures = list(check_updates(updates, jobs=1, cwd=self.repo))
+        self.assertEqual([f.header for f in failures], [LONG])
+        server_config = os.path.join(RES, "example.conventional.mkcommit.py")
+        self.assertEqual(
+            list(check_updates(updates, jobs=1, cwd=self.repo, file=server_config)), []
+        )
+        with self.assertRaises(ValueError):
+            list(check_updates(updates, template="other", cwd=self.repo))
+
+
+if __name__ == "__main__":
+    unittest.main()
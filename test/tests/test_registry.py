@@ -0,0 +1,156 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from mkcommit.config_registry import ConfigRegistry
+from mkcommit.model import MODULE_SHIM, CommitMessage, ValidationFailedException
+
+RES = os.path.join(os.path.dirname(__file__), '..', 'res')
+
+
+class TestConfigRegistry(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.mkdtemp()
+        self.files = []
+        for i in range(3):
+            target = os.path.join(self.tmp, f"{i}.mkcommit.py")
+            shutil.copy(os.path.join(RES, "example.hook.mkcommit.py"), target)
+            self.files.append(target)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp)
+
+    def test_namespaced_configs(self):
+        """Configs should not replace the active config nor each other"""
+        shim = sys.modules.get(MODULE_SHIM)
+        registry = ConfigRegistry()
+        modules = [registry.get(f).module for f in self.files]
+        self.assertEqual(len({m.__name__ for m in modules}), 3)
+        self.assertIs(sys.modules.get(MODULE_SHIM), shim)
+        self.assertIs(registry.get(self.files[0]).module, modules[0])
+        on_commit = registry.get(self.files[1]).on_commit_func()
+        with self.assertRaises(ValidationFailedException):
+            on_commit(CommitMessage("KrCz | asdf"))
+
+    def test_lru_eviction(self):
+        registry = ConfigRegistry(max_size=2)
+        first = registry.get(self.files[0]).module.__name__
+        registry.get(self.files[1])
+        registry.get(self.files[0])  # most recently used now
+        registry.get(self.files[2])
+        self.assertEqual(len(registry), 2)
+        self.assertIn(self.files[0], registry)
+        self.assertNotIn(self.files[1], registry)
+        self.assertIn(first, sys.modules)
+
+    def test_reload_on_change(self):
+        registry = ConfigRegistry()
+        before = registry.get(self.files[0]).module
+        with open(self.files[0], "a") as f:
+            f.write("\n# changed\n")
+        after = registry.get(self.files[0]).module
+        self.assertIsNot(before, after)
+        self.assertEqual(len(registry), 1)
+        self.assertNotIn(before.__name__, sys.modules)
+
+    def test_concurrent_lookups(self):
+        registry = ConfigRegistry(max_size=2)
+        errors = []
+
+        def work():
+            try:
+                for _ in range(20):
+                    for f in self.files:
+                        registry.get(f).on_commit_func()(CommitMessage("KrCz | blah"))
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(registry), 2)
+
+    def test_loaded_once_per_key(self):
+        registry_module = sys.modules[ConfigRegistry.__module__]
+        load_module = registry_module.load_module
+        loads = []
+        loaded = threading.local()
+
+        def slow_load(*args):
+            loads.append(args)
+            time.sleep(0.05)  # keeps the others queued on the key lock
+            loaded.done = True
+            return load_module(*args)
+
+        class SlowToPublish:
+            """Lets the threads queued on the key lock go first once a config is loaded"""
+            def __init__(self):
+                self.lock = threading.Lock()
+
+            def __enter__(self):
+                if getattr(loaded, "done", False):
+                    time.sleep(0.05)
+                self.lock.acquire()
+
+            def __exit__(self, *exc):
+                self.lock.release()
+
+        registry = ConfigRegistry()
+        registry._lock = SlowToPublish()
+        barrier = threading.Barrier(8)
+        modules = []
+
+        def work():
+            barrier.wait()
+            modules.append(registry.get(self.files[0]).module)
+
+        with mock.patch.object(registry_module, "load_module", slow_load):
+            threads = [threading.Thread(target=work) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(len({id(m) for m in modules}), 1)
+
+    def test_reload_on_included_change(self):
+        included = os.path.join(self.tmp, "base.py")
+        shutil.copy(os.path.join(RES, "example.hook.mkcommit.py"), included)
+        with open(self.files[0], "w") as f:
+            f.write("from mkcommit import include\n"
+                    "commit, on_commit = include('https://example.com/base.py')\n")
+        fetch = mock.patch.object(
+            sys.modules["mkcommit.include"], "_get_mkcommit_config_from_url",
+            lambda *args, **kwargs: included
+        )
+        registry = ConfigRegistry()
+        cwd = os.getcwd()
+        os.chdir(self.tmp)  # `include` keeps its downloads in the working directory
+        self.addCleanup(os.chdir, cwd)
+        with fetch:
+            before = registry.get(self.files[0]).module
+            self.assertIs(registry.get(self.files[0]).module, before)
+            with open(included, "a") as f:
+                f.write("\n\ndef on_commit(commit_message):\n"
+                        "    raise ValidationFailedException('changed')\n")
+            stat = os.stat(included)
+            os.utime(included, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            after = registry.get(self.files[0])
+        self.assertIsNot(after.module, before)
+        self.assertIs(sys.modules[after.module.__name__], after.module)
+        self.assertEqual(len(registry), 1)
+        with self.assertRaisesRegex(ValidationFailedException, "changed"):
+            after.on_commit_func()(CommitMessage("KrCz | blah"))
+
+
+if __name__ == "__main__":
+    unittest.main()
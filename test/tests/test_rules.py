@@ -0,0 +1,147 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from mkcommit.history import iter_history, split_message
+from mkcommit.lint import lint
+from mkcommit.main import Mode, _main, commit_message_from_str
+from mkcommit.model import CommitMessage, ValidationFailedException
+from mkcommit.rules import (
+    RuleSet, Severity, body_line_length, custom, header_grammar, required_trailers,
+    subject_length
+)
+from test.tests.utils import make_repo
+
+RES = os.path.join(os.path.dirname(__file__), '..', 'res')
+
+MESSAGES = [
+    "feat: something\n\nRefs: #1",
+    "feat: something",
+    "nope\n\n" + "x" * 80,
+    "feat, fix: " + "y" * 60 + "\n\nRefs: #2",
+    "perf(core): faster\n\nSome text.\n\nRefs: #3\nSigned-off-by: A <a@b.c>",
+]
+
+
+def _rules(**kwargs) -> RuleSet:
+    return RuleSet(
+        required_trailers("Refs"),
+        header_grammar("conventional"),
+        body_line_length(72, severity=Severity.WARNING),
+        subject_length(),
+        **kwargs
+    )
+
+
+class TestRules(unittest.TestCase):
+
+    def test_cost_order_and_collect_all(self):
+        rules = _rules()
+        self.assertEqual(
+            [r.name for r in rules.rules],
+            ["subject-length", "header-grammar:conventional", "body-line-length",
+             "required-trailers"]
+        )
+        findings = rules.run(CommitMessage(*split_message(MESSAGES[2])))
+        self.assertEqual(
+            [(f.rule, f.severity) for f in findings],
+            [("header-grammar:conventional", Severity.ERROR),
+             ("body-line-length", Severity.WARNING),
+             ("required-trailers", Severity.ERROR)]
+        )
+
+    def test_fail_fast(self):
+        msg = CommitMessage(*split_message(MESSAGES[3]))
+        self.assertEqual(len(_rules().run(msg)), 2)
+        self.assertEqual([f.rule for f in _rules(fail_fast=True).run(msg)], ["subject-length"])
+        # warnings don't stop the run
+        msg = CommitMessage(*split_message(MESSAGES[2]))
+        self.assertEqual(
+            [f.rule for f in _rules().run(msg, fail_fast=True)],
+            ["header-grammar:conventional"]
+        )
+
+    def test_valid_messages(self):
+        for message in (MESSAGES[0], MESSAGES[4], "Merge branch 'main'\n\nRefs: #4"):
+            self.assertEqual(_rules().run(CommitMessage(*split_message(message))), [])
+
+    def test_validate(self):
+        with self.assertRaises(ValidationFailedException) as e:
+            _rules().validate(CommitMessage(*split_message(MESSAGES[2])))
+        self.assertIn("Missing trailer(s): Refs", str(e.exception))
+        self.assertNotIn("body-line-length", str(e.exception))
+        output = io.StringIO()
+        rules = RuleSet(*_rules().rules, output=output)
+        msg = CommitMessage("feat: a", "\n" + "z" * 80 + "\n\nRefs: #1")
+        # every message gets its warnings, not only the first one
+        self.assertTrue(rules.validate(msg))
+        self.assertTrue(rules.validate(msg))
+        self.assertEqual(output.getvalue().count("warning: Line 2 of the body"), 2)
+
+    def test_custom(self):
+        def no_wip(msg: CommitMessage) -> bool:
+            """WIP commits are not allowed"""
+            return "WIP" not in msg.first_line
+
+        def raises(msg: CommitMessage) -> bool:
+            raise ValidationFailedException("nope")
+
+        rules = RuleSet(custom(raises, cost=0), custom(no_wip, severity=Severity.INFO))
+        findings = rules.run(CommitMessage("feat: WIP"))
+        self.assertEqual([str(f) for f in findings], [
+            "error: nope [raises]", "info: WIP commits are not allowed [no_wip]"
+        ])
+        with self.assertRaises(ValueError):
+            header_grammar("unknown")
+
+    def test_hook_and_bulk_agree(self):
+        repo = make_repo(MESSAGES)
+        try:
+            rules = _rules()
+            bulk = {sha: findings for sha, findings in rules.check_commits(iter_history(
+                "HEAD", repo
+            ))}
+            for commit in iter_history("HEAD", repo):
+                hook = rules.run(commit_message_from_str(
+                    "\n".join(filter(None, (commit.header, commit.body)))
+                ))
+                self.assertEqual(bulk[commit.sha], hook)
+
+            config = os.path.join(RES, "example.rules.mkcommit.py")
+            failures = lint(config, "HEAD", jobs=1, cwd=repo, use_cache=False)
+            self.assertEqual(
+                sorted(f.header for f in failures),
+                sorted(split_message(MESSAGES[i])[0] for i in (1, 2, 3))
+            )
+        finally:
+            shutil.rmtree(repo)
+
+    def test_commit_message_validate(self):
+        config = os.path.join(RES, "example.rules.mkcommit.py")
+        printed = []
+        _main(config, Mode.STDOUT, to_stdout=printed.append)
+        self.assertEqual(printed[0].first_line, "feat: something")
+        with self.assertRaises(ValidationFailedException):
+            _main(config, Mode.HOOK, "feat: something")
+        _main(config, Mode.HOOK, "feat: something\n\nRefs: #1")
+
+    def test_commit_message_validate_result(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        config = os.path.join(tmp, "validate.mkcommit.py")
+        for result, fails in (("None", False), ("True", False), ("False", True)):
+            with open(config, "w") as f:
+                f.write("from mkcommit import CommitMessage\n\n\n"
+                        "def commit():\n"
+                        f"    return CommitMessage('feat: a', validate=lambda m: {result})\n")
+            if fails:
+                with self.assertRaises(ValidationFailedException):
+                    _main(config, Mode.STDOUT, to_stdout=lambda m: None)
+            else:
+                _main(config, Mode.STDOUT, to_stdout=lambda m: None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import json
+import os
+import shutil
+import time
+import unittest
+from unittest import mock
+
+from mkcommit import scopes
+from mkcommit.model import _completer
+from mkcommit.scopes import ScopeIndex, index_path, load_index, scopes_of
+from test.tests.utils import git, make_repo
+
+MESSAGES = [
+    "feat(core): first",
+    "fix(cli): second",
+    "feat(core)!: third",
+    "[KrCz/PROJ-1] docs(config): fourth",
+    "not a header (at all)",
+    "feat, fix(core): fifth",
+]
+
+
+class TestScopeIndex(unittest.TestCase):
+
+    def test_scopes_of(self):
+        self.assertEqual(scopes_of("feat(core)!: x"), ("core",))
+        self.assertEqual(scopes_of("[KrCz/PROJ-1] feat(ui), fix(api): x"), ("ui", "api"))
+        self.assertEqual(scopes_of("feat: x"), ())
+        self.assertEqual(scopes_of("nothing here"), ())
+
+    def test_complete_and_suggest(self):
+        index = ScopeIndex()
+        for scope, count in [("core", 5), ("config", 2), ("cli", 2), ("parser", 1),
+                             ("compiler", 3)]:
+            index.add(scope, count)
+        self.assertEqual(index.complete("c"), ["core", "compiler", "cli", "config"])
+        self.assertEqual(index.complete("co", limit=2), ["core", "compiler"])
+        self.assertEqual(index.complete("x"), [])
+        self.assertEqual(index.suggest(""), ["core", "compiler", "cli", "config", "parser"])
+        # prefix matches first, then fuzzy ones
+        self.assertEqual(index.suggest("p"), ["parser", "compiler"])
+        self.assertEqual(index.suggest("CR"), ["core", "compiler"])
+        self.assertEqual(index.count("core"), 5)
+        self.assertEqual(index.count("co"), 0)
+        self.assertEqual(len(index), 5)
+
+    def test_prompt_completer(self):
+        from prompt_toolkit.completion import CompleteEvent
+        from prompt_toolkit.document import Document
+        index = ScopeIndex()
+        index.add("core", 2)
+        index.add("compiler")
+        completions = _completer(index.suggest).get_completions(Document("co"), CompleteEvent())
+        self.assertEqual([(c.text, c.start_position) for c in completions],
+                         [("core", -2), ("compiler", -2)])
+
+    def test_serialization(self):
+        index = ScopeIndex()
+        index.add("core")
+        index.add("cli", 3)
+        index.tips = ["a" * 40]
+        copy = ScopeIndex.from_dict(json.loads(json.dumps(index.to_dict())))
+        self.assertEqual(copy.ranked(), index.ranked())
+        self.assertEqual(copy.tips, index.tips)
+        with self.assertRaises(ValueError):
+            ScopeIndex.from_dict({"format": 0})
+
+    def test_lookup_is_interactive(self):
+        index = ScopeIndex()
+        for i in range(20_000):
+            index.add(f"module{i % 5000}/part{i}", i % 7 + 1)
+        index.suggest("x")  # ranks the scopes once
+        for typed in ("m", "module4", "mdl49", "part1999", "zzz", "module49/part4999"):
+            start = time.perf_counter()
+            index.suggest(typed)
+            self.assertLess(time.perf_counter() - start, 0.01, typed)
+
+
+class TestLoadIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.repo = make_repo(MESSAGES)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.repo)
+
+    def test_incremental(self):
+        index = load_index(self.repo)
+        self.assertEqual(index.ranked(), [("core", 3), ("cli", 1), ("config", 1)])
+        self.assertTrue(os.path.exists(index_path(self.repo)))
+
+        git(self.repo, "commit", "-q", "--allow-empty", "-m", "fix(cli): again")
+        index = load_index(self.repo)
+        self.assertEqual(index.count("cli"), 2)
+        self.assertEqual(index.update(self.repo), 0)
+
+        # a branch forked from an indexed commit only adds its own commits
+        git(self.repo, "checkout", "-q", "-b", "other", "HEAD~2")
+        git(self.repo, "commit", "-q", "--allow-empty", "-m", "feat(ui): other")
+        index = load_index(self.repo)
+        self.assertEqual(index.count("ui"), 1)
+        self.assertEqual(index.count("core"), 3)
+        # the tip of `main` before `fix(cli): again` is reachable from its new tip
+        self.assertEqual(len(index.tips), 2)
+
+    def test_counted_once_across_many_branches(self):
+        main = git(self.repo, "symbolic-ref", "--short", "HEAD").strip()
+        for i in range(20):
+            git(self.repo, "checkout", "-q", "-b", f"b{i}", main)
+            git(self.repo, "commit", "-q", "--allow-empty", "-m", f"feat(s{i}): x")
+            load_index(self.repo)
+        git(self.repo, "checkout", "-q", main)
+        git(self.repo, "merge", "-q", "--no-edit", *(f"b{i}" for i in range(20)))
+        index = load_index(self.repo)
+        fresh = ScopeIndex()
+        fresh.update(self.repo)
+        self.assertEqual(index.ranked(), fresh.ranked())
+        self.assertEqual(index.count("s7"), 1)
+        self.assertEqual(len(index.tips), 1)
+
+    def test_unreachable_tips_are_dropped(self):
+        index = load_index(self.repo)
+        old = index.tips[0]
+        git(self.repo, "commit", "-q", "--amend", "--allow-empty", "-m", "fix(ui): amended")
+        index = load_index(self.repo)
+        self.assertNotIn(old, index.tips)
+        self.assertEqual(len(index.tips), 1)
+        self.assertEqual(index.count("ui"), 1)
+
+    def test_rebuilt_beyond_max_tips(self):
+        main = git(self.repo, "symbolic-ref", "--short", "HEAD").strip()
+        with mock.patch.object(scopes, "MAX_TIPS", 3):
+            for i in range(4):
+                git(self.repo, "checkout", "-q", "-b", f"b{i}", main)
+                git(self.repo, "commit", "-q", "--allow-empty", "-m", f"feat(s{i}): x")
+                index = load_index(self.repo)
+                self.assertLessEqual(len(index.tips), 3)
+        fresh = ScopeIndex()
+        fresh.update(self.repo)
+        self.assertEqual(index.ranked(), fresh.ranked())
+        self.assertEqual(index.tips, fresh.tips)
+
+    def test_rebuilt_when_a_tip_is_gone(self):
+        index = load_index(self.repo)
+        index.tips = ["0" * 40]
+        index.add("stale")
+        index.save(index_path(self.repo))
+        rebuilt = load_index(self.repo)
+        self.assertEqual(rebuilt.count("stale"), 0)
+        self.assertEqual(rebuilt.count("core"), 3)
+
+    def test_empty_and_corrupt(self):
+        empty = make_repo([])
+        try:
+            self.assertEqual(len(load_index(empty)), 0)
+        finally:
+            shutil.rmtree(empty)
+        os.makedirs(os.path.dirname(index_path(self.repo)), exist_ok=True)
+        with open(index_path(self.repo), "w") as f:
+            f.write("{not json")
+        self.assertEqual(load_index(self.repo).count("core"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
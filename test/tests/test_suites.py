@@ -1,5 +1,8 @@
 from typing import Callable, List
 from mkcommit.model import ValidationFailedException
+from mkcommit.blocks import Keyword
+from mkcommit.header import Header, HeaderType, Preamble, parse_header
+import time
 import unittest
 from mkcommit.suites import semantic
 from mkcommit.suites import conventional
@@ -59,6 +62,20 @@ class TestSemantic(Fixture):
             semantic.has_short_commit_msg_proper_length
         )
 
+    def test_semantic_extended_keywords(self):
+        """Extending the keyword list should not be masked by the matcher cache"""
+        semantic.is_semantic("feat: warm up the cache")
+        with self.assertRaises(ValidationFailedException):
+            semantic.is_keyword("sec")
+        semantic.commit_keywords.append(Keyword("sec", "Security fix"))
+        try:
+            self.eval_list(["sec: patch", "feat, sec: patch"], [], semantic.is_semantic)
+            self.assertTrue(semantic.is_keyword("sec"))
+        finally:
+            semantic.commit_keywords.pop()
+            semantic.clear_matcher_cache()
+        self.eval_list([], ["sec: patch"], semantic.is_semantic)
+
 
 class TestConventional(Fixture):
 
@@ -127,5 +144,52 @@ class TestTechnica(Fixture):
         )
 
 
+class TestHeader(unittest.TestCase):
+
+    def test_parse_semantic(self):
+        header = parse_header("feat(cli), fix!: do things: properly")
+        self.assertEqual(
+            header,
+            Header(
+                (HeaderType("feat", "cli"), HeaderType("fix", None, True)),
+                "do things: properly"
+            )
+        )
+        self.assertEqual(header.scopes, ("cli",))
+        self.assertTrue(header.breaking)
+
+    def test_parse_preamble(self):
+        header = parse_header("[PROJECT-1234/KrCz] feat: x", with_preamble=True, ticket_first=True)
+        self.assertEqual(header.preamble, Preamble("KrCz", "PROJECT-1234"))
+        self.assertEqual(header.keywords, ("feat",))
+
+    def test_parse_merge(self):
+        self.assertTrue(parse_header("Merge branch a into b").merge)
+        self.assertFalse(parse_header("Merge branch: a", allow_default_merge_msg=False).merge)
+
+    def test_has_short_commit_msg_proper_length_uses_subject(self):
+        """Colons in the subject should not cut the description short"""
+        with self.assertRaises(ValidationFailedException):
+            semantic.has_short_commit_msg_proper_length("feat: a:" + "b" * 60)
+
+    def test_has_short_commit_msg_proper_length_malformed_headers(self):
+        """Headers the grammar rejects are measured up to the next colon, as they always were"""
+        for header in ("feat:x", "feat(a b): x", "feat(): x", "feat: ,x", "feat!!: x", "feat: "):
+            self.assertTrue(semantic.has_short_commit_msg_proper_length(header), header)
+        with self.assertRaises(ValidationFailedException):
+            semantic.has_short_commit_msg_proper_length("feat(): " + "x" * 60)
+        with self.assertRaises(ValidationFailedException):
+            semantic.has_short_commit_msg_proper_length("no colon")
+
+    def test_adversarial_header_is_fast(self):
+        """A long comma chain with a broken tail must not backtrack"""
+        adversarial = "feat(a), " * 20000 + "feat(a)?: x"
+        start = time.perf_counter()
+        for validator in (semantic.is_semantic, conventional.is_conventional):
+            with self.assertRaises(ValidationFailedException):
+                validator(adversarial)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
 if __name__ == "__main__":
     unittest.main()
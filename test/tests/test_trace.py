@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+
+from mkcommit import trace
+from mkcommit.main import Mode, _main
+
+RES = os.path.join(os.path.dirname(__file__), '..', 'res')
+
+
+class TestTrace(unittest.TestCase):
+
+    def tearDown(self) -> None:
+        trace.stop()
+
+    def test_off_by_default(self):
+        self.assertIs(trace.span("a"), trace.span("b"))
+        self.assertIsNone(trace.stop())
+
+    def test_phases(self):
+        tracer = trace.start()
+        _main(os.path.join(RES, "example.test.mkcommit.py"), Mode.STDOUT, to_stdout=lambda m: None)
+        self.assertIs(trace.stop(), tracer)
+        names = [s.name for s in tracer.spans]
+        self.assertEqual(names[0], "import")
+        for phase in ("load_module", "commit", "to_stdout"):
+            self.assertIn(phase, names)
+        self.assertIn("load_module", tracer.summary())
+
+    def test_chrome_trace(self):
+        tracer = trace.start()
+        with trace.span("outer", detail=1):
+            with trace.span("inner"):
+                pass
+        trace.stop()
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "trace.json")
+            tracer.write(path)
+            with open(path) as f:
+                events = {e["name"]: e for e in json.load(f)["traceEvents"]}
+        outer, inner = events["outer"], events["inner"]
+        self.assertEqual(outer["ph"], "X")
+        self.assertEqual(outer["args"], {"detail": "1"})
+        self.assertLessEqual(outer["ts"], inner["ts"])
+        self.assertGreaterEqual(outer["ts"] + outer["dur"], inner["ts"] + inner["dur"])
+
+
+if __name__ == "__main__":
+    unittest.main()
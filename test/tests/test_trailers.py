@@ -0,0 +1,77 @@
+import shutil
+import subprocess
+import unittest
+
+from mkcommit.history import iter_history
+from mkcommit.trailers import extract, parse
+from test.tests.utils import make_repo
+
+BODIES = [
+    "Fixes.\n\nRefs: #1\nSigned-off-by: A <a@b>",
+    "Fixes.\n\nRefs: #1\n  continued here\nAcked-by: X",
+    "Fixes.\n\nsome text\nmore text\nmore\nSigned-off-by: A <a@b>",
+    "Fixes.\n\nsome text\nmore text\nmore\nmore\nSigned-off-by: A <a@b>",
+    "Fixes.\n\nRefs: #1\n# comment\nAcked-by: X\n\n# trailing comment\n",
+    "Refs: #1",
+    "Fixes.\nRefs: #1",
+    "Fixes.\n\nKey : spaced\nOther: x",
+    "Fixes.\n\nRefs: #1\n---\npatch: stuff",
+    "Fixes.\n\n(cherry picked from commit abc)\nnot a trailer",
+    "Fixes.\n\n  indented\nRefs: #1",
+    "Fixes.\n\nRefs: #1\n# c\n  cont",
+    "Fixes.\n\n  indented\nRefs: #1\nSigned-off-by: A <a@b>",
+    "  indented\nRefs: #1",
+    "",
+]
+
+
+class TestTrailers(unittest.TestCase):
+
+    def test_same_block_as_git(self):
+        for body in BODIES:
+            out = subprocess.run(
+                ("git", "interpret-trailers", "--parse"),
+                input=f"subject\n\n{body}".encode("utf-8"),
+                capture_output=True,
+                check=True
+            ).stdout.decode("utf-8").splitlines()
+            self.assertEqual([str(t) for t in parse(body).trailers], out, repr(body))
+
+    def test_add(self):
+        body = parse("Line 1\n\n\n")
+        body.add("Refs", "#1")
+        self.assertEqual(body.render(), "Line 1\n\nRefs: #1\n\n")
+        body = parse("")
+        body.add("Refs", "#1")
+        body.add("BREAKING CHANGE", "everything")
+        self.assertEqual(body.render(), "Refs: #1\nBREAKING CHANGE: everything")
+        self.assertEqual(parse(body.render()).get("breaking change"), ["everything"])
+
+    def test_replace_remove_dedupe(self):
+        body = parse("Text.\n\nRefs: #1\n  more\n# keep me\nAcked-by: X\nrefs: #2\nAcked-by: X\n")
+        body.dedupe()
+        self.assertEqual(body.get("Acked-by"), ["X"])
+        body.replace("Refs", "#3")
+        self.assertEqual(body.render(), "Text.\n\nRefs: #3\n# keep me\nAcked-by: X\n")
+        body.remove("acked-by")
+        body.replace("Reviewed-by", "Y")
+        self.assertEqual(body.render(), "Text.\n\nRefs: #3\n# keep me\nReviewed-by: Y\n")
+
+    def test_extract(self):
+        repo = make_repo([
+            "feat: a\n\nRefs: #1",
+            "fix: b\n\nBody.\n\nBREAKING CHANGE: all of it\nRefs: #2",
+            "chore: c",
+        ])
+        try:
+            found = list(extract(iter_history("HEAD", cwd=repo), ["refs", "BREAKING CHANGE"]))
+        finally:
+            shutil.rmtree(repo)
+        self.assertEqual([str(t) for _, t in found], [
+            "BREAKING CHANGE: all of it", "Refs: #2", "Refs: #1"
+        ])
+        self.assertEqual(len({sha for sha, _ in found}), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,20 @@
+import subprocess
+import tempfile
+from typing import Sequence
+
+
+def git(cwd: str, *args: str) -> str:
+    return subprocess.run(
+        ("git",) + args, cwd=cwd, check=True, capture_output=True
+    ).stdout.decode("utf-8")
+
+
+def make_repo(messages: Sequence[str]) -> str:
+    """Creates a temporary repository with one empty commit per message, oldest first"""
+    repo = tempfile.mkdtemp()
+    git(repo, "init", "-q")
+    git(repo, "config", "user.name", "Test")
+    git(repo, "config", "user.email", "test@example.com")
+    for m in messages:
+        git(repo, "commit", "-q", "--allow-empty", "-m", m)
+    return repo